@@ -0,0 +1,27 @@
+import json
+import re
+import threading
+from src.utils.fake_llm_provider import FakeLLMProvider
+
+OBJECTIVE_RE = re.compile(r"\*\*Objective:\*\*\n(.*?)\n")
+
+def action_response(tool: str, args: dict, thought: str = "Continuing with the plan.") -> str:
+    return "```json\n" + json.dumps({"thought": thought, "action": {"tool": tool, "args": args}}) + "\n```"
+
+def finish_response(summary: str) -> str:
+    return action_response("finish", {"summary": summary}, thought="I have completed the objective.")
+
+def scripted_llm(steps: int, tool: str, args: dict, latency: float = 0.0, chunk_size: int = 64) -> FakeLLMProvider:
+    counts: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def respond(prompt: str) -> str:
+        match = OBJECTIVE_RE.search(prompt)
+        objective = match.group(1) if match else ""
+        with lock:
+            counts[objective] = step = counts.get(objective, 0) + 1
+        if step >= steps:
+            return finish_response(f"Finished '{objective}' after {step} steps.")
+        return action_response(tool, {**args, "seed": step})
+
+    return FakeLLMProvider(respond, chunk_size=chunk_size, latency=latency)
@@ -0,0 +1,242 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import wait
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ.setdefault("TRACE_EXPORTER", "off")
+os.environ.setdefault("TRAJECTORY_LIBRARY", "off")
+os.environ.setdefault("CHECKPOINTS", "off")
+
+from benchmarks import stub_tools
+from benchmarks.fakes import scripted_llm
+from src.agents.job_runtime import JobRuntime
+from src.agents.supervisor_agent import SupervisorAgent
+from src.memory.memory_manager import MemoryManager
+from src.planning.react_planner import ReactPlanner
+from src.tools.tool_manager import ToolManager
+from src.tools.ui_automation_tool import UIAutomationTool
+from src.tools.ui_backends import FakeUIBackend
+from src.utils.token_counter import estimate_tokens
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PROMPT_SAMPLE_STEPS = (1, 10, 25, 50, 75, 100)
+
+class PhaseTimer:
+    def __init__(self):
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.calls: dict[str, int] = defaultdict(int)
+
+    def wrap(self, target, attribute: str, phase: str, on_result=None):
+        original = getattr(target, attribute)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            finally:
+                self.seconds[phase] += time.perf_counter() - started
+                self.calls[phase] += 1
+            if on_result:
+                on_result(result)
+            return result
+
+        setattr(target, attribute, timed)
+
+    def per_call_ms(self, phase: str, calls: int) -> float:
+        return self.seconds[phase] * 1000 / max(1, calls)
+
+def _build_agent(steps: int, payload_chars: int, token_budget: int | None) -> SupervisorAgent:
+    llm = scripted_llm(steps, "bench_payload", {"size": payload_chars})
+    agent = SupervisorAgent(llm=llm, tool_manager=ToolManager(stub_tools))
+    if token_budget is not None:
+        agent.memory = MemoryManager(token_budget=token_budget)
+        agent.planner = ReactPlanner(agent.tool_manager, agent.memory, llm=llm)
+    return agent
+
+def _run_loop_once(steps: int, payload_chars: int, token_budget: int | None) -> tuple[dict, list[tuple[int, int]]]:
+    agent = _build_agent(steps, payload_chars, token_budget)
+    planner, memory = agent.planner, agent.memory
+    prompt_sizes: list[tuple[int, int]] = []
+
+    timer = PhaseTimer()
+    timer.wrap(planner, "step", "step")
+    timer.wrap(planner.prompt_builder, "build", "prompt_build", on_result=lambda prompt: prompt_sizes.append((len(prompt), estimate_tokens(prompt))))
+    timer.wrap(memory, "get_full_history", "memory")
+    timer.wrap(memory, "add_entry", "memory")
+    timer.wrap(planner, "_get_response", "llm_stream")
+    timer.wrap(planner, "_parse_llm_response", "parse")
+    timer.wrap(planner, "_execute_calls", "tool_dispatch")
+    timer.wrap(agent.tool_manager.get_tool("bench_payload"), "execute", "tool_execute")
+
+    result = agent.run_task("Collect every benchmark record and summarize them.")
+    agent.shutdown()
+    if result.steps != steps:
+        raise RuntimeError(f"Scripted run finished after {result.steps} steps instead of {steps}: {result.message}")
+
+    phases = {
+        phase: timer.per_call_ms(phase, steps)
+        for phase in ("step", "prompt_build", "memory", "llm_stream", "parse", "tool_dispatch", "tool_execute")
+    }
+    phases["dispatch_overhead"] = phases["tool_dispatch"] - phases["tool_execute"]
+    phases["other"] = phases["step"] - sum(
+        phases[phase] for phase in ("prompt_build", "memory", "llm_stream", "parse", "tool_dispatch")
+    )
+    return phases, prompt_sizes
+
+def _peak_memory_kib(steps: int, payload_chars: int, token_budget: int | None) -> float:
+    tracemalloc.start()
+    try:
+        _run_loop_once(steps, payload_chars, token_budget)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+def bench_agent_loop(name: str, steps: int, payload_chars: int, repeat: int, token_budget: int | None = None) -> tuple[dict, dict]:
+    runs = [_run_loop_once(steps, payload_chars, token_budget) for _ in range(repeat)]
+    metrics = {
+        f"{name}.{phase}_ms_per_step": round(statistics.median(run[0][phase] for run in runs), 4)
+        for phase in runs[0][0]
+    }
+
+    prompt_sizes = runs[0][1]
+    samples = {str(step): prompt_sizes[step - 1][0] for step in PROMPT_SAMPLE_STEPS if step <= len(prompt_sizes)}
+    metrics[f"{name}.prompt_chars_final"] = prompt_sizes[-1][0]
+    metrics[f"{name}.prompt_tokens_max"] = max(tokens for _, tokens in prompt_sizes)
+    metrics[f"{name}.peak_memory_kib"] = round(_peak_memory_kib(steps, payload_chars, token_budget), 1)
+    details = {"steps": steps, "payload_chars": payload_chars, "prompt_chars_by_step": samples}
+    return metrics, details
+
+def bench_concurrency(jobs: int, steps: int, workers_levels: list[int], llm_latency: float, tool_ms: int) -> tuple[dict, dict]:
+    metrics, details = {}, {"jobs": jobs, "steps_per_job": steps, "llm_latency_s": llm_latency, "tool_ms": tool_ms}
+    for workers in workers_levels:
+        llm = scripted_llm(steps, "bench_sleep", {"ms": tool_ms}, latency=llm_latency)
+        runtime = JobRuntime(max_workers=workers, llm=llm, llm_concurrency=workers, tool_manager=ToolManager(stub_tools))
+        started = time.perf_counter()
+        futures = [runtime.submit(f"Benchmark job {index}", f"bench-{index}") for index in range(jobs)]
+        wait(futures)
+        elapsed = time.perf_counter() - started
+        runtime.shutdown()
+
+        results = [future.result() for future in futures]
+        completed = sum(1 for result in results if result.status == result.COMPLETED)
+        if completed != jobs:
+            raise RuntimeError(f"Only {completed}/{jobs} benchmark jobs completed with {workers} workers.")
+        metrics[f"concurrency.workers_{workers}.tasks_per_s"] = round(jobs / elapsed, 2)
+        metrics[f"concurrency.workers_{workers}.elapsed_s"] = round(elapsed, 3)
+        details[f"workers_{workers}"] = {"llm": dict(runtime.llm.stats)}
+    return metrics, details
+
+def bench_ui_tree(breadth: int, depth: int, repeat: int) -> tuple[dict, dict]:
+    backend = FakeUIBackend({"Benchmark Window": FakeUIBackend.build_tree(breadth, depth)})
+    cold_runs = []
+    for _ in range(5):
+        tool = UIAutomationTool(backend=backend)
+        started = time.perf_counter()
+        tool.execute("get_controls", window_title="Benchmark Window", depth=depth)
+        cold_runs.append(time.perf_counter() - started)
+    cold = statistics.median(cold_runs)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        tool.execute("get_controls", window_title="Benchmark Window", depth=depth)
+    warm = (time.perf_counter() - started) / repeat
+
+    metrics = {"ui_tree.cold_ms": round(cold * 1000, 3), "ui_tree.warm_ms": round(warm * 1000, 3)}
+    return metrics, {"breadth": breadth, "depth": depth, "tree_walks": tool.stats["tree_walks"]}
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s")
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    print(f"\n{'metric':<52} {'baseline':>12} {'current':>12} {'change':>9}")
+    for metric, value in current.items():
+        previous = baseline.get(metric)
+        if not previous:
+            continue
+        change = (value - previous) / previous
+        worse = -change if higher_is_better(metric) else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        print(f"{metric:<52} {previous:>12} {value:>12} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(metric)
+    return regressions
+
+def run(args) -> dict:
+    metrics, details = {}, {}
+    scenarios = [
+        ("agent_loop", lambda: bench_agent_loop("agent_loop", args.steps, args.payload_chars, args.repeat)),
+        ("agent_loop_unbounded", lambda: bench_agent_loop("agent_loop_unbounded", args.steps, args.payload_chars, args.repeat, token_budget=0)),
+        ("concurrency", lambda: bench_concurrency(args.jobs, args.job_steps, args.workers, args.llm_latency, args.tool_ms)),
+        ("ui_tree", lambda: bench_ui_tree(4, 5, args.repeat * 10)),
+    ]
+    for name, scenario in scenarios:
+        if args.only and name not in args.only:
+            continue
+        print(f"Running {name}...")
+        scenario_metrics, details[name] = scenario()
+        metrics.update(scenario_metrics)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics": metrics,
+        "details": details,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the agent loop (no API key or network needed)")
+    parser.add_argument("--steps", type=int, default=100, help="steps per scripted agent loop")
+    parser.add_argument("--payload-chars", type=int, default=6000, help="size of each stub tool observation")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per loop scenario; the median is reported")
+    parser.add_argument("--jobs", type=int, default=16, help="concurrent tasks in the throughput scenario")
+    parser.add_argument("--job-steps", type=int, default=5, help="steps per concurrent task")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="job worker counts to measure")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="simulated LLM latency in seconds for concurrent tasks")
+    parser.add_argument("--tool-ms", type=int, default=10, help="simulated tool latency in milliseconds for concurrent tasks")
+    parser.add_argument("--only", nargs="+", help="run only these scenarios")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"), help="where results are written")
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"), help="results file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    report = run(args)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report["metrics"], json.load(f)["metrics"], args.tolerance)
+    else:
+        for metric, value in report["metrics"].items():
+            print(f"{metric:<52} {value:>12}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
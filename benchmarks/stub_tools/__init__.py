@@ -0,0 +1 @@
+# This file makes the 'stub_tools' directory a Python package.
@@ -0,0 +1,17 @@
+from src.tools.base_tool import BaseTool
+
+class PayloadTool(BaseTool):
+    tags = ("benchmark", "payload", "record", "text")
+    parameters = {"size": {"type": "integer"}, "seed": {"type": "integer"}}
+
+    @property
+    def name(self) -> str:
+        return "bench_payload"
+
+    @property
+    def description(self) -> str:
+        return "Returns a deterministic text payload. Args: size (int), seed (int, optional)."
+
+    def execute(self, size: int = 1000, seed: int = 0) -> str:
+        line = f"record {seed}: lorem ipsum dolor sit amet consectetur adipiscing elit\n"
+        return (line * (int(size) // len(line) + 1))[:int(size)]
@@ -0,0 +1,18 @@
+import time
+from src.tools.base_tool import BaseTool
+
+class SleepTool(BaseTool):
+    tags = ("benchmark", "sleep", "wait", "io")
+    parameters = {"ms": {"type": "integer"}, "seed": {"type": "integer"}}
+
+    @property
+    def name(self) -> str:
+        return "bench_sleep"
+
+    @property
+    def description(self) -> str:
+        return "Waits to simulate I/O-bound work. Args: ms (int), seed (int, optional)."
+
+    def execute(self, ms: int = 10, seed: int = 0) -> str:
+        time.sleep(int(ms) / 1000)
+        return f"Slept {ms} ms."
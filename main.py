@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 
@@ -5,10 +6,59 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
 from src.agents.supervisor_agent import SupervisorAgent
+from src.tools.feedback_channel import read_line
 from src.utils.logger import get_logger
 
+def run_batch(input_path: str, output_path: str, workers: int | None):
+    from src.agents.job_runtime import JobRuntime
+
+    runtime = JobRuntime(max_workers=workers)
+    try:
+        summary = runtime.run_batch(input_path, output_path)
+    finally:
+        runtime.shutdown()
+    print(f"\n--- Batch Finished ---")
+    print(f"Results written to {output_path}: {summary}")
+
+def run_resume(task_id: str | None):
+    logger = get_logger("main")
+    agent = SupervisorAgent()
+    try:
+        result = agent.resume(task_id)
+    except ValueError as e:
+        logger.error("Could not resume: %s", e)
+        print(f"\nERROR: {e}")
+        return
+    finally:
+        agent.shutdown()
+    print(f"\n--- Task Finished ---")
+    print(f"Final Result: {result.message}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Windows AI Agent")
+    parser.add_argument("--batch", metavar="INPUT_JSONL", help="run every objective in a JSONL file concurrently")
+    parser.add_argument("--output", metavar="OUTPUT_JSONL", default="results.jsonl", help="where batch results are written")
+    parser.add_argument("--workers", type=int, default=None, help="number of concurrent jobs in batch mode")
+    parser.add_argument(
+        "--resume", metavar="TASK_ID", nargs="?", const="latest",
+        help="resume an interrupted task from its last checkpoint (the most recent one if no id is given)",
+    )
+    args = parser.parse_args()
+
     logger = get_logger("main")
+    if args.batch:
+        try:
+            run_batch(args.batch, args.output, args.workers)
+        except ValueError as e:
+            logger.error("Configuration error: %s", e)
+            print(f"\nERROR: {e}")
+            print("Please ensure your .env file is set up correctly.")
+        return
+
+    if args.resume:
+        run_resume(None if args.resume == "latest" else args.resume)
+        return
+
     logger.info("Initializing Windows AI Agent...")
 
     try:
@@ -19,9 +69,10 @@ def main():
         print("Enter your objective below. Type 'exit' to quit.")
         
         while True:
-            user_query = input("\nObjective: ")
+            user_query = read_line("\nObjective: ")
             if user_query.lower() == 'exit':
                 print("Exiting agent.")
+                agent.shutdown()
                 break
             
             if not user_query:
@@ -34,11 +85,11 @@ def main():
             print("\nEnter a new objective or type 'exit'.")
 
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         print(f"\nERROR: {e}")
         print("Please ensure your .env file is set up correctly.")
     except Exception as e:
-        logger.critical(f"An unhandled exception occurred: {e}", exc_info=True)
+        logger.critical("An unhandled exception occurred: %s", e, exc_info=True)
         print(f"\nA critical error occurred. Please check the logs for details.")
 
 if __name__ == "__main__":
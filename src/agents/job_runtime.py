@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from src import tools
+from src.agents.supervisor_agent import SupervisorAgent
+from src.agents.task_result import TaskResult
+from src.tools.feedback_channel import get_feedback_channel
+from src.tools.tool_manager import ToolManager
+from src.config import config
+from src.utils.llm_scheduler import FairLLMScheduler
+from src.utils.logger import get_logger
+from src.utils.task_context import new_task_id
+
+logger = get_logger(__name__)
+
+class JobRuntime:
+    def __init__(self, max_workers: int | None = None, llm=None, llm_concurrency: int | None = None, tool_manager: ToolManager | None = None):
+        self.max_workers = max_workers or config.JOB_MAX_WORKERS
+        self.tool_manager = tool_manager or ToolManager(tools)
+        self.llm = FairLLMScheduler(llm, llm_concurrency or config.LLM_MAX_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self.tool_manager.warm_up(config.TOOL_WARMUP)
+
+    def _run_job(
+        self, job_id: str, objective: str, max_steps: int | None, time_budget: float | None, resume: bool = False
+    ) -> TaskResult:
+        started = time.monotonic()
+        try:
+            agent = SupervisorAgent(
+                llm=self.llm, tool_manager=self.tool_manager, escalate=False, suspend_for_feedback=config.FEEDBACK_SUSPEND_JOBS
+            )
+            if resume:
+                return agent.resume(job_id)
+            return agent.run_task(objective, task_id=job_id, max_steps=max_steps, time_budget=time_budget)
+        except Exception as e:
+            logger.error("Job %s failed: %s", job_id, e, exc_info=True)
+            return TaskResult(job_id, objective, TaskResult.FAILED, str(e), 0, time.monotonic() - started)
+
+    def _start(self, future: Future, *job):
+        try:
+            running = self._executor.submit(self._run_job, *job)
+        except RuntimeError as e:
+            future.set_result(TaskResult(job[0], job[1], TaskResult.FAILED, f"The job could not be resumed: {e}", 0, 0.0))
+            return
+        running.add_done_callback(lambda done: self._settle(future, done.result()))
+
+    def _settle(self, future: Future, result: TaskResult):
+        if result.status != TaskResult.SUSPENDED or not result.waiting_for:
+            future.set_result(result)
+            return
+        logger.info("Job %s released its worker until question %s is answered.", result.task_id, result.waiting_for)
+        get_feedback_channel().when_resolved(
+            result.waiting_for, lambda question: self._start(future, result.task_id, result.objective, None, None, True)
+        )
+
+    def submit(self, objective: str, job_id: str | None = None, max_steps: int | None = None, time_budget: float | None = None) -> Future:
+        job_id = job_id or new_task_id()
+        logger.info("Submitted job %s: %s", job_id, objective)
+        future = Future()
+        self._start(future, job_id, objective, max_steps, time_budget)
+        return future
+
+    def run_batch(self, input_path: str, output_path: str) -> dict:
+        jobs = []
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning("Skipping line %s of %s: invalid JSON (%s).", line_number, input_path, e)
+                    continue
+                if isinstance(record, str):
+                    record = {"objective": record}
+                if not isinstance(record, dict):
+                    logger.warning("Skipping line %s of %s: expected an object or a string.", line_number, input_path)
+                    continue
+                objective = record.get("objective")
+                if not objective:
+                    logger.warning("Skipping line %s of %s: no 'objective'.", line_number, input_path)
+                    continue
+                jobs.append((str(record.get("id") or f"job-{line_number}"), objective, record.get("max_steps"), record.get("time_budget")))
+
+        started = time.monotonic()
+        counts: dict[str, int] = {}
+        write_lock = threading.Lock()
+        with open(output_path, "w", encoding="utf-8") as out:
+            futures = [self.submit(objective, job_id, max_steps, time_budget) for job_id, objective, max_steps, time_budget in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                with write_lock:
+                    out.write(json.dumps(result.to_dict()) + "\n")
+                    out.flush()
+                counts[result.status] = counts.get(result.status, 0) + 1
+
+        summary = {"jobs": len(jobs), "elapsed_s": round(time.monotonic() - started, 3), "statuses": counts, "llm": self.llm.stats}
+        logger.info("Batch finished: %s", summary)
+        return summary
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self.tool_manager.shutdown()
@@ -1,33 +1,258 @@
+import json
+import time
 from src.agents.base_agent import BaseAgent
+from src.agents.task_result import TaskResult
 from src import tools
+from src.tools.feedback_channel import active_feedback_channel, get_feedback_channel
 from src.tools.tool_manager import ToolManager
+from src.memory.checkpoint_log import CheckpointStore, TaskCheckpoint, TaskCheckpointer
 from src.memory.memory_manager import MemoryManager
+from src.memory.trajectory_store import TrajectoryStore, get_trajectory_store
+from src.planning.loop_detector import LoopDetector
 from src.planning.react_planner import ReactPlanner
+from src.planning.trajectory_replay import TrajectoryReplayer
 from src.config import config
 from src.utils.logger import get_logger
+from src.utils.task_context import current_task_id, new_task_id, task_can_suspend
+from src.utils.tracing import format_trace_summary, get_tracer
 
 logger = get_logger(__name__)
 
 class SupervisorAgent(BaseAgent):
-    def __init__(self):
-        self.tool_manager = ToolManager(tools)
+    def __init__(
+        self,
+        llm=None,
+        tool_manager: ToolManager | None = None,
+        trajectories: TrajectoryStore | None = None,
+        escalate: bool | None = None,
+        checkpoints: CheckpointStore | None = None,
+        suspend_for_feedback: bool = False,
+    ):
+        self.owns_tools = tool_manager is None
+        self.tool_manager = tool_manager or ToolManager(tools)
         self.memory = MemoryManager()
-        self.planner = ReactPlanner(self.tool_manager, self.memory)
+        self.planner = ReactPlanner(self.tool_manager, self.memory, llm=llm)
+        self.trace_summary: dict = {}
+        self.trajectories = trajectories or (get_trajectory_store() if config.TRAJECTORY_ENABLED else None)
+        self.replayer = TrajectoryReplayer(self.planner, self.trajectories) if self.trajectories else None
+        self.checkpoints = checkpoints or (CheckpointStore(config.CHECKPOINT_DIR) if config.CHECKPOINT_ENABLED else None)
+        self.suspend_for_feedback = suspend_for_feedback and self.checkpoints is not None
+        if escalate is None:
+            escalate = config.LOOP_ESCALATE_TO_HUMAN
+        self.loop_detector = LoopDetector(escalate=escalate and "human_feedback" in self.tool_manager.tool_specs)
+        if self.owns_tools:
+            self.tool_manager.warm_up(config.TOOL_WARMUP)
 
     def run(self, user_query: str) -> str:
-        logger.info(f"Starting new task with objective: {user_query}")
-        self.memory.clear()
-        
-        for i in range(config.MAX_THOUGHTS):
-            logger.info(f"--- Step {i+1}/{config.MAX_THOUGHTS} ---")
+        return self.run_task(user_query).message
+
+    def run_task(
+        self,
+        user_query: str,
+        task_id: str | None = None,
+        max_steps: int | None = None,
+        time_budget: float | None = None,
+        resume_from: TaskCheckpoint | None = None,
+    ) -> TaskResult:
+        task_id = task_id or new_task_id()
+        token = current_task_id.set(task_id)
+        suspend_token = task_can_suspend.set(self.suspend_for_feedback)
+        tracer = get_tracer()
+        tracer.collect(task_id)
+        result = None
+        try:
+            with tracer.span("agent.run", objective_chars=len(user_query), resumed=resume_from is not None) as span:
+                result = self._run(
+                    user_query, task_id, max_steps or config.MAX_THOUGHTS, time_budget or config.TASK_TIME_BUDGET, resume_from
+                )
+                span.set(outcome=result.status, steps=result.steps, wasted_steps=self.planner.stats["wasted_steps"])
+            return result
+        finally:
+            if not (result and result.status == TaskResult.SUSPENDED):
+                self.tool_manager.end_task(task_id)
+                channel = active_feedback_channel()
+                if channel:
+                    channel.end_task(task_id)
+            self.trace_summary = tracer.task_summary(task_id)
+            tracer.flush()
+            logger.info("Trace summary for task %s: %s", task_id, format_trace_summary(self.trace_summary))
+            task_can_suspend.reset(suspend_token)
+            current_task_id.reset(token)
+
+    def resume(self, task_id: str | None = None) -> TaskResult:
+        if self.checkpoints is None:
+            raise ValueError("Checkpoints are disabled, there is nothing to resume.")
+        checkpoint = self.checkpoints.load(task_id) if task_id else self.checkpoints.latest()
+        if checkpoint.finished:
+            raise ValueError(f"Task '{checkpoint.task_id}' already ended with status '{checkpoint.status}'.")
+        logger.info("Resuming task %s after step %s: %s", checkpoint.task_id, checkpoint.step, checkpoint.objective)
+        return self.run_task(
+            checkpoint.objective, checkpoint.task_id, checkpoint.max_steps, checkpoint.time_budget, resume_from=checkpoint
+        )
+
+    def shutdown(self):
+        if self.owns_tools:
+            self.tool_manager.shutdown()
+
+    def _escalate(self, user_query: str, reason: str) -> bool:
+        question = (
+            f"I seem to be stuck on the task '{user_query}' because {reason}. "
+            "How should I proceed? Reply 'abort' to stop the task."
+        )
+        answer = self.tool_manager.execute_tool("human_feedback", {"question": question})
+        self.memory.add_entry("observation", f"Escalated to the user because {reason}. {answer}")
+        return "abort" in answer.lower()
+
+    def _result(
+        self, task_id: str, user_query: str, status: str, summary: str, steps: int, started: float, waiting_for: str | None = None
+    ) -> TaskResult:
+        result = TaskResult(
+            task_id, user_query, status, summary, steps, time.monotonic() - started, list(self.loop_detector.interventions),
+            waiting_for,
+        )
+        if status == TaskResult.COMPLETED:
+            logger.info(result.message)
+        else:
+            logger.warning(result.message)
+        logger.info("Memory compaction stats: %s", self.memory.compaction_stats())
+        logger.info("Tool result cache stats: %s", self.tool_manager.cache_stats())
+        logger.info("Tool worker stats: %s", self.tool_manager.worker_stats())
+        logger.info("Planner stats: %s (wasted step rate %.0f%%)", self.planner.stats, self.planner.wasted_step_rate() * 100)
+        return result
+
+    def _suspension(self, task_id: str) -> str | None:
+        channel = active_feedback_channel()
+        if not self.suspend_for_feedback or channel is None:
+            return None
+        return channel.take_suspension(task_id)
+
+    def _restore(self, checkpoint: TaskCheckpoint):
+        self.memory.restore(checkpoint.entries, checkpoint.summary, checkpoint.window, checkpoint.memory_stats)
+        self.memory.observations.restore_counter(checkpoint.observation_counter)
+        self.planner.stats.update(checkpoint.planner_stats)
+        self.planner.executed_steps = list(checkpoint.executed_steps)
+        self.planner.catalog.pin(checkpoint.catalog)
+
+    def _recover(self, checkpoint: TaskCheckpoint, user_query: str) -> bool:
+        if checkpoint.waiting_for:
+            notes = ["The task was paused while waiting for the user and has now resumed."]
+        else:
+            notes = [f"The agent was restarted and resumed this task after step {checkpoint.step}."]
+        notes.extend(self.tool_manager.restore_sessions(checkpoint.sessions, checkpoint.task_id))
+        self.memory.add_entry("hint", " ".join(notes))
+        if checkpoint.waiting_for:
+            question = get_feedback_channel().wait(checkpoint.waiting_for)
+            self.memory.add_entry(
+                "observation",
+                question.observation if question else
+                f"The answer to question {checkpoint.waiting_for} was lost; ask again if it is still needed.",
+            )
+            return False
+        interrupted = checkpoint.interrupted
+        if not interrupted:
+            return False
+
+        calls = interrupted["calls"]
+        unsafe = [call for call in calls if not call["idempotent"]]
+        if unsafe:
+            described = ", ".join(f"{call['tool']} {json.dumps(call['args'])[:200]}" for call in unsafe)
+            logger.warning("Not repeating non-idempotent actions of interrupted step %s: %s", interrupted['step'], described)
+            self.memory.add_entry(
+                "observation",
+                f"The restart interrupted step {interrupted['step']} while it was running: {described}. "
+                "These actions were not repeated because running them twice could have side effects. "
+                "Check whether they took effect before trying them again.",
+            )
+        safe = [{"tool": call["tool"], "args": call["args"]} for call in calls if call["idempotent"]]
+        if safe:
+            self.planner.run_actions(
+                f"Re-running the actions of step {interrupted['step']} that were interrupted by the restart.", safe, user_query
+            )
+        return True
+
+    def _run(
+        self, user_query: str, task_id: str, max_steps: int, time_budget: float, resume_from: TaskCheckpoint | None = None
+    ) -> TaskResult:
+        started = time.monotonic()
+        self.tool_manager.reset_task_state()
+        self.planner.begin_task()
+        self.loop_detector.reset()
+        if resume_from is None:
+            logger.info("Starting new task with objective: %s", user_query)
+            self.memory.clear()
+            first_step = 0
+        else:
+            self._restore(resume_from)
+            started -= resume_from.elapsed
+            first_step = resume_from.step
+
+        checkpointer = None
+        if self.checkpoints:
+            checkpointer = TaskCheckpointer(
+                self.checkpoints.open(task_id), self.memory, self.planner, self.tool_manager, task_id, started, first_step
+            )
+            if resume_from is None:
+                checkpointer.start(user_query, max_steps, time_budget)
+        self.planner.checkpointer = checkpointer
+
+        result = None
+        try:
+            if resume_from is None:
+                first_step = self.replayer.replay(user_query) if self.replayer else 0
+            elif self._recover(resume_from, user_query):
+                first_step += 1
+            if checkpointer and first_step > checkpointer.completed:
+                checkpointer.step(first_step)
+            result = self._loop(user_query, task_id, first_step, max_steps, time_budget, started, checkpointer)
+            return result
+        finally:
+            self.planner.checkpointer = None
+            if checkpointer:
+                if result is None:
+                    checkpointer.writer.close()
+                elif result.status == TaskResult.SUSPENDED:
+                    checkpointer.suspend(result.waiting_for)
+                else:
+                    checkpointer.finish(result.status)
+                    if result.status == TaskResult.COMPLETED:
+                        self.checkpoints.discard(task_id)
+
+    def _loop(
+        self, user_query: str, task_id: str, first_step: int, max_steps: int, time_budget: float, started: float,
+        checkpointer: TaskCheckpointer | None,
+    ) -> TaskResult:
+        for i in range(first_step, max_steps):
+            waiting_for = self._suspension(task_id)
+            if waiting_for:
+                return self._result(
+                    task_id, user_query, TaskResult.SUSPENDED,
+                    f"Waiting for the user to answer question {waiting_for}.", i, started, waiting_for,
+                )
+            elapsed = time.monotonic() - started
+            if time_budget and elapsed > time_budget:
+                return self._result(
+                    task_id, user_query, TaskResult.TIME_BUDGET,
+                    f"Used {elapsed:.1f}s of the {time_budget:g}s budget after {i} steps.", i, started,
+                )
+
+            logger.info("--- Step %s/%s ---", i+1, max_steps)
             
             observation, is_finished = self.planner.step(user_query)
             
             if is_finished:
-                final_summary = f"Task completed successfully. Final summary: {observation}"
-                logger.info(final_summary)
-                return final_summary
+                if self.trajectories:
+                    self.trajectories.record(user_query, self.planner.executed_steps)
+                return self._result(task_id, user_query, TaskResult.COMPLETED, observation, i + 1, started)
+
+            verdict, reason = self.loop_detector.observe(self.planner.last_actions, self.planner.last_observation)
+            if verdict == LoopDetector.HINT:
+                self.memory.add_entry("hint", LoopDetector.hint(reason))
+            elif verdict == LoopDetector.ESCALATE:
+                if self._escalate(user_query, reason):
+                    return self._result(task_id, user_query, TaskResult.LOOP_ABORTED, f"{reason} and the user asked to stop", i + 1, started)
+            elif verdict == LoopDetector.ABORT:
+                return self._result(task_id, user_query, TaskResult.LOOP_ABORTED, reason, i + 1, started)
+            if checkpointer:
+                checkpointer.step(i + 1)
         
-        final_report = "Task stopped: Maximum number of thoughts reached."
-        logger.warning(final_report)
-        return final_report
+        return self._result(task_id, user_query, TaskResult.MAX_STEPS, "", max_steps, started)
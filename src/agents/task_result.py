@@ -0,0 +1,54 @@
+class TaskResult:
+    COMPLETED = "completed"
+    MAX_STEPS = "max_steps"
+    TIME_BUDGET = "time_budget"
+    LOOP_ABORTED = "loop_aborted"
+    FAILED = "failed"
+    SUSPENDED = "suspended"
+
+    __slots__ = ("task_id", "objective", "status", "summary", "steps", "elapsed", "interventions", "waiting_for")
+
+    def __init__(
+        self,
+        task_id: str,
+        objective: str,
+        status: str,
+        summary: str,
+        steps: int,
+        elapsed: float,
+        interventions: list[tuple[str, str]] | None = None,
+        waiting_for: str | None = None,
+    ):
+        self.task_id = task_id
+        self.objective = objective
+        self.status = status
+        self.summary = summary
+        self.steps = steps
+        self.elapsed = elapsed
+        self.interventions = interventions or []
+        self.waiting_for = waiting_for
+
+    @property
+    def message(self) -> str:
+        if self.status == self.COMPLETED:
+            return f"Task completed successfully. Final summary: {self.summary}"
+        if self.status == self.MAX_STEPS:
+            return f"Task stopped: Maximum number of thoughts reached ({self.steps} steps)."
+        if self.status == self.TIME_BUDGET:
+            return f"Task stopped: Time budget exhausted. {self.summary}"
+        if self.status == self.LOOP_ABORTED:
+            return f"Task aborted: The agent was stuck because {self.summary}."
+        if self.status == self.SUSPENDED:
+            return f"Task paused: {self.summary}"
+        return f"Task failed: {self.summary}"
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.task_id,
+            "objective": self.objective,
+            "status": self.status,
+            "summary": self.summary,
+            "steps": self.steps,
+            "elapsed_s": round(self.elapsed, 3),
+            "interventions": [{"kind": kind, "reason": reason} for kind, reason in self.interventions],
+        }
@@ -7,15 +7,113 @@ load_dotenv(dotenv_path=dotenv_path)
 class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     LLM_MODEL = "gemini-2.5-pro"
+    LLM_STREAMING = True
+    LLM_JSON_MODE = True
+
+    CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', '.cache')
+    LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "read_write")
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_completions.sqlite3"))
+    LLM_CACHE_MAX_BYTES = 256 * 1024 * 1024
 
     MAX_THOUGHTS = 100
+    TASK_TIME_BUDGET = 1800
+    LOOP_WINDOW = 8
+    LOOP_REPEAT_THRESHOLD = 3
+    LOOP_ERROR_THRESHOLD = 3
+    LOOP_RECOVERY_STEPS = 8
+    LOOP_ESCALATE_TO_HUMAN = True
+    JOB_MAX_WORKERS = 16
+    LLM_MAX_CONCURRENCY = 8
+    TOOL_MAX_WORKERS = 8
+    TOOL_DISCOVERY = os.getenv("TOOL_DISCOVERY", "lazy")
+    TOOL_CACHE_ENABLED = True
+    TOOL_CACHE_MAX_ENTRIES = 256
+    TOOL_CACHE_TTL = 300
+    TOOL_TIMEOUTS_ENABLED = True
+    TOOL_DEFAULT_TIMEOUT = 120
+    TOOL_TIMEOUT_GRACE = 15
+    TOOL_MAX_STUCK_WORKERS = 16
+
+    TOOL_WARMUP = ["send_whatsapp_message"]
+    TOOL_CATALOG_FILTER = True
+    TOOL_CATALOG_MAX_TOOLS = 4
+    TOOL_CATALOG_MIN_SCORE = 4
+    TOOL_CATALOG_HISTORY_CHARS = 2000
+    TOOL_CATALOG_ALWAYS = ["human_feedback"]
+
+    BROWSER_POOL_MAX_SESSIONS = 4
+    BROWSER_POOL_PREWARM = int(os.getenv("BROWSER_POOL_PREWARM", "0"))
+    BROWSER_POOL_ACQUIRE_TIMEOUT = 60
+    BROWSER_SCRIPT_STEP_CHARS = 300
+
+    FILE_READ_MAX_BYTES = 256 * 1024
+    FILE_READ_MANY_MAX_BYTES = 32 * 1024
+    FILE_MMAP_THRESHOLD = 1024 * 1024
+    FILE_READ_WINDOW_LINES = 200
+    FILE_READ_MAX_LINES = 2000
+    FILE_LIST_MAX_ENTRIES = 200
+    FILE_GREP_MAX_MATCHES = 50
+    FILE_GREP_MAX_DEPTH = 8
+    FILE_GREP_LINE_CHARS = 300
+    FILE_BATCH_MAX_PATHS = 20
+
+    UI_TREE_DEFAULT_DEPTH = 5
+    UI_TREE_CACHE_TTL = 30
+
+    FEEDBACK_SOURCES = os.getenv("FEEDBACK_SOURCES", "console,file").split(",")
+    FEEDBACK_DIR = os.path.join(CACHE_DIR, "feedback")
+    FEEDBACK_TIMEOUT = 900
+    FEEDBACK_SUSPEND_JOBS = True
+    FEEDBACK_SUSPEND_AFTER = 15
+    FEEDBACK_POLL_INTERVAL = 1.0
+    FEEDBACK_SOCKET_PORT = int(os.getenv("FEEDBACK_SOCKET_PORT", "8765"))
+
+    WHATSAPP_QUEUE_PATH = os.path.join(CACHE_DIR, "whatsapp_queue.sqlite3")
+    WHATSAPP_WAIT_TIME = 15
+    WHATSAPP_CLOSE_TIME = 3
+    WHATSAPP_BATCH_MAX = 5
+    WHATSAPP_MAX_ATTEMPTS = 4
+    WHATSAPP_RETRY_BASE = 30
+    WHATSAPP_RETRY_MAX = 900
+    WHATSAPP_EXPIRE_AFTER = 6 * 3600
+    WHATSAPP_IDLE_WAIT = 60
+    WHATSAPP_STATUS_LIMIT = 10
+
+    SYSTEM_COMMAND_TIMEOUT = 120
+    SYSTEM_COMMAND_HEAD_CHARS = 4000
+    SYSTEM_COMMAND_TAIL_CHARS = 4000
+
+    MEMORY_TOKEN_BUDGET = 32000
+    MEMORY_VERBATIM_TRIPLES = 6
+    MEMORY_MAX_ENTRY_TOKENS = 0
+    MEMORY_HISTORY_MAX_ENTRIES = 300
+    MEMORY_SUMMARIZER = "extractive"
+
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINTS", "on") != "off"
+    CHECKPOINT_DIR = os.path.join(CACHE_DIR, "checkpoints")
+    CHECKPOINT_FSYNC_EVERY = 8
+    CHECKPOINT_FSYNC_INTERVAL = 2.0
+    CHECKPOINT_KEEP_ENDED = 20
+
+    TRAJECTORY_ENABLED = os.getenv("TRAJECTORY_LIBRARY", "on") != "off"
+    TRAJECTORY_PATH = os.getenv("TRAJECTORY_PATH", os.path.join(CACHE_DIR, "trajectories.sqlite3"))
+    TRAJECTORY_MIN_SIMILARITY = 0.6
+    TRAJECTORY_HINT_STEPS = 20
+
+    OBSERVATION_MAX_CHARS = 4000
+    OBSERVATION_PAGE_CHARS = 4000
+    OBSERVATION_STORE_MAX_BYTES = 64 * 1024 * 1024
+
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "jsonl")
+    TRACE_PATH = os.getenv("TRACE_PATH", os.path.join(CACHE_DIR, "traces.jsonl"))
+    TRACE_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
 
     LOG_LEVEL = "INFO"
+    LOG_ASYNC = True
+    LOG_MAX_MESSAGE_CHARS = 2000
+    LOG_JSON_ENABLED = os.getenv("LOG_JSON", "off") != "off"
+    LOG_JSON_PATH = os.getenv("LOG_JSON_PATH", os.path.join(CACHE_DIR, "logs", "agent.jsonl"))
+    LOG_JSON_MAX_BYTES = 10 * 1024 * 1024
+    LOG_JSON_BACKUPS = 5
 
 config = Config()
-
-if not config.GEMINI_API_KEY:
-    raise ValueError(
-        "Gemini API key is not set. Please ensure a .env file exists "
-        "with your GEMINI_API_KEY."
-    )
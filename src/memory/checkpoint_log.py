@@ -0,0 +1,268 @@
+import json
+import os
+import threading
+import time
+from src.config import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _trim_torn_tail(path: str):
+    try:
+        f = open(path, "r+b")
+    except FileNotFoundError:
+        return
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            block = f.read(end - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        if end != size:
+            logger.warning("Dropping a torn checkpoint record at the end of %s.", path)
+            f.truncate(end)
+
+def _last_record(path: str) -> dict | None:
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - 4096))
+        lines = f.read().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return None
+
+class CheckpointWriter:
+    def __init__(self, path: str, fsync_every: int | None = None, fsync_interval: float | None = None):
+        self.path = path
+        self.fsync_every = fsync_every or config.CHECKPOINT_FSYNC_EVERY
+        self.fsync_interval = fsync_interval if fsync_interval is not None else config.CHECKPOINT_FSYNC_INTERVAL
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _trim_torn_tail(path)
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {"records": 0, "fsyncs": 0}
+
+    def append(self, record: dict, durable: bool = False):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            self.stats["records"] += 1
+            if durable or self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.stats["fsyncs"] += 1
+
+    def sync(self):
+        with self._lock:
+            if self._pending:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._pending:
+                self._sync()
+            self._file.close()
+
+class TaskCheckpoint:
+    def __init__(self, path: str):
+        self.path = path
+        self.task_id: str | None = None
+        self.objective = ""
+        self.max_steps: int | None = None
+        self.time_budget: float | None = None
+        self.step = 0
+        self.elapsed = 0.0
+        self.entries: list[tuple[str, str]] = []
+        self.summary = ""
+        self.window = 0
+        self.memory_stats: dict = {}
+        self.observation_counter = 0
+        self.planner_stats: dict = {}
+        self.executed_steps: list[dict] = []
+        self.catalog: list[str] = []
+        self.sessions: dict[str, dict] = {}
+        self.interrupted: dict | None = None
+        self.waiting_for: str | None = None
+        self.status: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status is not None
+
+    def apply(self, record: dict):
+        kind = record.get("type")
+        if kind == "start":
+            self.task_id = record["task_id"]
+            self.objective = record["objective"]
+            self.max_steps = record.get("max_steps")
+            self.time_budget = record.get("time_budget")
+        elif kind == "intent":
+            self.interrupted = record
+        elif kind == "step":
+            self.step = record["step"]
+            self.elapsed = record.get("elapsed", self.elapsed)
+            self.entries.extend(tuple(entry) for entry in record.get("entries", ()))
+            if record.get("summary") is not None:
+                self.summary = record["summary"]
+            self.window = record.get("window", len(self.entries))
+            self.memory_stats = record.get("memory_stats", self.memory_stats)
+            self.observation_counter = record.get("observation_counter", self.observation_counter)
+            self.planner_stats = record.get("planner_stats", self.planner_stats)
+            self.executed_steps.extend(record.get("executed_steps", ()))
+            self.catalog = record.get("catalog", self.catalog)
+            if "sessions" in record:
+                self.sessions = record["sessions"]
+            self.interrupted = None
+            self.waiting_for = None
+        elif kind == "suspend":
+            self.waiting_for = record.get("question_id")
+        elif kind == "end":
+            self.status = record.get("status")
+
+    @classmethod
+    def load(cls, path: str) -> "TaskCheckpoint":
+        checkpoint = cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Ignoring a torn checkpoint record at %s:%s.", path, number)
+                    break
+                checkpoint.apply(record)
+        if checkpoint.task_id is None:
+            raise ValueError(f"Checkpoint {path} has no start record.")
+        return checkpoint
+
+class CheckpointStore:
+    def __init__(self, directory: str, keep_ended: int | None = None):
+        self.directory = directory
+        self.keep_ended = keep_ended if keep_ended is not None else config.CHECKPOINT_KEEP_ENDED
+
+    def path(self, task_id: str) -> str:
+        return os.path.join(self.directory, f"{task_id}.jsonl")
+
+    def open(self, task_id: str) -> CheckpointWriter:
+        return CheckpointWriter(self.path(task_id))
+
+    def load(self, task_id: str) -> TaskCheckpoint:
+        path = self.path(task_id)
+        if not os.path.exists(path):
+            raise ValueError(f"No checkpoint found for task '{task_id}'.")
+        return TaskCheckpoint.load(path)
+
+    def resumable(self) -> list[TaskCheckpoint]:
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".jsonl")
+        ]
+        checkpoints = []
+        ended = []
+        for path in sorted(paths, key=os.path.getmtime, reverse=True):
+            try:
+                last = _last_record(path)
+                if last and last.get("type") == "end":
+                    ended.append(path)
+                    continue
+                checkpoint = TaskCheckpoint.load(path)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping unreadable checkpoint %s: %s", path, e)
+                continue
+            if not checkpoint.finished:
+                checkpoints.append(checkpoint)
+        for path in ended[self.keep_ended:]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Could not remove the ended checkpoint %s: %s", path, e)
+        return checkpoints
+
+    def latest(self) -> TaskCheckpoint:
+        checkpoints = self.resumable()
+        if not checkpoints:
+            raise ValueError(f"There is no unfinished task to resume in {self.directory}.")
+        return checkpoints[0]
+
+    def discard(self, task_id: str):
+        try:
+            os.remove(self.path(task_id))
+        except FileNotFoundError:
+            pass
+
+class TaskCheckpointer:
+    def __init__(self, writer: CheckpointWriter, memory, planner, tool_manager, task_id: str, started: float, completed: int = 0):
+        self.writer = writer
+        self.started = started
+        self.memory = memory
+        self.planner = planner
+        self.tool_manager = tool_manager
+        self.task_id = task_id
+        self._entries = memory.entry_count
+        self._summary = memory.summary
+        self._executed = len(planner.executed_steps)
+        self._sessions: dict | None = None
+        self.completed = completed
+
+    def start(self, objective: str, max_steps: int, time_budget: float):
+        self.writer.append({
+            "type": "start", "task_id": self.task_id, "objective": objective,
+            "max_steps": max_steps, "time_budget": time_budget, "created": time.time(),
+        }, durable=True)
+
+    def before_execute(self, calls: list[tuple[str, dict]]):
+        intents = [
+            {"tool": name, "args": args, "idempotent": self.tool_manager.is_idempotent(name, args)}
+            for name, args in calls
+        ]
+        self.writer.append(
+            {"type": "intent", "step": self.completed + 1, "calls": intents},
+            durable=not all(intent["idempotent"] for intent in intents),
+        )
+
+    def step(self, step: int):
+        record = {
+            "type": "step",
+            "step": step,
+            "elapsed": round(time.monotonic() - self.started, 3),
+            "entries": [(entry.type, entry.content) for entry in self.memory.entries_since(self._entries)],
+            "summary": self.memory.summary if self.memory.summary != self._summary else None,
+            "window": self.memory.window_size,
+            "memory_stats": self.memory.stats,
+            "observation_counter": self.memory.observations.counter,
+            "planner_stats": self.planner.stats,
+            "executed_steps": self.planner.executed_steps[self._executed:],
+            "catalog": sorted(self.planner.catalog.selected),
+        }
+        sessions = self.tool_manager.session_state(sorted(self.tool_manager.tools), self.task_id)
+        if sessions != self._sessions:
+            record["sessions"] = sessions
+        self.writer.append(record)
+        self.completed = step
+        self._entries = self.memory.entry_count
+        self._summary = self.memory.summary
+        self._executed = len(self.planner.executed_steps)
+        self._sessions = sessions
+
+    def suspend(self, question_id: str):
+        self.writer.append({"type": "suspend", "step": self.completed, "question_id": question_id}, durable=True)
+        self.writer.close()
+
+    def finish(self, status: str):
+        self.writer.append({"type": "end", "status": status}, durable=True)
+        self.writer.close()
@@ -1,23 +1,163 @@
-from typing import List, Dict, Any
+from collections import deque
+from itertools import islice
+from ..config import config
 from ..utils.logger import get_logger
+from ..utils.token_counter import estimate_tokens, truncate_to_tokens
+from .observation_store import ObservationStore
+from .summarizer import ExtractiveSummarizer, LLMSummarizer
 
 logger = get_logger(__name__)
 
+SUMMARY_HEADER = "SUMMARY OF EARLIER STEPS:\n"
+
+class MemoryEntry:
+    __slots__ = ("type", "content", "rendered", "tokens")
+
+    def __init__(self, entry_type: str, content: str, max_tokens: int = 0):
+        self.type = entry_type
+        self.content = content
+        self.rendered = f"{entry_type.upper()}: {content}\n"
+        self.tokens = estimate_tokens(self.rendered)
+        if max_tokens and self.tokens > max_tokens:
+            self.shrink(max_tokens)
+
+    def shrink(self, max_tokens: int) -> int:
+        rendered = truncate_to_tokens(self.rendered, max(1, max_tokens - 1)).rstrip("\n") + "\n"
+        saved = self.tokens - estimate_tokens(rendered)
+        self.rendered, self.tokens = rendered, self.tokens - saved
+        return saved
+
+    def __repr__(self) -> str:
+        return f"MemoryEntry(type={self.type!r}, tokens={self.tokens})"
+
+def _default_summarizer():
+    if config.MEMORY_SUMMARIZER == "llm":
+        from ..utils.llm_provider import get_llm_provider
+        return LLMSummarizer(get_llm_provider())
+    return ExtractiveSummarizer()
+
 class MemoryManager:
-    def __init__(self):
-        self.history: List[Dict[str, Any]] = []
+    def __init__(self, token_budget: int | None = None, verbatim_triples: int | None = None, summarizer=None):
+        self.token_budget = token_budget if token_budget is not None else config.MEMORY_TOKEN_BUDGET
+        self.verbatim_triples = verbatim_triples if verbatim_triples is not None else config.MEMORY_VERBATIM_TRIPLES
+        self.max_entry_tokens = config.MEMORY_MAX_ENTRY_TOKENS
+        self.summarizer = summarizer or _default_summarizer()
+        self.observations = ObservationStore(config.OBSERVATION_STORE_MAX_BYTES)
+        self.clear(log=False)
+
+    def _make_entry(self, entry_type: str, content: str) -> MemoryEntry:
+        entry = MemoryEntry(entry_type, content, self.max_entry_tokens)
+        self._total_tokens += estimate_tokens(f"{entry_type.upper()}: {content}\n") if self.max_entry_tokens else entry.tokens
+        return entry
 
     def add_entry(self, entry_type: str, content: str):
-        entry = {"type": entry_type, "content": content}
+        entry = self._make_entry(entry_type, content)
         self.history.append(entry)
-        logger.debug(f"Added to memory: {entry}")
+        self.entry_count += 1
+        self._window.append(entry)
+        self._window_tokens += entry.tokens
+        self._pending_text.append(entry.rendered)
+        logger.debug("Added to memory: %s (%s tokens)", entry_type, entry.tokens)
+        if self.token_budget:
+            self._enforce_budget()
+
+    def _summary_tokens(self) -> int:
+        return estimate_tokens(SUMMARY_HEADER + self.summary + "\n") if self.summary else 0
+
+    def entries_since(self, count: int) -> list[MemoryEntry]:
+        new = min(self.entry_count - count, len(self.history))
+        return list(islice(self.history, len(self.history) - new, None)) if new > 0 else []
+
+    def _enforce_budget(self):
+        if self._window_tokens + self._summary_tokens() <= self.token_budget:
+            return
+        if len(self._window) > self.verbatim_triples * 3:
+            self._compact()
+        if self._window_tokens + self._summary_tokens() > self.token_budget:
+            self._fit_window()
+
+    def _fit_window(self):
+        overflow = self._window_tokens + self._summary_tokens() - self.token_budget
+        for entry in self._window:
+            if overflow <= 0:
+                break
+            saved = entry.shrink(entry.tokens - overflow)
+            self._window_tokens -= saved
+            overflow -= saved
+            self.stats["entries_truncated"] += 1 if saved else 0
+        if overflow > 0 and self.summary:
+            summary_budget = self.token_budget - self._window_tokens - estimate_tokens(SUMMARY_HEADER + "\n")
+            self.summary = truncate_to_tokens(self.summary, summary_budget, keep="tail")
+        self._rendered_text = None
+        self._pending_text.clear()
+
+    def _compact(self):
+        keep = self.verbatim_triples * 3
+        compacted = []
+        while len(self._window) > keep and (
+            self._window_tokens + self._summary_tokens() > self.token_budget or len(compacted) < 3
+        ):
+            entry = self._window.popleft()
+            self._window_tokens -= entry.tokens
+            compacted.append(entry)
+
+        self.summary = self.summarizer.summarize(self.summary, compacted)
+        summary_budget = self.token_budget - self._window_tokens - estimate_tokens(SUMMARY_HEADER + "\n")
+        if self._summary_tokens() > self.token_budget - self._window_tokens:
+            self.summary = truncate_to_tokens(self.summary, summary_budget, keep="tail")
+
+        self._rendered_text = None
+        self._pending_text.clear()
+        self.stats["compactions"] += 1
+        self.stats["entries_compacted"] += len(compacted)
+        logger.debug("Compacted %s memory entries into the running summary.", len(compacted))
 
     def get_full_history(self) -> str:
-        formatted_history = ""
-        for entry in self.history:
-            formatted_history += f"{entry['type'].upper()}: {entry['content']}\n"
-        return formatted_history
-
-    def clear(self):
-        self.history = []
-        logger.info("Memory cleared.")
+        if self._rendered_text is None:
+            parts = [f"{SUMMARY_HEADER}{self.summary}\n"] if self.summary else []
+            parts.extend(entry.rendered for entry in self._window)
+            self._rendered_text = "".join(parts)
+        elif self._pending_text:
+            self._rendered_text += "".join(self._pending_text)
+        self._pending_text.clear()
+        return self._rendered_text
+
+    @property
+    def window_size(self) -> int:
+        return len(self._window)
+
+    def restore(self, entries: list[tuple[str, str]], summary: str, window: int, stats: dict | None = None):
+        self.clear(log=False)
+        restored = [self._make_entry(entry_type, content) for entry_type, content in entries]
+        self.history.extend(restored)
+        self.entry_count = len(restored)
+        self._window = deque(restored[len(restored) - window:] if window else ())
+        self._window_tokens = sum(entry.tokens for entry in self._window)
+        self.summary = summary
+        self.stats.update(stats or {})
+        self._rendered_text = None
+        self._pending_text.clear()
+        logger.info("Memory restored with %s entries (%s verbatim).", self.entry_count, len(self._window))
+
+    def compaction_stats(self) -> dict:
+        history_tokens = self._window_tokens + self._summary_tokens()
+        return {
+            **self.stats,
+            "total_tokens": self._total_tokens,
+            "history_tokens": history_tokens,
+            "tokens_saved": max(0, self._total_tokens - history_tokens),
+        }
+
+    def clear(self, log: bool = True):
+        self.history: deque[MemoryEntry] = deque(maxlen=config.MEMORY_HISTORY_MAX_ENTRIES)
+        self.entry_count = 0
+        self._window: deque[MemoryEntry] = deque()
+        self._window_tokens = 0
+        self._total_tokens = 0
+        self.summary = ""
+        self.stats = {"compactions": 0, "entries_compacted": 0, "entries_truncated": 0}
+        self._rendered_text = ""
+        self._pending_text: list[str] = []
+        self.observations.clear()
+        if log:
+            logger.info("Memory cleared.")
@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+
+class ObservationStore:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._payloads: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def put(self, payload: str) -> str:
+        with self._lock:
+            self._counter += 1
+            ref = f"obs-{self._counter}"
+            self._payloads[ref] = payload
+            self._size += len(payload)
+            while self._size > self.max_bytes and len(self._payloads) > 1:
+                _, evicted = self._payloads.popitem(last=False)
+                self._size -= len(evicted)
+            return ref
+
+    def get(self, ref: str) -> str | None:
+        with self._lock:
+            return self._payloads.get(ref)
+
+    def page(self, ref: str, page: int, page_chars: int) -> tuple[str, int] | None:
+        payload = self.get(ref)
+        if payload is None:
+            return None
+        pages = max(1, -(-len(payload) // page_chars))
+        if page < 1:
+            return "", pages
+        start = (page - 1) * page_chars
+        return payload[start:start + page_chars], pages
+
+    @property
+    def counter(self) -> int:
+        return self._counter
+
+    def restore_counter(self, counter: int):
+        with self._lock:
+            self._counter = max(self._counter, counter)
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+            self._size = 0
+            self._counter = 0
@@ -0,0 +1,54 @@
+import json
+from typing import Iterable
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ExtractiveSummarizer:
+    def __init__(self, max_line_chars: int = 160):
+        self.max_line_chars = max_line_chars
+
+    def _clip(self, text: str) -> str:
+        text = " ".join(text.split())
+        if len(text) > self.max_line_chars:
+            return text[:self.max_line_chars - 3] + "..."
+        return text
+
+    def _describe(self, entry) -> str:
+        if entry.type == "action":
+            try:
+                action = json.loads(entry.content)
+                return f"ACTION: {action.get('tool')} {self._clip(json.dumps(action.get('args', {})))}"
+            except (json.JSONDecodeError, AttributeError):
+                pass
+        if entry.type == "thought":
+            return f"THOUGHT: {self._clip(entry.content.split('. ')[0])}"
+        first_line = next((line for line in entry.content.splitlines() if line.strip()), "")
+        return f"{entry.type.upper()}: {self._clip(first_line)}"
+
+    def summarize(self, summary: str, entries: Iterable) -> str:
+        lines = [f"- {self._describe(entry)}" for entry in entries]
+        if summary:
+            lines.insert(0, summary)
+        return "\n".join(lines)
+
+class LLMSummarizer:
+    def __init__(self, llm, fallback: ExtractiveSummarizer | None = None):
+        self.llm = llm
+        self.fallback = fallback or ExtractiveSummarizer()
+
+    def summarize(self, summary: str, entries: Iterable) -> str:
+        entries = list(entries)
+        new_entries = "".join(entry.rendered for entry in entries)
+        prompt = (
+            "Condense the history of an autonomous agent into a short factual summary. "
+            "Keep file paths, URLs, selectors, values that were found, results, and approaches that failed. "
+            "Reply with the summary only.\n\n"
+            f"Existing summary:\n{summary or '(none)'}\n\n"
+            f"New history entries:\n{new_entries}"
+        )
+        try:
+            return self.llm.get_completion(prompt)
+        except Exception as e:
+            logger.warning("LLM summarization failed, falling back to extraction: %s", e)
+            return self.fallback.summarize(summary, entries)
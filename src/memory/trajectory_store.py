@@ -0,0 +1,252 @@
+import array
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Iterator
+from src.config import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EMBEDDING_DIM = 256
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+SLOT_RE = re.compile(r"\{(\d+)\}")
+QUOTE_CHARS = "\"'`“”‘’"
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "of", "in", "on", "at", "for", "with", "by", "from", "into",
+    "it", "is", "be", "as", "my", "me", "i", "then", "that", "this", "all", "some", "please",
+}
+
+def objective_words(objective: str) -> list[str]:
+    words = []
+    for word in objective.split():
+        word = word.strip(QUOTE_CHARS).rstrip(",;")
+        if word:
+            words.append(word)
+    if words:
+        words[-1] = words[-1].rstrip(".!?") or words[-1]
+    return words
+
+def normalize_objective(objective: str) -> str:
+    return " ".join(objective_words(objective)).lower()
+
+def embed(text: str) -> list[float]:
+    tokens = TOKEN_RE.findall(text.lower())
+    vector = [0.0] * EMBEDDING_DIM
+    for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+        digest = zlib.crc32(feature.encode("utf-8"))
+        vector[digest % EMBEDDING_DIM] += 1.0 if digest & 0x10000 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+def cosine(a: list[float], b: list[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+MARKER_RE = re.compile(r"\{\{slot:(\d+)(:number)?\}\}")
+
+def slot_marker(index: int, number: bool = False) -> str:
+    return f"{{{{slot:{index}{':number' if number else ''}}}}}"
+
+def _phrase_re(phrase: str) -> re.Pattern:
+    return re.compile(r"(?<![a-z0-9])" + re.escape(phrase) + r"(?![a-z0-9])", re.IGNORECASE)
+
+def _strings(value: Any) -> Iterator[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield str(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+def _map_strings(value: Any, transform) -> Any:
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return transform(value)
+    if isinstance(value, dict):
+        return {key: _map_strings(item, transform) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_map_strings(item, transform) for item in value]
+    return value
+
+def _map_call(call: dict, transform) -> dict:
+    mapped = {"tool": call["tool"], "args": _map_strings(call.get("args", {}), transform)}
+    if "pre" in call:
+        mapped["pre"] = _map_strings(call["pre"], transform)
+    return mapped
+
+def build_template(objective: str, steps: list[dict], max_slot_words: int = 6) -> tuple[str, list[str]]:
+    words = objective_words(objective)
+    haystack = "\n".join(text.lower() for step in steps for call in step["calls"] for text in _strings(call.get("args", {})))
+    taken = [False] * len(words)
+    spans = []
+    for size in range(min(max_slot_words, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            if any(taken[start:start + size]):
+                continue
+            phrase = " ".join(words[start:start + size]).lower()
+            if (len(phrase) < 3 and not phrase.isdigit()) or all(word in STOPWORDS for word in phrase.split()):
+                continue
+            if _phrase_re(phrase).search(haystack):
+                spans.append((start, size, phrase))
+                taken[start:start + size] = [True] * size
+
+    pieces, slots, position = [], [], 0
+    for start, size, phrase in sorted(spans):
+        pieces.extend(word.lower() for word in words[position:start])
+        pieces.append(f"{{{len(slots)}}}")
+        slots.append(phrase)
+        position = start + size
+    pieces.extend(word.lower() for word in words[position:])
+    return " ".join(pieces), slots
+
+def _fill_slots(value, values: list[str]):
+    if not isinstance(value, str):
+        return value
+    whole = MARKER_RE.fullmatch(value)
+    if whole and whole.group(2):
+        text = values[int(whole.group(1))]
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                return float(text)
+            except ValueError:
+                return text
+    return MARKER_RE.sub(lambda m: values[int(m.group(1))], value)
+
+def match_template(template: str, objective: str) -> list[str] | None:
+    parts = SLOT_RE.split(template)
+    pattern = "".join(re.escape(part) if index % 2 == 0 else "(.+?)" for index, part in enumerate(parts))
+    match = re.fullmatch(pattern, " ".join(objective_words(objective)), re.IGNORECASE)
+    return list(match.groups()) if match else None
+
+def template_is_specific(template: str) -> bool:
+    literal = SLOT_RE.sub(" ", template).split()
+    return sum(1 for word in literal if word not in STOPWORDS) >= 2
+
+class TrajectoryMatch:
+    __slots__ = ("trajectory_id", "objective", "similarity", "steps", "replayable")
+
+    def __init__(self, trajectory_id: int, objective: str, similarity: float, steps: list[dict], replayable: bool):
+        self.trajectory_id = trajectory_id
+        self.objective = objective
+        self.similarity = similarity
+        self.steps = steps
+        self.replayable = replayable
+
+class TrajectoryStore:
+    def __init__(self, path: str, max_failures: int = 3):
+        self.path = path
+        self.max_failures = max_failures
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS trajectories ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, template TEXT UNIQUE NOT NULL, objective TEXT NOT NULL, "
+            "slots TEXT NOT NULL, steps TEXT NOT NULL, embedding BLOB NOT NULL, "
+            "successes INTEGER NOT NULL DEFAULT 0, failures INTEGER NOT NULL DEFAULT 0, updated_at REAL)"
+        )
+        self._conn.commit()
+        self._index: dict[int, tuple[str, list[float]]] = {}
+        for trajectory_id, template, blob in self._conn.execute("SELECT id, template, embedding FROM trajectories"):
+            self._index[trajectory_id] = (template, array.array("f", blob).tolist())
+
+    def record(self, objective: str, steps: list[dict]) -> int | None:
+        if not steps:
+            return None
+        template, slots = build_template(objective, steps)
+        ordered = sorted(range(len(slots)), key=lambda index: -len(slots[index]))
+
+        def to_template(value):
+            if not isinstance(value, str):
+                return next((slot_marker(index, True) for index in ordered if str(value) == slots[index]), value)
+            for index in ordered:
+                value = _phrase_re(slots[index]).sub(slot_marker(index), value)
+            return value
+
+        templated_steps = [{"calls": [_map_call(call, to_template) for call in step["calls"]]} for step in steps]
+        embedding = embed(normalize_objective(objective))
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO trajectories (template, objective, slots, steps, embedding, successes, failures, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 1, 0, ?) "
+                "ON CONFLICT(template) DO UPDATE SET objective = excluded.objective, slots = excluded.slots, "
+                "steps = excluded.steps, embedding = excluded.embedding, successes = successes + 1, "
+                "updated_at = excluded.updated_at",
+                (template, objective, json.dumps(slots), json.dumps(templated_steps),
+                 array.array("f", embedding).tobytes(), time.time()),
+            )
+            trajectory_id = self._conn.execute("SELECT id FROM trajectories WHERE template = ?", (template,)).fetchone()[0]
+            self._conn.commit()
+            self._index[trajectory_id] = (template, embedding)
+        logger.info("Recorded a %s-step trajectory for template '%s'.", len(steps), template)
+        return trajectory_id
+
+    def find(self, objective: str, min_similarity: float) -> TrajectoryMatch | None:
+        normalized = normalize_objective(objective)
+        query = embed(normalized)
+        with self._lock:
+            candidates = sorted(
+                ((cosine(query, embedding), trajectory_id, template) for trajectory_id, (template, embedding) in self._index.items()),
+                reverse=True,
+            )
+        candidates = [candidate for candidate in candidates if candidate[0] >= min_similarity]
+
+        for similarity, trajectory_id, template in candidates:
+            values = match_template(template, objective)
+            if values is None or (values and not template_is_specific(template)):
+                continue
+            row = self._row(trajectory_id)
+            if row is None or (row["failures"] >= self.max_failures and row["failures"] > row["successes"]):
+                continue
+            fill = lambda value: _fill_slots(value, values)
+            steps = [{"calls": [_map_call(call, fill) for call in step["calls"]]} for step in row["steps"]]
+            return TrajectoryMatch(trajectory_id, row["objective"], similarity, steps, True)
+
+        if candidates:
+            similarity, trajectory_id, _ = candidates[0]
+            row = self._row(trajectory_id)
+            if row is not None:
+                return TrajectoryMatch(trajectory_id, row["objective"], similarity, row["steps"], False)
+        return None
+
+    def _row(self, trajectory_id: int) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT objective, steps, successes, failures FROM trajectories WHERE id = ?", (trajectory_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"objective": row[0], "steps": json.loads(row[1]), "successes": row[2], "failures": row[3]}
+
+    def mark_failure(self, trajectory_id: int):
+        with self._lock:
+            self._conn.execute("UPDATE trajectories SET failures = failures + 1 WHERE id = ?", (trajectory_id,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, successes, failures = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(successes), 0), COALESCE(SUM(failures), 0) FROM trajectories"
+            ).fetchone()
+        return {"trajectories": count, "successes": successes, "failures": failures}
+
+_trajectory_store = None
+_trajectory_store_lock = threading.Lock()
+
+def get_trajectory_store() -> TrajectoryStore:
+    global _trajectory_store
+    with _trajectory_store_lock:
+        if _trajectory_store is None:
+            _trajectory_store = TrajectoryStore(config.TRAJECTORY_PATH)
+        return _trajectory_store
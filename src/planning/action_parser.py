@@ -0,0 +1,131 @@
+import json
+import re
+
+FENCE_RE = re.compile(r"(```|~~~)[ \t]*([A-Za-z0-9_-]*)[ \t]*\n?(.*?)\1", re.DOTALL)
+ACTION_KEYS = ("action", "actions")
+
+def is_action_payload(value) -> bool:
+    return isinstance(value, dict) and any(key in value for key in ACTION_KEYS)
+
+class _ObjectScanner:
+    SPECIAL_RE = re.compile(r'[{}"\\]')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.start: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped_index = -1
+
+    def scan(self, text: str, position: int) -> int | None:
+        if self.start is None:
+            position = text.find("{", position)
+            if position == -1:
+                return None
+            self.start, self._depth = position, 1
+            position += 1
+        for match in self.SPECIAL_RE.finditer(text, position):
+            index = match.start()
+            char = text[index]
+            if self._in_string:
+                if index == self._escaped_index:
+                    continue
+                if char == "\\":
+                    self._escaped_index = index + 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    return index + 1
+        return None
+
+def find_json_objects(text: str) -> list[tuple[int, int]]:
+    objects = []
+    starts = []
+    in_string = False
+    escaped_index = -1
+    for match in _ObjectScanner.SPECIAL_RE.finditer(text):
+        index = match.start()
+        char = text[index]
+        if in_string:
+            if index == escaped_index:
+                continue
+            if char == "\\":
+                escaped_index = index + 1
+            elif char == '"':
+                in_string = False
+        elif char == "{":
+            starts.append(index)
+        elif not starts:
+            continue
+        elif char == '"':
+            in_string = True
+        elif char == "}":
+            objects.append((starts.pop(), index + 1))
+    objects.sort()
+    return objects
+
+def extract_action_json(text: str) -> dict:
+    for match in FENCE_RE.finditer(text):
+        if match.group(2).lower() not in ("", "json", "json5", "javascript"):
+            continue
+        body = match.group(3).strip()
+        try:
+            value = json.loads(body)
+        except json.JSONDecodeError:
+            continue
+        if is_action_payload(value):
+            return value
+
+    error = None
+    for start, end in find_json_objects(text):
+        try:
+            value = json.loads(text[start:end])
+        except json.JSONDecodeError as e:
+            error = error or e
+            continue
+        if is_action_payload(value):
+            return value
+    if error is not None:
+        raise ValueError(f"Invalid JSON format. {error}")
+    raise ValueError("No JSON action object found.")
+
+class StreamingActionParser:
+    def __init__(self):
+        self.text = ""
+        self.block: str | None = None
+        self._scanner = _ObjectScanner()
+        self._position = 0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.block is not None
+
+    def feed(self, chunk: str) -> bool:
+        if self.is_complete:
+            return True
+        self.text += chunk
+
+        while True:
+            end = self._scanner.scan(self.text, self._position)
+            if end is None:
+                self._position = len(self.text)
+                return False
+            start = self._scanner.start
+            try:
+                value = json.loads(self.text[start:end])
+            except json.JSONDecodeError:
+                value = None
+            if is_action_payload(value):
+                self.block = self.text[start:end]
+                self.text = self.text[:end]
+                return True
+            self._scanner.reset()
+            self._position = start + 1
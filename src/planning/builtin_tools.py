@@ -0,0 +1,50 @@
+from src.config import config
+from src.memory.observation_store import ObservationStore
+from src.tools.base_tool import BaseTool
+
+class ObservationPagerTool(BaseTool):
+    parameters = {"ref": {"type": "string", "required": True}, "page": {"type": "integer"}}
+
+    def __init__(self, store: ObservationStore):
+        self.store = store
+
+    @property
+    def name(self) -> str:
+        return "read_observation"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Reads the full output of an earlier observation that was shortened. "
+            "Args: ref (str), page (int, optional, default 1)."
+        )
+
+    def execute(self, ref: str, page: int = 1) -> str:
+        result = self.store.page(ref, int(page), config.OBSERVATION_PAGE_CHARS)
+        if result is None:
+            return f"Error: No stored observation with ref '{ref}'."
+        text, pages = result
+        if not text:
+            return f"Error: Page {page} is out of range, '{ref}' has {pages} pages."
+        return f"[{ref} page {page}/{pages}]\n{text}"
+
+class ListToolsTool(BaseTool):
+    parameters = {"query": {"type": "string"}}
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    @property
+    def name(self) -> str:
+        return "list_tools"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Lists every available tool with a one-line summary. "
+            "Pass 'query' (a tool name or what you want to do) to get the full description and parameters of the matching tools "
+            "and add them to your tool list. Args: query (str, optional)."
+        )
+
+    def execute(self, query: str = "") -> str:
+        return self.catalog.describe(str(query))
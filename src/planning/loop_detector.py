@@ -0,0 +1,122 @@
+import hashlib
+import json
+import re
+from collections import Counter, deque
+from src.config import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+NUMBER_RE = re.compile(r"\d+")
+
+def _fingerprint(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+def action_fingerprint(actions: list) -> str | None:
+    calls = [
+        (action.get("tool"), _normalize(action.get("args", {})))
+        for action in actions if isinstance(action, dict) and action.get("tool") != "finish"
+    ]
+    return _fingerprint(calls) if calls else None
+
+def error_fingerprint(observation: str) -> str | None:
+    if not observation.lstrip().startswith("Error"):
+        return None
+    return _fingerprint(NUMBER_RE.sub("#", " ".join(observation.lower().split())[:500]))
+
+class LoopDetector:
+    OK = "ok"
+    HINT = "hint"
+    ESCALATE = "escalate"
+    ABORT = "abort"
+
+    def __init__(
+        self,
+        window: int | None = None,
+        repeat_threshold: int | None = None,
+        error_threshold: int | None = None,
+        escalate: bool = True,
+        recovery_steps: int | None = None,
+    ):
+        self.window = window or config.LOOP_WINDOW
+        self.repeat_threshold = repeat_threshold or config.LOOP_REPEAT_THRESHOLD
+        self.error_threshold = error_threshold or config.LOOP_ERROR_THRESHOLD
+        self.escalate = escalate
+        self.recovery_steps = recovery_steps or config.LOOP_RECOVERY_STEPS
+        self.reset()
+
+    def reset(self):
+        self.interventions: list[tuple[str, str]] = []
+        self._level = 0
+        self._quiet_steps = 0
+        self._clear_window()
+
+    def _clear_window(self):
+        self._actions: deque[str | None] = deque(maxlen=self.window)
+        self._errors: deque[str | None] = deque(maxlen=self.window)
+        self._observations: deque[str] = deque(maxlen=self.window)
+
+    def _detect(self) -> str | None:
+        steps = [(action, observation) for action, observation in zip(self._actions, self._observations) if action]
+        if steps:
+            step, count = Counter(steps).most_common(1)[0]
+            if count >= self.repeat_threshold:
+                return f"the same action was repeated {count} times with the same result in the last {len(self._actions)} steps"
+        recent = list(self._actions)
+        for period in (2, 3):
+            span = recent[-period * 2:]
+            if len(span) == period * 2 and all(span) and len(set(span[:period])) == period and span[:period] == span[period:]:
+                return f"the agent is cycling between the same {period} actions"
+        errors = [fingerprint for fingerprint in self._errors if fingerprint]
+        if errors:
+            fingerprint, count = Counter(errors).most_common(1)[0]
+            if count >= self.error_threshold:
+                return f"the same error occurred {count} times in the last {len(self._errors)} steps"
+        span = self.repeat_threshold + 1
+        recent_observations = list(self._observations)[-span:]
+        recent_actions = list(self._actions)[-span:]
+        if (
+            len(recent_observations) == span and len(set(recent_observations)) == 1
+            and len(set(recent_actions)) < len(recent_actions)
+        ):
+            return f"the last {self.repeat_threshold + 1} observations were identical, so no progress is being made"
+        return None
+
+    def observe(self, actions: list, observation: str) -> tuple[str, str]:
+        self._actions.append(action_fingerprint(actions))
+        self._errors.append(error_fingerprint(observation))
+        self._observations.append(_fingerprint(_normalize(observation)))
+
+        reason = self._detect()
+        if reason is None:
+            self._quiet_steps += 1
+            if self._level and self._quiet_steps >= self.recovery_steps:
+                self._level -= 1
+                self._quiet_steps = 0
+            return self.OK, ""
+
+        self._clear_window()
+        self._quiet_steps = 0
+        ladder = [self.HINT] + ([self.ESCALATE] if self.escalate else []) + [self.ABORT]
+        verdict = ladder[min(self._level, len(ladder) - 1)]
+        self._level += 1
+        self.interventions.append((verdict, reason))
+        logger.warning("Loop detector: %s (%s).", reason, verdict)
+        return verdict, reason
+
+    @staticmethod
+    def hint(reason: str) -> str:
+        return (
+            f"You appear to be stuck: {reason}. Do not repeat the same action again. "
+            "Re-read the observations, try a different tool or different arguments, "
+            "or finish with a summary of what is blocking you."
+        )
@@ -0,0 +1,195 @@
+import re
+from collections import Counter
+from html.parser import HTMLParser
+from src.config import config
+from src.memory.observation_store import ObservationStore
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WORD_RE = re.compile(r"[a-z0-9_]{3,}")
+
+class ObservationContext:
+    __slots__ = ("tool_name", "args", "objective")
+
+    def __init__(self, tool_name: str, args: dict, objective: str):
+        self.tool_name = tool_name
+        self.args = args
+        self.objective = objective
+
+    def query_terms(self) -> set[str]:
+        text = f"{self.objective} {' '.join(str(value) for value in self.args.values())}"
+        return set(WORD_RE.findall(text.lower()))
+
+class _TextExtractor(HTMLParser):
+    SKIPPED_TAGS = {"script", "style", "noscript", "svg", "head", "template", "iframe", "canvas"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "header", "footer", "nav", "form", "table", "ul", "ol"}
+    CONTROL_TAGS = {"input", "button", "select", "textarea"}
+    CONTROL_ATTRS = ("id", "name", "type", "placeholder", "aria-label", "value")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag in self.CONTROL_TAGS:
+            attributes = dict(attrs)
+            described = " ".join(
+                f"{name}={attributes[name]!r}" for name in self.CONTROL_ATTRS if attributes.get(name)
+            )
+            self.parts.append(f" [{tag} {described}] " if described else f" [{tag}] ")
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href and not href.startswith(("javascript:", "#")):
+                self.parts.append(f" [link {href[:80]}] ")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth -= 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS and not self._skip_depth:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+class HtmlToTextProcessor:
+    HTML_RE = re.compile(r"<(html|body|div|span|a|p|head|script|!doctype)\b", re.IGNORECASE)
+
+    def applies(self, observation: str, context: ObservationContext) -> bool:
+        return bool(self.HTML_RE.search(observation[:2000]))
+
+    def process(self, observation: str, context: ObservationContext) -> str:
+        extractor = _TextExtractor()
+        try:
+            extractor.feed(observation)
+            extractor.close()
+        except Exception as e:
+            logger.debug("HTML extraction failed, keeping raw observation: %s", e)
+            return observation
+        return extractor.text()
+
+class ControlTreeProcessor:
+    ANONYMOUS_RE = re.compile(r"(''|\"\")")
+
+    def applies(self, observation: str, context: ObservationContext) -> bool:
+        return context.tool_name == "ui_automation" and context.args.get("operation") == "get_controls"
+
+    def process(self, observation: str, context: ObservationContext) -> str:
+        lines = [line for line in observation.splitlines() if line.strip()]
+        counts = Counter(line.strip() for line in lines)
+        kept, seen, anonymous = [], set(), 0
+        for line in lines:
+            key = line.strip()
+            if self.ANONYMOUS_RE.search(key):
+                anonymous += 1
+                continue
+            if key in seen:
+                continue
+            seen.add(key)
+            kept.append(f"{line} (x{counts[key]})" if counts[key] > 1 else line)
+        if anonymous:
+            kept.append(f"[{anonymous} unnamed controls omitted]")
+        return "\n".join(kept)
+
+class RelevanceChunker:
+    def __init__(self, max_chars: int, chunk_chars: int = 600):
+        self.max_chars = max_chars
+        self.chunk_chars = chunk_chars
+
+    def applies(self, observation: str, context: ObservationContext) -> bool:
+        return len(observation) > self.max_chars
+
+    def _chunks(self, observation: str) -> list[str]:
+        chunks, current, size = [], [], 0
+        for line in observation.splitlines():
+            if size + len(line) > self.chunk_chars and current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(line[:self.chunk_chars])
+            size += len(line) + 1
+        if current:
+            chunks.append("\n".join(current))
+        return chunks
+
+    def process(self, observation: str, context: ObservationContext) -> str:
+        chunks = self._chunks(observation)
+        terms = context.query_terms()
+        scored = []
+        for index, chunk in enumerate(chunks):
+            words = WORD_RE.findall(chunk.lower())
+            score = sum(1 for word in words if word in terms) / (1 + len(words) ** 0.5)
+            scored.append((score, -index, index))
+
+        selected, used = set(), 0
+        for score, _, index in sorted(scored, reverse=True):
+            if used + len(chunks[index]) > self.max_chars:
+                continue
+            selected.add(index)
+            used += len(chunks[index]) + 6
+
+        output, previous = [], -1
+        for index in sorted(selected):
+            if index != previous + 1:
+                output.append("[...]")
+            output.append(chunks[index])
+            previous = index
+        if previous != len(chunks) - 1:
+            output.append("[...]")
+        return "\n".join(output)
+
+class SizeCap:
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+
+    def applies(self, observation: str, context: ObservationContext) -> bool:
+        return len(observation) > self.max_chars
+
+    def process(self, observation: str, context: ObservationContext) -> str:
+        head = self.max_chars * 3 // 4
+        tail = self.max_chars - head
+        return f"{observation[:head]}\n[... {len(observation) - self.max_chars} chars omitted ...]\n{observation[-tail:]}"
+
+class ObservationPipeline:
+    def __init__(self, store: ObservationStore, processors: list | None = None, max_chars: int | None = None):
+        self.store = store
+        self.max_chars = max_chars or config.OBSERVATION_MAX_CHARS
+        self.processors = processors if processors is not None else [
+            HtmlToTextProcessor(),
+            ControlTreeProcessor(),
+            RelevanceChunker(self.max_chars),
+            SizeCap(self.max_chars),
+        ]
+
+    def process(self, observation: str, context: ObservationContext) -> str:
+        if len(observation) <= self.max_chars:
+            return observation
+
+        result = observation
+        for processor in self.processors:
+            if processor.applies(result, context):
+                result = processor.process(result, context)
+
+        ref = self.store.put(observation)
+        logger.info("Compacted %s observation from %s to %s chars (stored as %s).", context.tool_name, len(observation), len(result), ref)
+        return (
+            f"{result}\n[Full output ({len(observation)} chars) stored as '{ref}'. "
+            f"Use the read_observation tool with ref '{ref}' to page through it.]"
+        )
@@ -1,135 +1,242 @@
 import json
-import re
+from src.tools.base_tool import normalize_parameters
 from src.tools.tool_manager import ToolManager
 from src.memory.memory_manager import MemoryManager
-from src.utils.llm_provider import llm_provider
+from src.planning.action_parser import StreamingActionParser, extract_action_json
+from src.planning.builtin_tools import ListToolsTool, ObservationPagerTool
+from src.planning.observation_pipeline import ObservationContext, ObservationPipeline
+from src.planning.prompt_builder import PromptBuilder
+from src.planning.tool_catalog import ToolCatalog
+from src.tools.tool_manifest import ToolSpec
+from src.config import config
+from src.utils.llm_provider import finish_stream, get_llm_provider
 from src.utils.logger import get_logger
+from src.utils.token_counter import estimate_tokens
+from src.utils.tracing import get_tracer
 
 logger = get_logger(__name__)
 
+STRICT_OPEN_FENCE = "```json\n"
+FAILED_RESPONSE_CHARS = 1000
+
+def is_error_observation(observation: str) -> bool:
+    return observation.lstrip().startswith("Error")
+
+def is_strict_response(response: str) -> bool:
+    body = response.strip()
+    if body.startswith(STRICT_OPEN_FENCE) and body.endswith("```"):
+        body = body[len(STRICT_OPEN_FENCE):-3]
+    try:
+        json.loads(body)
+    except json.JSONDecodeError:
+        return False
+    return True
+
 class ReactPlanner:
-    def __init__(self, tool_manager: ToolManager, memory_manager: MemoryManager):
+    def __init__(self, tool_manager: ToolManager, memory_manager: MemoryManager, llm=None):
         self.tool_manager = tool_manager
         self.memory = memory_manager
-        self.llm = llm_provider
+        self._llm = llm
+        self.observation_pipeline = ObservationPipeline(self.memory.observations)
+        self.catalog = ToolCatalog(self.tool_manager.tool_specs)
+        self.builtin_tools = {
+            tool.name: tool for tool in (ObservationPagerTool(self.memory.observations), ListToolsTool(self.catalog))
+        }
+        self.catalog.builtins = [ToolSpec.from_tool(tool) for tool in self.builtin_tools.values()]
+        self.prompt_builder = PromptBuilder()
+        self.tracer = get_tracer()
+        self.checkpointer = None
+        self.begin_task()
+
+    def begin_task(self):
+        self.stats = {"steps": 0, "wasted_steps": 0, "parse_errors": 0, "invalid_actions": 0, "tolerant_parses": 0, "replayed_steps": 0}
+        self.executed_steps: list[dict] = []
+        self.last_actions: list = []
+        self.last_observation = ""
+        self.catalog.reset()
+
+    def wasted_step_rate(self) -> float:
+        return self.stats["wasted_steps"] / self.stats["steps"] if self.stats["steps"] else 0.0
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = get_llm_provider()
+        return self._llm
 
     def _build_prompt(self, objective: str) -> str:
-        return f"""
-**System Persona:**
-You are a highly intelligent and autonomous AI agent designed to operate on a Windows desktop. Your primary goal is to achieve the user's objective by breaking it down into logical steps and using the available tools. You are methodical, careful, and always reflect on the outcome of your actions.
-
-**Objective:**
-{objective}
-
-**Instructions:**
-You must operate in a cycle of Thought, Action, Observation.
-1.  **Thought**: Analyze the current situation, including the history of actions and observations. Formulate a clear, concise plan for your next immediate action. Think step-by-step.
-2.  **Action**: Based on your thought, select the single most appropriate tool to execute next. Format your action as a single JSON object.
-3.  **Observation**: After you provide an action, the system will execute it and you will receive an observation of the result.
-
-**Error Handling and Self-Correction:**
-If an Observation indicates an error or that the previous action failed, you MUST address it.
--   **Analyze the Error**: In your next Thought, identify the cause of the error.
--   **Change the Plan**: Do not repeat the failed action. Formulate a new plan to either fix the issue or try a different approach.
--   **Use Tools to Investigate**: Use tools like `file_system` to check if a file was created, or `human_feedback` to ask for help if you are stuck.
--   **Your primary goal is to recover from failures and find a successful path.**
-
-**Pro-Tip for Web Tasks:**
-For tasks involving websites, it is much more efficient to open the browser directly to the target URL. For example, instead of just opening Firefox, use the `system_command` tool to run `start firefox "https://www.youtube.com"`.
-
-**Available Tools:**
-{self.tool_manager.tool_prompt}
-
-**Action JSON Format:**
-Your response must contain exactly one JSON block formatted like this:
-```json
-{{
-  "thought": "Your reasoning and plan for the next action.",
-  "action": {{
-    "tool": "tool_name",
-    "args": {{
-      "arg_name1": "value1",
-      "arg_name2": "value2"
-    }}
-  }}
-}}
-```
-
-**Completion:**
-Once you are certain the objective has been fully achieved, use the "finish" tool.
-```json
-{{
-  "thought": "I have successfully completed the objective.",
-  "action": {{
-    "tool": "finish",
-    "args": {{
-      "summary": "A detailed summary of what was accomplished and the final result."
-    }}
-  }}
-}}
-```
-
-**Task History (Thought, Action, Observation):**
-{self.memory.get_full_history()}
-Your turn. Provide your next thought and action in the specified JSON format.
-"""
-
-    def _parse_llm_response(self, response: str) -> tuple[str, dict | None]:
-        match = re.search(r"```json\n(.*?)\n```", response, re.DOTALL)
-        if not match:
-            logger.warning("Could not find a JSON block in the LLM response.")
-            return "Error: No JSON action block found.", None
+        with self.tracer.span("planner.build_prompt") as span:
+            history = self.memory.get_full_history()
+            tools = self.catalog.select(objective, history)
+            prompt = self.prompt_builder.build(objective, history, self.catalog.render(tools))
+            span.set(prompt_chars=len(prompt), prompt_tokens=estimate_tokens(prompt), tools=len(tools))
+            return prompt
+
+    def _get_response(self, prompt: str) -> str:
+        streaming = config.LLM_STREAMING and hasattr(self.llm, "stream_completion")
+        with self.tracer.span(
+            "llm.completion",
+            model=getattr(self.llm, "model_name", None),
+            streaming=streaming,
+            prompt_chars=len(prompt),
+            prompt_tokens=estimate_tokens(prompt),
+        ) as span:
+            if not streaming:
+                response = self.llm.get_completion(prompt, json_mode=config.LLM_JSON_MODE)
+            else:
+                parser = StreamingActionParser()
+                stream = self.llm.stream_completion(prompt, json_mode=config.LLM_JSON_MODE)
+                try:
+                    for chunk in stream:
+                        if parser.feed(chunk):
+                            logger.debug("Action block closed, cancelling the rest of the generation.")
+                            span.set(cancelled_early=True)
+                            finish_stream(stream)
+                            break
+                finally:
+                    stream.close()
+                response = parser.text.strip()
+            span.set(response_chars=len(response), response_tokens=estimate_tokens(response))
+            return response
+
+    def _execute_calls(self, calls: list[tuple[str, dict]], objective: str) -> list[str]:
+        observations: list[str | None] = [None] * len(calls)
+        managed = []
+        for index, (name, args) in enumerate(calls):
+            builtin = self.builtin_tools.get(name)
+            if builtin is None:
+                managed.append(index)
+                continue
+            if builtin.parameters is not None:
+                args = normalize_parameters(builtin.parameters, args)[0]
+            try:
+                observations[index] = str(builtin.execute(**args))
+            except Exception as e:
+                observations[index] = f"Error executing tool '{name}': {e}"
+
+        results = self.tool_manager.execute_many([calls[index] for index in managed])
+        for index, result in zip(managed, results):
+            name, args = calls[index]
+            observations[index] = self.observation_pipeline.process(result, ObservationContext(name, args, objective))
+        return observations
 
+    def _parse_llm_response(self, response: str) -> tuple[str, list[dict] | None]:
         try:
-            parsed_json = json.loads(match.group(1).strip())
-            thought = parsed_json.get("thought", "")
+            parsed_json = extract_action_json(response)
+        except ValueError as e:
+            logger.warning("Could not parse an action from the LLM response: %s", e)
+            return f"Error: {e}", None
+
+        if not is_strict_response(response):
+            self.stats["tolerant_parses"] += 1
+        thought = parsed_json.get("thought", "")
+        actions = parsed_json.get("actions")
+        if actions is None:
             action = parsed_json.get("action")
-            return thought, action
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to decode action JSON: {e}")
-            return f"Error: Invalid JSON format. {e}", None
-        except Exception as e:
-            logger.error(f"An unexpected error occurred during parsing: {e}")
-            return f"Error parsing response: {e}", None
+            actions = [action] if action else None
+        elif not isinstance(actions, list):
+            actions = None
+        if not actions:
+            return "Error: 'actions' must be a non-empty list of action objects.", None
+        return thought, actions
+
+    def _validate_action(self, action) -> str | None:
+        if not isinstance(action, dict) or not isinstance(action.get("tool"), str):
+            return "Each action must be an object with a 'tool' name and an 'args' object."
+        name, args = action["tool"], action.get("args", {})
+        if name == "finish":
+            return None if isinstance(args, dict) else "'args' for 'finish' must be a JSON object."
+        builtin = self.builtin_tools.get(name)
+        if builtin is not None:
+            if not isinstance(args, dict):
+                return f"'args' for tool '{name}' must be a JSON object."
+            problem = builtin.validate_args(args)
+            return f"Invalid arguments for tool '{name}': {problem}." if problem else None
+        return self.tool_manager.validate_call(name, args)
+
+    def _wasted_step(self, kind: str, observation: str) -> tuple[str, bool]:
+        self.stats[kind] += 1
+        self.stats["wasted_steps"] += 1
+        self.last_observation = observation
+        self.memory.add_entry("observation", observation)
+        logger.error(observation)
+        return observation, False
 
     def step(self, objective: str) -> tuple[str, bool]:
+        with self.tracer.span("planner.step") as span:
+            observation, is_finished = self._step(objective)
+            span.set(outcome="finish" if is_finished else "error" if observation.startswith("Error") else "continue")
+            return observation, is_finished
+
+    def _step(self, objective: str) -> tuple[str, bool]:
+        self.stats["steps"] += 1
         prompt = self._build_prompt(objective)
-        response = self.llm.get_completion(prompt)
-        
-        thought, action_data = self._parse_llm_response(response)
+        response = self._get_response(prompt)
         
-        if not thought or not action_data:
-            observation = "Error: Could not parse thought or action from response. Please check the format."
-            self.memory.add_entry("observation", observation)
-            logger.error(observation)
-            return observation, False
-
-        self.memory.add_entry("thought", thought)
-        logger.info(f"Thought: {thought}")
-
-        if "tool" not in action_data:
-            return "Error: 'tool' key missing from action data.", False
-
-        tool_name = action_data["tool"]
-        tool_args = action_data.get("args", {})
+        with self.tracer.span("planner.parse", response_chars=len(response)) as span:
+            thought, actions = self._parse_llm_response(response)
+            span.set(outcome="ok" if actions else "error", actions=len(actions or []))
         
-        self.memory.add_entry("action", json.dumps(action_data))
-        logger.info(f"Action: {tool_name}({tool_args})")
-
-        if tool_name == "finish":
-            summary = tool_args.get("summary", "Objective completed.")
+        self.last_actions = actions or []
+        if actions is None:
+            self.memory.add_entry("response", response[:FAILED_RESPONSE_CHARS] or "(empty response)")
+            return self._wasted_step(
+                "parse_errors",
+                f"{thought} Could not parse an action from the response above. "
+                "Reply with a single JSON object containing 'thought' and 'action' (or 'actions').",
+            )
+
+        if thought:
+            self.memory.add_entry("thought", thought)
+            logger.info("Thought: %s", thought)
+
+        self.memory.add_entry("action", json.dumps(actions[0] if len(actions) == 1 else actions))
+        problems = [problem for problem in map(self._validate_action, actions) if problem]
+        if problems:
+            return self._wasted_step("invalid_actions", "Error: " + " ".join(problems) + " No action was executed.")
+
+        finish = next((action for action in actions if action["tool"] == "finish"), None)
+        self.run_actions(None, [action for action in actions if action is not finish], objective)
+
+        if finish:
+            summary = finish.get("args", {}).get("summary", "Objective completed.")
             return summary, True
 
-        tool = self.tool_manager.get_tool(tool_name)
-        if not tool:
-            observation = f"Error: Tool '{tool_name}' not found."
+        return self.last_observation, False
+
+    def run_actions(self, thought: str | None, actions: list[dict], objective: str) -> list[str]:
+        if thought:
+            self.memory.add_entry("thought", thought)
+            self.memory.add_entry("action", json.dumps(actions[0] if len(actions) == 1 else actions))
+        for action in actions:
+            logger.info("Action: %s(%s)", action['tool'], action.get('args', {}))
+
+        calls = [(action["tool"], action.get("args", {})) for action in actions]
+        self.catalog.pin(name for name, _ in calls)
+        if not calls:
+            self.last_observation = ""
+            return []
+
+        preconditions = [
+            None if self.tool_manager.is_replayable(name, args) else self.tool_manager.replay_precondition(name, args)
+            for name, args in calls
+        ]
+        if self.checkpointer:
+            self.checkpointer.before_execute(calls)
+        observations = self._execute_calls(calls, objective)
+        if len(calls) == 1:
+            observation = observations[0]
         else:
-            try:
-                observation = tool.execute(**tool_args)
-            except Exception as e:
-                observation = f"Error executing tool '{tool_name}': {e}"
-        
-        self.memory.add_entry("observation", str(observation))
-        logger.info(f"Observation: {str(observation)[:300]}...")
-
-        return str(observation), False
+            observation = "\n".join(
+                f"[{i}] {name}: {result}" for i, ((name, _), result) in enumerate(zip(calls, observations), start=1)
+            )
+        self.memory.add_entry("observation", observation)
+        logger.info("Observation: %.300s...", observation)
+        self.last_observation = observation
+
+        if not any(name in self.builtin_tools for name, _ in calls) and not any(map(is_error_observation, observations)):
+            self.executed_steps.append({"calls": [
+                {"tool": name, "args": args, **({"pre": pre} if pre is not None else {})}
+                for (name, args), pre in zip(calls, preconditions)
+            ]})
+        return observations
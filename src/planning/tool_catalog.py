@@ -0,0 +1,118 @@
+import re
+from src.config import config
+from src.tools.tool_manifest import ToolSpec
+
+TERM_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "of", "in", "on", "at", "for", "with", "by", "from", "into", "is", "it",
+    "be", "as", "if", "this", "that", "then", "my", "me", "i", "you", "your", "all", "any", "some", "please",
+    "use", "using", "tool", "args", "str", "int", "optional", "provide", "default", "true", "false", "e", "g",
+}
+NAME_WEIGHT = 3
+PARAMETER_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+OBJECTIVE_WEIGHT = 2
+HISTORY_WEIGHT = 1
+
+def _stem(term: str) -> str:
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+def terms(text: str) -> set[str]:
+    return {_stem(term) for term in TERM_RE.findall(text.lower()) if term not in STOPWORDS}
+
+def describe_parameters(parameters: dict[str, dict]) -> str:
+    described = []
+    for name, schema in parameters.items():
+        details = [schema.get("type", "any")]
+        if schema.get("required"):
+            details.append("required")
+        if "enum" in schema:
+            details.append("one of: " + ", ".join(map(str, schema["enum"])))
+        described.append(f"{name} ({'; '.join(details)})")
+    return ", ".join(described) or "none"
+
+class ToolCatalog:
+    def __init__(self, specs: dict[str, ToolSpec], builtins: list[ToolSpec] | None = None):
+        self.specs = specs
+        self.builtins = builtins or []
+        self._terms = {name: self._tool_terms(spec) for name, spec in specs.items()}
+        self._rendered: dict[frozenset[str], str] = {}
+        self._objective: tuple[str, dict[str, int]] | None = None
+        self.reset()
+
+    @staticmethod
+    def _tool_terms(spec: ToolSpec) -> dict[str, int]:
+        weighted = dict.fromkeys(terms(spec.description), DESCRIPTION_WEIGHT)
+        for name, schema in (spec.parameters or {}).items():
+            for term in terms(" ".join([name, *map(str, schema.get("enum", ()))]).replace("_", " ")):
+                weighted[term] = PARAMETER_WEIGHT
+        for term in terms(" ".join([spec.name.replace("_", " "), *spec.tags])):
+            weighted[term] = NAME_WEIGHT
+        return weighted
+
+    def reset(self):
+        self.selected: set[str] = {name for name in config.TOOL_CATALOG_ALWAYS if name in self.specs}
+
+    def pin(self, names):
+        self.selected.update(name for name in names if name in self.specs)
+
+    def score(self, name: str, query: dict[str, int]) -> int:
+        weighted = self._terms[name]
+        return sum(weight * weighted[term] for term, weight in query.items() if term in weighted)
+
+    def rank(self, query: dict[str, int], exclude=()) -> list[str]:
+        scored = sorted(
+            ((self.score(name, query), name) for name in self.specs if name not in exclude),
+            key=lambda item: -item[0],
+        )
+        return [name for score, name in scored if score >= config.TOOL_CATALOG_MIN_SCORE]
+
+    def _objective_terms(self, objective: str) -> dict[str, int]:
+        if self._objective is None or self._objective[0] != objective:
+            self._objective = (objective, dict.fromkeys(terms(objective), OBJECTIVE_WEIGHT))
+        return self._objective[1]
+
+    def select(self, objective: str, history: str) -> frozenset[str]:
+        if not config.TOOL_CATALOG_FILTER:
+            return frozenset(self.specs)
+        room = config.TOOL_CATALOG_MAX_TOOLS - len(self.selected)
+        if room > 0:
+            query = dict.fromkeys(terms(history[-config.TOOL_CATALOG_HISTORY_CHARS:]), HISTORY_WEIGHT)
+            query.update(self._objective_terms(objective))
+            self.selected.update(self.rank(query, exclude=self.selected)[:room])
+        if not self.selected.difference(config.TOOL_CATALOG_ALWAYS):
+            return frozenset(self.specs)
+        return frozenset(self.selected)
+
+    def render(self, names: frozenset[str]) -> str:
+        rendered = self._rendered.get(names)
+        if rendered is None:
+            lines = ["You have access to the following tools:"]
+            lines.extend(f"- {name}: {spec.description}" for name, spec in self.specs.items() if name in names)
+            lines.extend(f"- {spec.name}: {spec.description}" for spec in self.builtins)
+            others = [name for name in self.specs if name not in names]
+            if others:
+                lines.append(
+                    f"Other tools exist but are not described here: {', '.join(others)}. "
+                    "Call `list_tools` with a query to get their descriptions before using them."
+                )
+            rendered = self._rendered[names] = "\n".join(lines) + "\n"
+        return rendered
+
+    def describe(self, query: str = "") -> str:
+        if not query.strip():
+            return "Available tools:\n" + "\n".join(f"- {name}: {spec.summary}" for name, spec in self.specs.items())
+        wanted = query.strip().lower()
+        names = [name for name in self.specs if name == wanted]
+        names += [name for name in self.rank(dict.fromkeys(terms(query), OBJECTIVE_WEIGHT)) if name not in names]
+        names = names[:config.TOOL_CATALOG_MAX_TOOLS]
+        if not names:
+            return f"No tool matches '{query}'. Available tools: {', '.join(self.specs)}."
+        self.pin(names)
+        return "\n".join(
+            f"- {name}: {self.specs[name].description}\n  Parameters: {describe_parameters(self.specs[name].parameters)}"
+            if self.specs[name].parameters is not None else f"- {name}: {self.specs[name].description}"
+            for name in names
+        )
@@ -0,0 +1,82 @@
+import json
+from src.memory.trajectory_store import TrajectoryStore
+from src.planning.react_planner import ReactPlanner, is_error_observation
+from src.config import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class TrajectoryReplayer:
+    def __init__(self, planner: ReactPlanner, store: TrajectoryStore):
+        self.planner = planner
+        self.store = store
+
+    def _actions(self, steps: list[dict]) -> str:
+        return "\n".join(
+            f"- {call['tool']} {json.dumps(call.get('args', {}))[:200]}"
+            for step in steps[:config.TRAJECTORY_HINT_STEPS]
+            for call in step["calls"]
+        )
+
+    def _hint(self, objective: str, steps: list[dict]) -> str:
+        return f"A similar objective ('{objective}') was completed before with these actions:\n" + self._actions(steps)
+
+    def replay(self, objective: str) -> int:
+        match = self.store.find(objective, config.TRAJECTORY_MIN_SIMILARITY)
+        if match is None:
+            return 0
+        if not match.replayable:
+            logger.info("Found a similar trajectory (%.2f) that cannot be replayed directly, adding it as a hint.", match.similarity)
+            self.planner.memory.add_entry("hint", self._hint(match.objective, match.steps))
+            return 0
+
+        steps = match.steps[:config.MAX_THOUGHTS - 1]
+        logger.info("Replaying %s recorded steps from '%s' (similarity %.2f).", len(steps), match.objective, match.similarity)
+        with self.planner.tracer.span("trajectory.replay", steps=len(steps), similarity=round(match.similarity, 3)) as span:
+            for index, step in enumerate(steps, start=1):
+                problems = [problem for problem in map(self.planner._validate_action, step["calls"]) if problem]
+                if problems:
+                    return self._diverged(match.trajectory_id, index, "Error: " + " ".join(problems), span)
+                if not all(map(self._can_replay, step["calls"])):
+                    return self._stopped(index, steps[index - 1:], span)
+
+                thought = f"Replaying step {index}/{len(steps)} of a recorded plan for '{match.objective}'."
+                calls = [{"tool": call["tool"], "args": call.get("args", {})} for call in step["calls"]]
+                observations = self.planner.run_actions(thought, calls, objective)
+                self.planner.stats["replayed_steps"] += 1
+                if any(map(is_error_observation, observations)):
+                    return self._diverged(match.trajectory_id, index, observations[0], span)
+                if self.planner.checkpointer:
+                    self.planner.checkpointer.step(index)
+
+            span.set(outcome="completed")
+        self.planner.memory.add_entry(
+            "hint", "Every recorded step was replayed successfully. Check the observations above and finish if the objective is met."
+        )
+        return len(steps)
+
+    def _can_replay(self, call: dict) -> bool:
+        tool_manager, args = self.planner.tool_manager, call.get("args", {})
+        if tool_manager.is_replayable(call["tool"], args):
+            return True
+        return call.get("pre") is not None and tool_manager.replay_precondition(call["tool"], args) == call["pre"]
+
+    def _stopped(self, index: int, remaining: list[dict], span) -> int:
+        logger.info("Stopped replaying before step %s: it changes state and its recorded precondition does not hold.", index)
+        span.set(outcome="stopped", stopped_at=index)
+        self.planner.memory.add_entry(
+            "hint",
+            f"Replay stopped at step {index}: the recorded plan continues with these actions, which change things, and the "
+            "state they were recorded in could not be confirmed. Check that they are still needed before running them:\n"
+            + self._actions(remaining),
+        )
+        return index - 1
+
+    def _diverged(self, trajectory_id: int, index: int, reason: str, span) -> int:
+        logger.warning("Recorded plan diverged at step %s: %.200s", index, reason)
+        self.store.mark_failure(trajectory_id)
+        span.set(outcome="diverged", diverged_at=index)
+        self.planner.memory.add_entry(
+            "hint", f"The recorded plan diverged at step {index}. Continue from here on your own."
+        )
+        return index
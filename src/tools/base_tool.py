@@ -1,7 +1,82 @@
+import inspect
+import math
 from abc import ABC, abstractmethod
 from typing import Any
 
+class ToolCallPolicy:
+    CACHEABLE = "cacheable"
+    MUTATING = "mutating"
+
+    __slots__ = ("kind", "resources", "ttl", "idempotent")
+
+    def __init__(self, kind: str, resources: tuple[str, ...] = (), ttl: float | None = None, idempotent: bool = True):
+        self.kind = kind
+        self.resources = resources
+        self.ttl = ttl
+        self.idempotent = idempotent
+
+JSON_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,),
+}
+BOOLEAN_STRINGS = {"true": True, "false": False}
+
+def _coerce(kind: str, value: Any) -> Any:
+    if kind == "boolean" and isinstance(value, str):
+        return BOOLEAN_STRINGS.get(value.strip().lower(), value)
+    if kind in ("integer", "number") and isinstance(value, str):
+        text = value.strip()
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            number = float(text)
+        except ValueError:
+            return value
+        if not math.isfinite(number):
+            return value
+        return int(number) if kind == "integer" and number.is_integer() else number
+    if kind == "integer" and isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def normalize_parameters(parameters: dict, args: dict) -> tuple[dict, str | None]:
+    normalized = dict(args)
+    problems = []
+    missing = [name for name, schema in parameters.items() if schema.get("required") and name not in args]
+    if missing:
+        problems.append(f"missing required argument(s): {', '.join(missing)}")
+    unexpected = [name for name in args if name not in parameters]
+    if unexpected:
+        problems.append(f"unexpected argument(s): {', '.join(unexpected)} (accepted: {', '.join(parameters) or 'none'})")
+    for name, value in args.items():
+        schema = parameters.get(name)
+        if schema is None or value is None:
+            continue
+        kind = schema.get("type")
+        value = normalized[name] = _coerce(kind, value)
+        expected = JSON_TYPES.get(kind)
+        if expected and (not isinstance(value, expected) or (isinstance(value, bool) and kind in ("integer", "number"))):
+            problems.append(f"'{name}' must be of type {schema['type']}")
+        elif "enum" in schema and value not in schema["enum"]:
+            problems.append(f"'{name}' must be one of: {', '.join(map(str, schema['enum']))}")
+    return normalized, "; ".join(problems) or None
+
+def validate_parameters(parameters: dict, args: dict) -> str | None:
+    return normalize_parameters(parameters, args)[1]
+
 class BaseTool(ABC):
+    max_concurrency: int | None = None
+    timeout: float | None = None
+    restart_on_timeout: bool = False
+    tags: tuple[str, ...] = ()
+    parameters: dict[str, dict] | None = None
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -15,3 +90,52 @@ class BaseTool(ABC):
     @abstractmethod
     def execute(self, *args, **kwargs) -> Any:
         pass
+
+    def validate_args(self, args: dict) -> str | None:
+        if self.parameters is not None:
+            return validate_parameters(self.parameters, args)
+        try:
+            parameters = inspect.signature(self.execute).parameters.values()
+        except (TypeError, ValueError):
+            return None
+        named = [p for p in parameters if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)]
+        problems = []
+        missing = [p.name for p in named if p.default is p.empty and p.name not in args]
+        if missing:
+            problems.append(f"missing required argument(s): {', '.join(missing)}")
+        if not any(p.kind == p.VAR_KEYWORD for p in parameters):
+            known = {p.name for p in named}
+            unexpected = [name for name in args if name not in known]
+            if unexpected:
+                problems.append(f"unexpected argument(s): {', '.join(unexpected)} (accepted: {', '.join(sorted(known)) or 'none'})")
+        return "; ".join(problems) or None
+
+    def call_policy(self, **kwargs) -> ToolCallPolicy | None:
+        return None
+
+    def call_timeout(self, **kwargs) -> float | None:
+        return self.timeout
+
+    def replay_precondition(self, **kwargs) -> str | None:
+        return None
+
+    def resource_version(self, resource: str) -> Any:
+        return None
+
+    def warm_up(self):
+        pass
+
+    def release_task(self, task_id: str):
+        pass
+
+    def session_state(self, task_id: str) -> dict | None:
+        return None
+
+    def restore_session(self, task_id: str, state: dict) -> str | None:
+        return None
+
+    def cancel(self, task_id: str):
+        pass
+
+    def shutdown(self):
+        pass
@@ -1,19 +1,50 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from src.tools.base_tool import BaseTool
+from src.tools.base_tool import BOOLEAN_STRINGS, BaseTool, ToolCallPolicy
+from src.tools.browser_session_pool import BrowserSessionPool, create_chrome_driver, driver_alive
+from src.config import config
 from src.utils.logger import get_logger
-import os
-import time
+from src.utils.task_context import current_task_id
 
 logger = get_logger(__name__)
 
+def _flag(value, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return BOOLEAN_STRINGS.get(value.strip().lower(), default)
+    return bool(value)
+
 class BrowserAutomationTool(BaseTool):
-    def __init__(self):
-        self.driver = None
+    requires = ("selenium", "webdriver_manager")
+    timeout = 120
+    tags = ("browser", "web", "website", "page", "url", "http", "https", "chrome", "search", "click", "form", "login", "element", "screenshot")
+    parameters = {
+        "operation": {
+            "type": "string",
+            "required": True,
+            "enum": [
+                "open_url", "find_element", "click_element", "type_in_element", "get_page_source", "screenshot",
+                "close_browser", "fill_form", "get_element_text", "wait_for_element", "run_script",
+            ],
+        },
+        "url": {"type": "string"},
+        "selector": {"type": "string"},
+        "text": {"type": "string"},
+        "file_path": {"type": "string"},
+        "form_data": {"type": "object"},
+        "timeout": {"type": "number"},
+        "steps": {"type": "array"},
+        "stop_on_error": {"type": "boolean"},
+    }
+
+    def __init__(self, driver_factory=None):
+        self.pool = BrowserSessionPool(
+            driver_factory or create_chrome_driver,
+            max_sessions=config.BROWSER_POOL_MAX_SESSIONS,
+            acquire_timeout=config.BROWSER_POOL_ACQUIRE_TIMEOUT,
+        )
 
     @property
     def name(self) -> str:
@@ -24,7 +55,7 @@ class BrowserAutomationTool(BaseTool):
         return (
             "Performs web browser automation tasks. "
             "Args: operation (str), **kwargs. "
-            "Valid operations: 'open_url', 'find_element', 'click_element', 'type_in_element', 'get_page_source', 'screenshot', 'close_browser', 'fill_form', 'get_element_text', 'wait_for_element'. "
+            "Valid operations: 'open_url', 'find_element', 'click_element', 'type_in_element', 'get_page_source', 'screenshot', 'close_browser', 'fill_form', 'get_element_text', 'wait_for_element', 'run_script'. "
             "For 'open_url', provide 'url'. "
             "For 'find_element', provide 'selector'. "
             "For 'click_element', provide 'selector'. "
@@ -32,104 +63,222 @@ class BrowserAutomationTool(BaseTool):
             "For 'screenshot', provide 'file_path'."
             "For 'fill_form', provide 'form_data' (a dictionary of selectors and values)."
             "For 'get_element_text', provide 'selector'."
-            "For 'wait_for_element', provide 'selector' and 'timeout' (optional, default 10)."
+            "For 'wait_for_element', provide 'selector' and 'timeout' (optional, default 10). "
+            "For 'run_script', provide 'steps' (a list of operation objects such as "
+            "{\"operation\": \"type_in_element\", \"selector\": \"#user\", \"text\": \"me\"}) to run them in order in one call; "
+            "any step may add 'wait_for' (a selector to wait for first), 'if_present' (a selector; the step is skipped when it is missing) "
+            "and 'optional' (true to continue when the step fails). "
+            "'stop_on_error' (optional, default true) stops the script at the first failed step."
         )
 
-    def _initialize_driver(self):
-        if self.driver is None:
-            try:
-                options = webdriver.ChromeOptions()
-                options.add_argument("--headless")
-                self.driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
-                logger.info("Chrome driver initialized.")
-            except Exception as e:
-                logger.error(f"Failed to initialize Chrome driver: {e}")
-                raise
+    def call_policy(self, operation: str = None, **kwargs) -> ToolCallPolicy | None:
+        if operation in ("click_element", "type_in_element", "fill_form", "run_script"):
+            return ToolCallPolicy(ToolCallPolicy.MUTATING, ("browser",), idempotent=False)
+        return None
 
-    def execute(self, operation: str, **kwargs) -> str:
-        logger.info(f"Executing browser automation operation '{operation}' with args {kwargs}")
+    def call_timeout(self, operation: str = None, timeout=None, steps=None, **kwargs) -> float | None:
+        waits = 0.0
+        if operation == "wait_for_element":
+            waits = float(timeout or 10)
+        elif operation == "run_script" and isinstance(steps, list):
+            waits = sum(
+                float(step.get("wait_timeout", 10)) for step in steps if isinstance(step, dict) and step.get("wait_for")
+            )
+        return self.timeout + waits
+
+    def replay_precondition(self, operation: str = None, **kwargs) -> str | None:
+        if operation not in ("click_element", "type_in_element", "fill_form", "run_script"):
+            return None
+        state = self.session_state(current_task_id.get())
+        return state["url"] if state else "about:blank"
+
+    def session_state(self, task_id: str) -> dict | None:
+        session = self.pool.leased(task_id)
+        if session is None:
+            return None
         try:
-            self._initialize_driver()
-
-            if operation == "open_url":
-                url = kwargs.get("url")
-                if not url:
-                    return "Error: 'url' is required for 'open_url'."
-                self.driver.get(url)
-                return f"Successfully opened URL: {url}"
-
-            elif operation == "find_element":
-                selector = kwargs.get("selector")
-                if not selector:
-                    return "Error: 'selector' is required for 'find_element'."
-                element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                return str(element.get_attribute('outerHTML'))
-
-            elif operation == "click_element":
-                selector = kwargs.get("selector")
-                if not selector:
-                    return "Error: 'selector' is required for 'click_element'."
-                element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                element.click()
-                return f"Successfully clicked element with selector '{selector}'."
-
-            elif operation == "type_in_element":
-                selector = kwargs.get("selector")
-                text = kwargs.get("text")
-                if not selector or text is None:
-                    return "Error: 'selector' and 'text' are required for 'type_in_element'."
-                element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                element.send_keys(text)
-                return f"Successfully typed '{text}' in element with selector '{selector}'."
-
-            elif operation == "get_page_source":
-                return self.driver.page_source
-
-            elif operation == "fill_form":
-                form_data = kwargs.get("form_data")
-                if not isinstance(form_data, dict):
-                    return "Error: 'form_data' must be a dictionary of selectors and values."
-                for selector, value in form_data.items():
-                    try:
-                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        element.send_keys(value)
-                    except Exception as e:
-                        return f"Error filling form for selector '{selector}': {e}"
-                return "Successfully filled the form."
-
-            elif operation == "get_element_text":
-                selector = kwargs.get("selector")
-                if not selector:
-                    return "Error: 'selector' is required for 'get_element_text'."
-                element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                return element.text
-
-            elif operation == "wait_for_element":
-                selector = kwargs.get("selector")
-                timeout = kwargs.get("timeout", 10)
-                if not selector:
-                    return "Error: 'selector' is required for 'wait_for_element'."
-                wait = WebDriverWait(self.driver, timeout)
-                element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-                return f"Element with selector '{selector}' is present."
-
-            elif operation == "screenshot":
-                file_path = kwargs.get("file_path")
-                if not file_path:
-                    return "Error: 'file_path' is required for 'screenshot'."
-                self.driver.save_screenshot(file_path)
-                return f"Screenshot saved to {file_path}"
-
-            elif operation == "close_browser":
-                if self.driver:
-                    self.driver.quit()
-                    self.driver = None
-                    return "Browser closed."
-                return "Browser not open."
-
-            else:
-                return f"Error: Unknown browser automation operation '{operation}'."
+            with session.lock:
+                url = session.driver.current_url
+        except Exception:
+            return None
+        return {"url": url} if url and url != "about:blank" else None
+
+    def restore_session(self, task_id: str, state: dict) -> str | None:
+        url = state.get("url")
+        if not url:
+            return None
+        result = self.execute("open_url", url=url)
+        if result.startswith("Error"):
+            return f"The browser could not be reopened at {url}: {result}"
+        return f"The browser was reopened at {url}. Cookies, logins and unsaved form input from before the restart are lost."
+
+    def warm_up(self):
+        if config.BROWSER_POOL_PREWARM:
+            self.pool.prewarm(config.BROWSER_POOL_PREWARM)
+
+    def release_task(self, task_id: str):
+        self.pool.release(task_id)
 
+    def cancel(self, task_id: str):
+        self.pool.evict(task_id)
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+    def execute(self, operation: str, **kwargs) -> str:
+        logger.info("Executing browser automation operation '%s' with args %s", operation, kwargs)
+        task_id = current_task_id.get()
+        if operation == "close_browser":
+            return "Browser closed." if self.pool.release(task_id) else "Browser not open."
+
+        try:
+            session = self.pool.acquire(task_id)
         except Exception as e:
-            logger.error(f"Browser automation tool error: {e}")
+            logger.error("Failed to initialize Chrome driver: %s", e)
             return f"Error during browser automation: {e}"
+
+        with session.lock:
+            try:
+                result = self._run_operation(session.driver, operation, kwargs)
+                self._remember_origin(session)
+                return result
+            except ValueError as e:
+                return f"Error: {e}"
+            except Exception as e:
+                logger.error("Browser automation tool error: %s", e)
+                if not self.pool.is_healthy(session):
+                    self.pool.evict(task_id)
+                    return f"Error during browser automation: {e}. The browser session crashed and was discarded; a new one will be started on the next browser action."
+                return f"Error during browser automation: {e}"
+
+    def _remember_origin(self, session):
+        try:
+            session.visited(session.driver.current_url)
+        except Exception as e:
+            logger.debug("Could not read the current URL of browser session %s: %s", session.session_id, e)
+
+    def _run_script(self, driver, steps, stop_on_error: bool = True) -> str:
+        if not isinstance(steps, list) or not steps:
+            raise ValueError("'steps' must be a non-empty list of operations for 'run_script'.")
+
+        lines, failed = [], 0
+        for index, step in enumerate(steps, start=1):
+            step = dict(step) if isinstance(step, dict) else {}
+            operation = step.pop("operation", None)
+            wait_for = step.pop("wait_for", None)
+            wait_timeout = step.pop("wait_timeout", 10)
+            if_present = step.pop("if_present", None)
+            optional = _flag(step.pop("optional", None), False)
+
+            error = None
+            try:
+                if not operation:
+                    raise ValueError("each step must be an object with an 'operation'.")
+                if operation in ("run_script", "close_browser"):
+                    raise ValueError(f"'{operation}' cannot be used inside 'run_script'.")
+                if if_present and not driver.find_elements(By.CSS_SELECTOR, if_present):
+                    lines.append(f"{index}. {operation}: skipped ('{if_present}' not present)")
+                    continue
+                if wait_for:
+                    WebDriverWait(driver, wait_timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, wait_for))
+                    )
+                result = self._run_operation(driver, operation, step)
+            except ValueError as e:
+                error = f"Error: {e}"
+            except Exception as e:
+                if not driver_alive(driver):
+                    raise RuntimeError(f"step {index} ({operation}) failed and the browser stopped responding: {e}") from e
+                error = f"Error: {e}"
+
+            if error and optional:
+                lines.append(f"{index}. {operation}: optional step failed: {self._compact(error)}")
+                continue
+            lines.append(f"{index}. {operation}: {self._compact(error or result)}")
+            if error:
+                failed += 1
+                if stop_on_error:
+                    lines.append(f"Stopped after step {index} of {len(steps)}.")
+                    break
+
+        if failed:
+            return f"Error: Script finished with {failed} failed step(s):\n" + "\n".join(lines)
+        return "Script completed:\n" + "\n".join(lines)
+
+    def _compact(self, result: str) -> str:
+        result = " ".join(str(result).split())
+        limit = config.BROWSER_SCRIPT_STEP_CHARS
+        return result if len(result) <= limit else result[:limit] + f"... [{len(result) - limit} more chars]"
+
+    def _run_operation(self, driver, operation: str, kwargs: dict) -> str:
+        if operation == "open_url":
+            url = kwargs.get("url")
+            if not url:
+                raise ValueError("'url' is required for 'open_url'.")
+            driver.get(url)
+            return f"Successfully opened URL: {url}"
+
+        elif operation == "find_element":
+            selector = kwargs.get("selector")
+            if not selector:
+                raise ValueError("'selector' is required for 'find_element'.")
+            element = driver.find_element(By.CSS_SELECTOR, selector)
+            return str(element.get_attribute('outerHTML'))
+
+        elif operation == "click_element":
+            selector = kwargs.get("selector")
+            if not selector:
+                raise ValueError("'selector' is required for 'click_element'.")
+            element = driver.find_element(By.CSS_SELECTOR, selector)
+            element.click()
+            return f"Successfully clicked element with selector '{selector}'."
+
+        elif operation == "type_in_element":
+            selector = kwargs.get("selector")
+            text = kwargs.get("text")
+            if not selector or text is None:
+                raise ValueError("'selector' and 'text' are required for 'type_in_element'.")
+            element = driver.find_element(By.CSS_SELECTOR, selector)
+            element.send_keys(text)
+            return f"Successfully typed '{text}' in element with selector '{selector}'."
+
+        elif operation == "get_page_source":
+            return driver.page_source
+
+        elif operation == "fill_form":
+            form_data = kwargs.get("form_data")
+            if not isinstance(form_data, dict):
+                raise ValueError("'form_data' must be a dictionary of selectors and values.")
+            for selector, value in form_data.items():
+                element = driver.find_element(By.CSS_SELECTOR, selector)
+                element.send_keys(value)
+            return "Successfully filled the form."
+
+        elif operation == "get_element_text":
+            selector = kwargs.get("selector")
+            if not selector:
+                raise ValueError("'selector' is required for 'get_element_text'.")
+            element = driver.find_element(By.CSS_SELECTOR, selector)
+            return element.text
+
+        elif operation == "wait_for_element":
+            selector = kwargs.get("selector")
+            timeout = kwargs.get("timeout", 10)
+            if not selector:
+                raise ValueError("'selector' is required for 'wait_for_element'.")
+            wait = WebDriverWait(driver, timeout)
+            element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+            return f"Element with selector '{selector}' is present."
+
+        elif operation == "run_script":
+            return self._run_script(driver, kwargs.get("steps"), _flag(kwargs.get("stop_on_error"), True))
+
+        elif operation == "screenshot":
+            file_path = kwargs.get("file_path")
+            if not file_path:
+                raise ValueError("'file_path' is required for 'screenshot'.")
+            driver.save_screenshot(file_path)
+            return f"Screenshot saved to {file_path}"
+
+        else:
+            raise ValueError(f"Unknown browser automation operation '{operation}'.")
@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable
+from urllib.parse import urlsplit
+from src.config import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_driver_path: str | None = None
+_driver_path_lock = threading.Lock()
+
+def resolve_chromedriver_path() -> str:
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        cache_file = os.path.join(config.CACHE_DIR, "chromedriver_path.json")
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f).get("path")
+            if cached and os.path.exists(cached):
+                _driver_path = cached
+                return cached
+        except (OSError, ValueError):
+            pass
+
+        from webdriver_manager.chrome import ChromeDriverManager
+        started = time.perf_counter()
+        _driver_path = ChromeDriverManager().install()
+        logger.info("Resolved chromedriver at %s in %.1fs.", _driver_path, time.perf_counter() - started)
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump({"path": _driver_path}, f)
+        return _driver_path
+
+def create_chrome_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    return webdriver.Chrome(service=ChromeService(resolve_chromedriver_path()), options=options)
+
+def driver_alive(driver: Any) -> bool:
+    try:
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+class BrowserSession:
+    def __init__(self, session_id: int, driver: Any):
+        self.session_id = session_id
+        self.driver = driver
+        self.lock = threading.RLock()
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.origins: set[str] = set()
+
+    def visited(self, url: str):
+        parts = urlsplit(url or "")
+        if parts.scheme in ("http", "https") and parts.netloc:
+            self.origins.add(f"{parts.scheme}://{parts.netloc}")
+
+class BrowserSessionPool:
+    def __init__(self, driver_factory: Callable[[], Any], max_sessions: int = 4, acquire_timeout: float = 60.0):
+        self.driver_factory = driver_factory
+        self.max_sessions = max_sessions
+        self.acquire_timeout = acquire_timeout
+        self._idle: list[BrowserSession] = []
+        self._leased: dict[str, BrowserSession] = {}
+        self._starting = 0
+        self._checking = 0
+        self._counter = 0
+        self._condition = threading.Condition()
+        self.stats = {"created": 0, "reused": 0, "evicted": 0}
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._leased) + self._starting + self._checking
+
+    def _create(self) -> BrowserSession:
+        started = time.perf_counter()
+        driver = self.driver_factory()
+        with self._condition:
+            self._counter += 1
+            session = BrowserSession(self._counter, driver)
+            self.stats["created"] += 1
+        logger.info("Browser session %s launched in %.1fs.", session.session_id, time.perf_counter() - started)
+        return session
+
+    def prewarm(self, count: int) -> threading.Thread:
+        def launch():
+            for _ in range(count):
+                with self._condition:
+                    if self.size >= self.max_sessions or len(self._idle) >= count:
+                        return
+                    self._starting += 1
+                try:
+                    session = self._create()
+                except Exception as e:
+                    logger.warning("Could not pre-launch a browser session: %s", e)
+                    with self._condition:
+                        self._starting -= 1
+                        self._condition.notify_all()
+                    return
+                with self._condition:
+                    self._starting -= 1
+                    self._idle.append(session)
+                    self._condition.notify_all()
+
+        thread = threading.Thread(target=launch, name="browser-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def is_healthy(self, session: BrowserSession) -> bool:
+        return driver_alive(session.driver)
+
+    def _discard(self, session: BrowserSession):
+        self.stats["evicted"] += 1
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+    def acquire(self, owner: str) -> BrowserSession:
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._condition:
+                session = self._leased.get(owner)
+                if session is not None:
+                    return session
+                if self._idle:
+                    session = self._idle.pop()
+                    self._checking += 1
+                elif self.size < self.max_sessions and not self._starting:
+                    self._starting += 1
+                    break
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No browser session became available within {self.acquire_timeout}s.")
+                    self._condition.wait(remaining)
+                    continue
+
+            healthy = self.is_healthy(session)
+            if not healthy:
+                logger.warning("Evicting crashed browser session %s.", session.session_id)
+                self._discard(session)
+            with self._condition:
+                self._checking -= 1
+                self._condition.notify_all()
+                if healthy:
+                    leased = self._leased.get(owner)
+                    if leased is not None:
+                        self._idle.append(session)
+                        return leased
+                    self._leased[owner] = session
+                    session.uses += 1
+                    self.stats["reused"] += 1
+                    return session
+
+        try:
+            session = self._create()
+        except Exception:
+            with self._condition:
+                self._starting -= 1
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            self._starting -= 1
+            session.uses += 1
+            self._leased[owner] = session
+            return session
+
+    def leased(self, owner: str) -> BrowserSession | None:
+        with self._condition:
+            return self._leased.get(owner)
+
+    def _reset(self, session: BrowserSession):
+        driver = session.driver
+        handles = driver.window_handles
+        for handle in reversed(handles):
+            driver.switch_to.window(handle)
+            session.visited(driver.current_url)
+            if handle != handles[0]:
+                driver.close()
+        driver.get("about:blank")
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        for origin in session.origins:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        session.origins.clear()
+
+    def release(self, owner: str, reset: bool = True) -> bool:
+        with self._condition:
+            session = self._leased.pop(owner, None)
+        if session is None:
+            return False
+        try:
+            with session.lock:
+                if reset:
+                    self._reset(session)
+            with self._condition:
+                self._idle.append(session)
+                self._condition.notify_all()
+        except Exception as e:
+            logger.warning("Browser session %s failed to reset, evicting it: %s", session.session_id, e)
+            self._discard(session)
+            with self._condition:
+                self._condition.notify_all()
+        return True
+
+    def evict(self, owner: str):
+        with self._condition:
+            session = self._leased.pop(owner, None)
+            self._condition.notify_all()
+        if session is not None:
+            self._discard(session)
+
+    def shutdown(self):
+        with self._condition:
+            sessions = self._idle + list(self._leased.values())
+            self._idle, self._leased = [], {}
+        for session in sessions:
+            self._discard(session)
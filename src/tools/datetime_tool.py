@@ -5,6 +5,9 @@ from src.utils.logger import get_logger
 logger = get_logger(__name__)
 
 class DateTimeTool(BaseTool):
+    tags = ("date", "time", "clock", "today", "now", "day", "month", "year", "hour")
+    parameters = {}
+
     @property
     def name(self) -> str:
         return "get_datetime"
@@ -18,5 +21,5 @@ class DateTimeTool(BaseTool):
         try:
             return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         except Exception as e:
-            logger.error(f"DateTime tool error: {e}")
+            logger.error("DateTime tool error: %s", e)
             return f"Error getting date and time: {e}"
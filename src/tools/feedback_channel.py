@@ -0,0 +1,344 @@
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from src.config import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class FeedbackQuestion:
+    PENDING = "pending"
+    ANSWERED = "answered"
+    TIMED_OUT = "timed_out"
+    CANCELLED = "cancelled"
+
+    __slots__ = ("question_id", "task_id", "question", "default", "timeout", "asked_at", "status", "answer", "source")
+
+    def __init__(
+        self,
+        question_id: str,
+        task_id: str,
+        question: str,
+        default: str | None,
+        timeout: float,
+        asked_at: float | None = None,
+        status: str = PENDING,
+        answer: str | None = None,
+        source: str | None = None,
+    ):
+        self.question_id = question_id
+        self.task_id = task_id
+        self.question = question
+        self.default = default
+        self.timeout = timeout
+        self.asked_at = asked_at or time.time()
+        self.status = status
+        self.answer = answer
+        self.source = source
+
+    @property
+    def deadline(self) -> float:
+        return self.asked_at + self.timeout
+
+    @property
+    def resolved(self) -> bool:
+        return self.status != self.PENDING
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @property
+    def observation(self) -> str:
+        if self.status == self.ANSWERED:
+            return f"The user responded: '{self.answer}'"
+        if self.status == self.TIMED_OUT and self.default is not None:
+            return f"The user did not answer within {self.timeout:g}s, so the default answer was used: '{self.default}'"
+        if self.status == self.TIMED_OUT:
+            return (
+                f"The user did not answer within {self.timeout:g}s. "
+                "Continue with your best judgement, or finish with a summary of what you need from them."
+            )
+        if self.status == self.CANCELLED:
+            return "The question was withdrawn before the user answered."
+        return f"The question '{self.question_id}' is still waiting for an answer."
+
+class ConsoleResponder:
+    def __init__(self, channel: "FeedbackChannel"):
+        self.channel = channel
+        self.lines: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._read, name="feedback-console", daemon=True)
+                self._thread.start()
+
+    def show(self, question: FeedbackQuestion):
+        details = [f"id {question.question_id}", f"answer within {question.timeout:g}s"]
+        if question.default is not None:
+            details.append(f"default: '{question.default}'")
+        print("\n--- AGENT REQUEST ---")
+        print(f"The agent is asking for your help: {question.question}")
+        print(f"({'; '.join(details)}. When several questions are open, reply with '<id>: <answer>'.)")
+        print("Your response: ", end="", flush=True)
+        self._start()
+
+    def resolved(self, question: FeedbackQuestion):
+        if question.source != "console":
+            print(f"\n[Question {question.question_id} was closed ({question.status}, via {question.source}).]", flush=True)
+
+    def _read(self):
+        while True:
+            line = sys.stdin.readline()
+            if not line:
+                logger.info("Console input closed; questions can still be answered through the other feedback sources.")
+                self.lines.put(None)
+                return
+            text = line.rstrip("\r\n")
+            if not self._dispatch(text):
+                self.lines.put(text)
+
+    def _dispatch(self, text: str) -> bool:
+        pending = self.channel.pending()
+        if not pending:
+            return False
+        question_id, separator, answer = text.partition(":")
+        if separator and any(question.question_id == question_id.strip() for question in pending):
+            return self.channel.answer(question_id.strip(), answer.strip(), "console")
+        return self.channel.answer(pending[0].question_id, text.strip(), "console")
+
+    def read_line(self, prompt: str) -> str:
+        print(prompt, end="", flush=True)
+        line = self.lines.get()
+        if line is None:
+            raise EOFError
+        return line
+
+class _FeedbackRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        channel = self.server.channel
+        for raw in self.rfile:
+            command, _, rest = raw.decode("utf-8", errors="replace").strip().partition(" ")
+            command = command.lower()
+            if command == "list":
+                reply = "\n".join(json.dumps(question.to_dict()) for question in channel.pending()) or "(no pending questions)"
+            elif command == "answer":
+                question_id, _, text = rest.partition(" ")
+                answered = channel.answer(question_id, text.strip(), "socket")
+                reply = "ok" if answered else f"error: no pending question '{question_id}'"
+            elif command == "quit":
+                return
+            else:
+                reply = "error: commands are 'list', 'answer <id> <text>' and 'quit'"
+            self.wfile.write((reply + "\n").encode("utf-8"))
+
+class _FeedbackServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+class SocketResponder:
+    def __init__(self, channel: "FeedbackChannel", host: str, port: int):
+        self.server = _FeedbackServer((host, port), _FeedbackRequestHandler)
+        self.server.channel = channel
+        self.address = self.server.server_address
+        threading.Thread(target=self.server.serve_forever, name="feedback-socket", daemon=True).start()
+        logger.info("Answering feedback questions on %s:%s.", *self.address[:2])
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class FeedbackChannel:
+    def __init__(self, directory: str, sources=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._questions: dict[str, FeedbackQuestion] = {}
+        self._callbacks: dict[str, list] = {}
+        self._suspended: dict[str, str] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._load()
+
+        sources = config.FEEDBACK_SOURCES if sources is None else sources
+        self.watch_files = "file" in sources
+        self.console = ConsoleResponder(self) if "console" in sources else None
+        self.socket = None
+        if "socket" in sources:
+            try:
+                self.socket = SocketResponder(self, "127.0.0.1", config.FEEDBACK_SOCKET_PORT)
+            except OSError as e:
+                logger.warning("Could not open the feedback socket on port %s: %s", config.FEEDBACK_SOCKET_PORT, e)
+        self._watcher = threading.Thread(target=self._watch, name="feedback-watch", daemon=True)
+        self._watcher.start()
+
+    def _path(self, question_id: str, suffix: str = ".json") -> str:
+        return os.path.join(self.directory, question_id + suffix)
+
+    def _load(self):
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    question = FeedbackQuestion(**json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("Skipping unreadable feedback question %s: %s", name, e)
+                continue
+            self._questions[question.question_id] = question
+
+    def _save(self, question: FeedbackQuestion):
+        path = self._path(question.question_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(question.to_dict(), f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def ask(self, question: str, task_id: str, timeout: float | None = None, default: str | None = None) -> FeedbackQuestion:
+        asked = FeedbackQuestion(uuid.uuid4().hex[:8], task_id, question, default, timeout or config.FEEDBACK_TIMEOUT)
+        with self._condition:
+            self._questions[asked.question_id] = asked
+            self._save(asked)
+            self._condition.notify_all()
+        logger.info(
+            "Question %s of task %s is waiting for an answer (it can be written to %s).",
+            asked.question_id, task_id, self._path(asked.question_id, ".answer"),
+        )
+        if self.console:
+            self.console.show(asked)
+        return asked
+
+    def answer(self, question_id: str, answer: str, source: str) -> bool:
+        return self._resolve(question_id, FeedbackQuestion.ANSWERED, answer, source)
+
+    def _resolve(self, question_id: str, status: str, answer: str | None, source: str) -> bool:
+        with self._condition:
+            question = self._questions.get(question_id)
+            if question is None or question.resolved:
+                return False
+            question.status, question.answer, question.source = status, answer, source
+            self._save(question)
+            callbacks = self._callbacks.pop(question_id, [])
+            self._condition.notify_all()
+        logger.info("Question %s was closed (%s, via %s).", question_id, status, source)
+        if self.console:
+            self.console.resolved(question)
+        for callback in callbacks:
+            try:
+                callback(question)
+            except Exception as e:
+                logger.error("Feedback callback for question %s failed: %s", question_id, e, exc_info=True)
+        return True
+
+    def get(self, question_id: str) -> FeedbackQuestion | None:
+        with self._condition:
+            return self._questions.get(question_id)
+
+    def pending(self) -> list[FeedbackQuestion]:
+        with self._condition:
+            questions = [question for question in self._questions.values() if not question.resolved]
+        return sorted(questions, key=lambda question: question.asked_at)
+
+    def wait(self, question_id: str, timeout: float | None = None) -> FeedbackQuestion | None:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                question = self._questions.get(question_id)
+                if question is None or question.resolved:
+                    return question
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return question
+                self._condition.wait(remaining)
+
+    def when_resolved(self, question_id: str, callback):
+        with self._condition:
+            question = self._questions.get(question_id)
+            if question is not None and not question.resolved:
+                self._callbacks.setdefault(question_id, []).append(callback)
+                return
+        callback(question)
+
+    def suspend(self, task_id: str, question_id: str):
+        with self._condition:
+            self._suspended[task_id] = question_id
+
+    def take_suspension(self, task_id: str) -> str | None:
+        with self._condition:
+            return self._suspended.pop(task_id, None)
+
+    def end_task(self, task_id: str):
+        with self._condition:
+            questions = [question for question in self._questions.values() if question.task_id == task_id]
+            self._suspended.pop(task_id, None)
+        for question in questions:
+            self._resolve(question.question_id, FeedbackQuestion.CANCELLED, None, "task end")
+            with self._condition:
+                self._questions.pop(question.question_id, None)
+            for suffix in (".json", ".answer"):
+                try:
+                    os.remove(self._path(question.question_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def _collect_answer_files(self):
+        for name in os.listdir(self.directory):
+            if not name.endswith(".answer"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    answer = f.read().strip()
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Could not read feedback answer %s: %s", path, e)
+                continue
+            if not self.answer(name[:-len(".answer")], answer, "file"):
+                logger.warning("Ignoring %s: there is no pending question with that id.", path)
+
+    def _watch(self):
+        while not self._closed:
+            if self.watch_files:
+                self._collect_answer_files()
+            now = time.time()
+            for question in self.pending():
+                if now >= question.deadline:
+                    self._resolve(question.question_id, FeedbackQuestion.TIMED_OUT, question.default, "timeout")
+            with self._condition:
+                if not self._closed:
+                    self._condition.wait(config.FEEDBACK_POLL_INTERVAL)
+
+    def shutdown(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self.socket:
+            self.socket.close()
+
+_feedback_channel = None
+_feedback_channel_lock = threading.Lock()
+
+def get_feedback_channel() -> FeedbackChannel:
+    global _feedback_channel
+    with _feedback_channel_lock:
+        if _feedback_channel is None:
+            _feedback_channel = FeedbackChannel(config.FEEDBACK_DIR)
+        return _feedback_channel
+
+def active_feedback_channel() -> FeedbackChannel | None:
+    return _feedback_channel
+
+def read_line(prompt: str) -> str:
+    channel = _feedback_channel
+    if channel is not None and channel.console is not None and channel.console.started:
+        return channel.console.read_line(prompt)
+    return input(prompt)
@@ -1,10 +1,77 @@
+import datetime
+import fnmatch
+import itertools
+import mmap
 import os
-from src.tools.base_tool import BaseTool
+import re
+import stat as stat_module
+from src.tools.base_tool import BaseTool, ToolCallPolicy
+from src.config import config
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+READ_OPERATIONS = ("read", "list", "grep", "stat")
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+def _read_bytes(path: str, offset: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if offset >= size or length <= 0:
+            return b""
+        if size >= config.FILE_MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[offset:offset + length]
+        f.seek(offset)
+        return f.read(length)
+
+def _is_binary(path: str) -> bool:
+    with open(path, "rb") as f:
+        return b"\0" in f.read(1024)
+
+def _walk(directory: str, depth: int, glob: str | None, level: int = 1):
+    try:
+        with os.scandir(directory) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name.lower())
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            is_dir = False
+        if not glob or fnmatch.fnmatch(entry.name, glob):
+            yield entry, is_dir
+        if is_dir and level < depth:
+            yield from _walk(entry.path, depth, glob, level + 1)
+
 class FileSystemTool(BaseTool):
+    tags = ("file", "folder", "directory", "path", "read", "write", "save", "delete", "list", "document", "text", "disk",
+            "search", "grep", "find", "log", "size")
+    parameters = {
+        "operation": {
+            "type": "string",
+            "required": True,
+            "enum": ["read", "write", "list", "delete", "grep", "stat", "read_many", "write_many"],
+        },
+        "path": {"type": "string"},
+        "content": {"type": "string"},
+        "offset": {"type": "integer"},
+        "length": {"type": "integer"},
+        "start_line": {"type": "integer"},
+        "end_line": {"type": "integer"},
+        "pattern": {"type": "string"},
+        "glob": {"type": "string"},
+        "ignore_case": {"type": "boolean"},
+        "max_matches": {"type": "integer"},
+        "depth": {"type": "integer"},
+        "max_entries": {"type": "integer"},
+        "paths": {"type": "array"},
+        "files": {"type": "object"},
+    }
+
     @property
     def name(self) -> str:
         return "file_system"
@@ -13,22 +80,87 @@ class FileSystemTool(BaseTool):
     def description(self) -> str:
         return (
             "Performs file system operations. "
-            "Args: operation (str), path (str), content (str, optional). "
-            "Valid operations: 'read', 'write', 'list', 'delete'."
+            "Args: operation (str), path (str), plus the operation's own arguments. "
+            "Valid operations: 'read', 'write', 'list', 'delete', 'grep', 'stat', 'read_many', 'write_many'. "
+            "'read' returns the whole file up to a size limit; pass 'start_line' and 'end_line' (1-based, inclusive) "
+            "for a numbered line window or 'offset' and 'length' for a byte range, which is much cheaper for large files. "
+            "'write' needs 'content'. "
+            "'list' lists a directory; optional 'depth' (default 1) to recurse, 'glob' (e.g. '*.log') to filter names "
+            "and 'max_entries'. "
+            "'grep' searches a file, or every file under a directory, for the regular expression 'pattern' and "
+            "returns 'path:line: text' matches; optional 'glob', 'ignore_case' and 'max_matches'. "
+            "Search large files with 'grep' and then read only the lines you need instead of reading them whole. "
+            "'stat' returns the type, size and modification time. "
+            "'read_many' reads a list of 'paths' and 'write_many' writes 'files' (an object of path to content) in one call."
         )
 
-    def execute(self, operation: str, path: str, content: str = None) -> str:
-        logger.info(f"Executing file system operation '{operation}' on path '{path}'")
+    def call_policy(self, operation: str = None, path: str = None, **kwargs) -> ToolCallPolicy | None:
+        if operation == "read_many":
+            paths = tuple(os.path.abspath(str(p)) for p in kwargs.get("paths") or ())
+            return ToolCallPolicy(ToolCallPolicy.CACHEABLE, paths) if paths else None
+        if operation == "write_many":
+            paths = [os.path.abspath(str(p)) for p in kwargs.get("files") or {}]
+            resources = tuple(dict.fromkeys(paths + [os.path.dirname(p) for p in paths]))
+            return ToolCallPolicy(ToolCallPolicy.MUTATING, resources) if resources else None
+        if not path:
+            return None
+        path = os.path.abspath(path)
+        if operation in READ_OPERATIONS:
+            resources = (path,)
+            if operation == "grep" or (operation == "list" and int(kwargs.get("depth") or 1) > 1):
+                resources += (os.path.join(path, "*"),)
+            return ToolCallPolicy(ToolCallPolicy.CACHEABLE, resources)
+        if operation in ("write", "delete"):
+            return ToolCallPolicy(ToolCallPolicy.MUTATING, (path, os.path.dirname(path)))
+        return None
+
+    def replay_precondition(self, operation: str = None, path: str = None, **kwargs) -> str | None:
+        if operation == "write_many":
+            paths = [str(p) for p in kwargs.get("files") or {}]
+        elif operation in ("write", "delete") and path:
+            paths = [path]
+        else:
+            return None
+        return ",".join(map(self._path_state, paths)) or None
+
+    def _path_state(self, path: str) -> str:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            return "directory"
+        if os.path.isfile(path):
+            return "file"
+        return "missing" if os.path.isdir(os.path.dirname(path)) else "no parent"
+
+    def resource_version(self, resource: str):
         try:
-            if operation == "read":
-                with open(path, "r", encoding="utf-8") as f:
-                    return f.read()
+            stat = os.stat(resource)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def execute(self, operation: str, path: str = None, content: str = None, **kwargs) -> str:
+        logger.info("Executing file system operation '%s' on path '%s'", operation, path)
+        try:
+            if operation == "read_many":
+                return self._read_many(kwargs.get("paths"))
+            elif operation == "write_many":
+                return self._write_many(kwargs.get("files"))
+            elif not path:
+                return f"Error: 'path' is required for '{operation}'."
+            elif operation == "read":
+                return self._read(path, **kwargs)
             elif operation == "write":
+                if content is None:
+                    return "Error: 'content' is required for 'write'."
                 with open(path, "w", encoding="utf-8") as f:
                     f.write(content)
                 return f"Successfully wrote to file: {path}"
             elif operation == "list":
-                return "\n".join(os.listdir(path))
+                return self._list(path, kwargs.get("depth"), kwargs.get("glob"), kwargs.get("max_entries"))
+            elif operation == "grep":
+                return self._grep(path, **kwargs)
+            elif operation == "stat":
+                return self._stat(path)
             elif operation == "delete":
                 os.remove(path)
                 return f"Successfully deleted file: {path}"
@@ -37,5 +169,131 @@ class FileSystemTool(BaseTool):
         except FileNotFoundError:
             return f"Error: Path not found: {path}"
         except Exception as e:
-            logger.error(f"File system tool error: {e}")
+            logger.error("File system tool error: %s", e)
             return f"Error during file system operation: {e}"
+
+    def _read(self, path: str, offset=None, length=None, start_line=None, end_line=None, max_bytes=None, **kwargs) -> str:
+        size = os.path.getsize(path)
+        if start_line is not None or end_line is not None:
+            return self._read_lines(path, int(start_line or 1), int(end_line) if end_line is not None else None)
+        if offset is not None or length is not None:
+            offset = max(0, int(offset or 0))
+            length = int(length) if length is not None else config.FILE_READ_MAX_BYTES
+            data = _read_bytes(path, offset, min(length, config.FILE_READ_MAX_BYTES))
+            return f"[bytes {offset}-{offset + len(data)} of {size}]\n{_decode(data)}"
+
+        max_bytes = max_bytes or config.FILE_READ_MAX_BYTES
+        if size <= max_bytes:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return f.read()
+        data = _decode(_read_bytes(path, 0, max_bytes))
+        return (
+            f"{data}\n[... file is {size} bytes, only the first {max_bytes} were read. "
+            "Use 'grep' or 'read' with 'start_line'/'end_line' or 'offset'/'length' for the rest.]"
+        )
+
+    def _read_lines(self, path: str, start_line: int, end_line: int | None) -> str:
+        start_line = max(1, start_line)
+        end_line = end_line if end_line is not None else start_line + config.FILE_READ_WINDOW_LINES - 1
+        if end_line < start_line:
+            return "Error: 'end_line' must not be smaller than 'start_line'."
+        end_line = min(end_line, start_line + config.FILE_READ_MAX_LINES - 1)
+        lines = []
+        with open(path, "rb") as f:
+            for number, line in enumerate(itertools.islice(f, start_line - 1, end_line), start=start_line):
+                text = _decode(line).rstrip("\r\n")
+                lines.append(f"{number}: {text}")
+        if not lines:
+            return f"[{path} has fewer than {start_line} lines]"
+        return f"[lines {start_line}-{start_line + len(lines) - 1} of {path}]\n" + "\n".join(lines)
+
+    def _list(self, path: str, depth=None, glob=None, max_entries=None) -> str:
+        if not os.path.isdir(path):
+            return f"Error: Not a directory: {path}"
+        depth = max(1, int(depth or 1))
+        max_entries = int(max_entries or config.FILE_LIST_MAX_ENTRIES)
+        lines, total = [], 0
+        for entry, is_dir in _walk(path, depth, glob):
+            total += 1
+            if len(lines) < max_entries:
+                name = os.path.relpath(entry.path, path).replace(os.sep, "/")
+                lines.append(name + "/" if is_dir else name)
+        if total > max_entries:
+            lines.append(f"[... {total - max_entries} more entries not shown; narrow the listing with 'glob' or 'depth']")
+        return "\n".join(lines) if lines else "(no matching entries)"
+
+    def _grep(self, path: str, pattern=None, glob=None, ignore_case=False, max_matches=None, **kwargs) -> str:
+        if not pattern:
+            return "Error: 'pattern' is required for 'grep'."
+        regex = re.compile(str(pattern), re.IGNORECASE if str(ignore_case).lower() == "true" else 0)
+        max_matches = int(max_matches or config.FILE_GREP_MAX_MATCHES)
+        if os.path.isdir(path):
+            files = (entry.path for entry, is_dir in _walk(path, config.FILE_GREP_MAX_DEPTH, glob) if not is_dir)
+        else:
+            files = iter([path])
+
+        matches, searched, truncated = [], 0, False
+        for file_path in files:
+            try:
+                if _is_binary(file_path):
+                    continue
+                searched += 1
+                with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                    for number, line in enumerate(f, start=1):
+                        if regex.search(line):
+                            if len(matches) >= max_matches:
+                                truncated = True
+                                break
+                            text = line.rstrip("\r\n")[:config.FILE_GREP_LINE_CHARS]
+                            matches.append(f"{os.path.relpath(file_path, path) if file_path != path else file_path}:{number}: {text}")
+            except OSError:
+                continue
+            if truncated:
+                break
+
+        if not matches:
+            return f"No matches for '{pattern}' in {searched} file(s)."
+        if truncated:
+            matches.append(f"[stopped after {max_matches} matches; refine 'pattern' or 'glob' to see others]")
+        return "\n".join(matches)
+
+    def _stat(self, path: str) -> str:
+        info = os.stat(path)
+        kind = "directory" if stat_module.S_ISDIR(info.st_mode) else "file" if stat_module.S_ISREG(info.st_mode) else "other"
+        modified = datetime.datetime.fromtimestamp(info.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+        return (
+            f"path: {os.path.abspath(path)}\ntype: {kind}\nsize: {info.st_size} bytes\n"
+            f"modified: {modified}\nmode: {stat_module.filemode(info.st_mode)}"
+        )
+
+    def _read_many(self, paths) -> str:
+        if not isinstance(paths, list) or not paths:
+            return "Error: 'paths' must be a non-empty list for 'read_many'."
+        parts = []
+        for path in paths[:config.FILE_BATCH_MAX_PATHS]:
+            try:
+                text = self._read(str(path), max_bytes=config.FILE_READ_MANY_MAX_BYTES)
+            except FileNotFoundError:
+                text = f"Error: Path not found: {path}"
+            except OSError as e:
+                text = f"Error: {e}"
+            parts.append(f"=== {path} ===\n{text}")
+        if len(paths) > config.FILE_BATCH_MAX_PATHS:
+            parts.append(f"[only the first {config.FILE_BATCH_MAX_PATHS} of {len(paths)} paths were read]")
+        return "\n".join(parts)
+
+    def _write_many(self, files) -> str:
+        if not isinstance(files, dict) or not files:
+            return "Error: 'files' must be a non-empty object of path to content for 'write_many'."
+        written, failed = [], []
+        for path, text in files.items():
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("" if text is None else str(text))
+                written.append(path)
+            except OSError as e:
+                failed.append(f"{path} ({e})")
+        result = f"Successfully wrote {len(written)} file(s): {', '.join(written)}" if written else ""
+        if failed:
+            result += ("\n" if result else "") + f"Error: could not write {len(failed)} file(s): {', '.join(failed)}"
+        return result
@@ -1,9 +1,19 @@
 from src.tools.base_tool import BaseTool
+from src.tools.feedback_channel import get_feedback_channel
+from src.config import config
 from src.utils.logger import get_logger
+from src.utils.task_context import current_task_id, task_can_suspend
 
 logger = get_logger(__name__)
 
 class HumanFeedbackTool(BaseTool):
+    tags = ("ask", "user", "human", "question", "clarify", "confirm", "help", "stuck")
+    parameters = {
+        "question": {"type": "string", "required": True},
+        "default": {"type": "string"},
+        "timeout": {"type": "number"},
+    }
+
     @property
     def name(self) -> str:
         return "human_feedback"
@@ -13,15 +23,31 @@ class HumanFeedbackTool(BaseTool):
         return (
             "Asks the human user for input or clarification. "
             "Use this when you are stuck or need more information. "
-            "Args: question (str)."
+            "Args: question (str), default (str, optional), timeout (int, optional, seconds). "
+            "If the user does not answer within the timeout, the 'default' answer is used."
         )
 
-    def execute(self, question: str) -> str:
-        logger.info(f"Asking user for feedback: '{question}'")
-        
-        print(f"\n--- AGENT REQUEST ---")
-        print(f"The agent is asking for your help: {question}")
-        answer = input("Your response: ")
-        
-        logger.info(f"User responded: '{answer}'")
-        return f"The user responded: '{answer}'"
+    def call_timeout(self, timeout: float = None, **kwargs) -> float | None:
+        if task_can_suspend.get():
+            return config.FEEDBACK_SUSPEND_AFTER + config.TOOL_TIMEOUT_GRACE
+        return (float(timeout) if timeout else config.FEEDBACK_TIMEOUT) + config.TOOL_TIMEOUT_GRACE
+
+    def execute(self, question: str, default: str = None, timeout: float = None) -> str:
+        logger.info("Asking user for feedback: '%s'", question)
+        channel = get_feedback_channel()
+        task_id = current_task_id.get()
+        asked = channel.ask(question, task_id, float(timeout) if timeout else None, default)
+
+        if task_can_suspend.get():
+            asked = channel.wait(asked.question_id, config.FEEDBACK_SUSPEND_AFTER)
+            if not asked.resolved:
+                channel.suspend(task_id, asked.question_id)
+                return (
+                    f"The question was sent to the user (id {asked.question_id}). The task is paused until they answer "
+                    f"or {asked.timeout:g}s pass; their answer will be the next observation."
+                )
+        else:
+            asked = channel.wait(asked.question_id)
+
+        logger.info("Question %s closed with status '%s': '%s'", asked.question_id, asked.status, asked.answer)
+        return asked.observation
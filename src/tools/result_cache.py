@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+class _CachedResult:
+    __slots__ = ("value", "expires_at", "resources", "versions")
+
+    def __init__(self, value: str, expires_at: float, resources: tuple[str, ...], versions: tuple[Any, ...]):
+        self.value = value
+        self.expires_at = expires_at
+        self.resources = resources
+        self.versions = versions
+
+def _resource_matches(pattern: str, resource: str) -> bool:
+    if pattern.endswith("*"):
+        return resource.startswith(pattern[:-1])
+    return pattern == resource
+
+class ToolResultCache:
+    def __init__(self, max_entries: int = 256, default_ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: OrderedDict[tuple[str, str], _CachedResult] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "evictions": 0, "stale": 0}
+
+    @staticmethod
+    def make_key(tool_name: str, args: dict) -> tuple[str, str]:
+        return tool_name, json.dumps(args, sort_keys=True, default=str)
+
+    def get(self, key: tuple[str, str], tool) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            versions = tuple(tool.resource_version(resource) for resource in entry.resources)
+            if time.monotonic() > entry.expires_at or versions != entry.versions:
+                del self._entries[key]
+                self.stats["stale"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry.value
+
+    def put(self, key: tuple[str, str], value: str, tool, resources: tuple[str, ...], ttl: float | None = None):
+        versions = tuple(tool.resource_version(resource) for resource in resources)
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._entries[key] = _CachedResult(value, expires_at, resources, versions)
+            self._entries.move_to_end(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, resources: tuple[str, ...]):
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if any(_resource_matches(pattern, resource) or _resource_matches(resource, pattern)
+                       for pattern in resources for resource in entry.resources)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.stats["invalidations"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self.stats:
+                self.stats[name] = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                "executions_avoided": self.stats["hits"],
+            }
@@ -0,0 +1,220 @@
+import codecs
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Iterator
+
+IS_WINDOWS = os.name == "nt"
+
+class BoundedCapture:
+    def __init__(self, head_chars: int, tail_chars: int):
+        self.head_chars = head_chars
+        self.head: list[str] = []
+        self._head_size = 0
+        self.tail: deque[str] = deque(maxlen=tail_chars)
+        self.total = 0
+
+    def write(self, text: str):
+        self.total += len(text)
+        if self._head_size < self.head_chars:
+            take = text[:self.head_chars - self._head_size]
+            self.head.append(take)
+            self._head_size += len(take)
+            text = text[len(take):]
+        if text:
+            self.tail.extend(text)
+
+    def render(self) -> str:
+        head = "".join(self.head)
+        tail = "".join(self.tail)
+        omitted = self.total - len(head) - len(tail)
+        if omitted > 0:
+            return f"{head}\n[... {omitted} chars omitted ...]\n{tail}"
+        return head + tail
+
+def _process_group_kwargs() -> dict:
+    if IS_WINDOWS:
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+def kill_process_tree(process: subprocess.Popen):
+    if process.poll() is not None:
+        return
+    try:
+        if IS_WINDOWS:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True, check=False)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        process.kill()
+
+def _pump(stream, name: str, chunks: queue.Queue):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while True:
+            data = stream.read1(65536)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                chunks.put((name, text))
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            chunks.put((name, tail))
+    except (OSError, ValueError):
+        pass
+    finally:
+        chunks.put((name, None))
+
+class CommandRun:
+    def __init__(self, command: str):
+        self.command = command
+        self.process: subprocess.Popen | None = None
+        self.exit_code: int | None = None
+        self.timed_out = False
+        self.cancelled = False
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self.cancelled = True
+        self._cancel.set()
+        if self.process:
+            kill_process_tree(self.process)
+
+    def stream(self, timeout: float | None = None) -> Iterator[tuple[str, str]]:
+        self.process = subprocess.Popen(
+            self.command,
+            shell=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **_process_group_kwargs(),
+        )
+        chunks: queue.Queue = queue.Queue()
+        for name, pipe in (("stdout", self.process.stdout), ("stderr", self.process.stderr)):
+            threading.Thread(target=_pump, args=(pipe, name, chunks), daemon=True).start()
+
+        deadline = time.monotonic() + timeout if timeout else None
+        open_streams = 2
+        try:
+            while open_streams:
+                if self._cancel.is_set():
+                    break
+                remaining = deadline - time.monotonic() if deadline else 0.5
+                if remaining <= 0:
+                    self.timed_out = True
+                    break
+                try:
+                    name, text = chunks.get(timeout=min(remaining, 0.5))
+                except queue.Empty:
+                    continue
+                if text is None:
+                    open_streams -= 1
+                else:
+                    yield name, text
+        finally:
+            if self.timed_out or self._cancel.is_set() or open_streams:
+                kill_process_tree(self.process)
+            try:
+                self.exit_code = self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.exit_code = self.process.wait()
+            self.process.stdout.close()
+            self.process.stderr.close()
+
+class ShellSession:
+    def __init__(self, name: str, cwd: str | None = None):
+        self.name = name
+        self.cwd = cwd
+        self.process: subprocess.Popen | None = None
+        self._chunks: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def _start(self):
+        if IS_WINDOWS:
+            argv = ["cmd.exe", "/Q"]
+        else:
+            argv = ["/bin/bash", "--noprofile", "--norc"] if os.path.exists("/bin/bash") else ["/bin/sh"]
+        self.process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=self.cwd if self.cwd and os.path.isdir(self.cwd) else None,
+            **_process_group_kwargs(),
+        )
+        self._chunks = queue.Queue()
+        threading.Thread(target=_pump, args=(self.process.stdout, "output", self._chunks), daemon=True).start()
+
+    def _script(self, command: str, marker: str) -> str:
+        if IS_WINDOWS:
+            return f"{command} < NUL\r\necho {marker} %errorlevel% %cd%\r\n"
+        return f"{{\n{command}\n}} < /dev/null\nprintf '\\n{marker} %s %s\\n' \"$?\" \"$PWD\"\n"
+
+    def run(self, command: str, capture: BoundedCapture, timeout: float | None = None) -> tuple[int | None, bool]:
+        with self._lock:
+            if not self.is_alive:
+                self._start()
+            marker = f"__AGENT_DONE_{uuid.uuid4().hex}__"
+            self.process.stdin.write(self._script(command, marker).encode("utf-8"))
+            self.process.stdin.flush()
+
+            deadline = time.monotonic() + timeout if timeout else None
+            pending = ""
+            while True:
+                remaining = deadline - time.monotonic() if deadline else 0.5
+                if remaining <= 0:
+                    capture.write(pending)
+                    self.close()
+                    return None, True
+                try:
+                    _, text = self._chunks.get(timeout=min(remaining, 0.5))
+                except queue.Empty:
+                    continue
+                if text is None:
+                    capture.write(pending)
+                    self.close()
+                    return None, False
+                pending += text
+                index = pending.find(marker)
+                if index != -1:
+                    end = pending.find("\n", index)
+                    if end == -1:
+                        continue
+                    capture.write(pending[:index].rstrip("\r\n"))
+                    status, _, cwd = pending[index + len(marker):end].strip().partition(" ")
+                    self.cwd = cwd or self.cwd
+                    return (int(status) if status.lstrip("-").isdigit() else None), False
+                keep = len(marker) + 16
+                if len(pending) > keep:
+                    capture.write(pending[:-keep])
+                    pending = pending[-keep:]
+
+    def close(self):
+        if self.process is None:
+            return
+        kill_process_tree(self.process)
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        self.process = None
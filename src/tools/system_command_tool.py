@@ -1,10 +1,25 @@
-import subprocess
-from src.tools.base_tool import BaseTool
+import threading
+from src.tools.base_tool import BaseTool, ToolCallPolicy
+from src.tools.shell_session import BoundedCapture, CommandRun, ShellSession
+from src.config import config
 from src.utils.logger import get_logger
+from src.utils.task_context import current_task_id
 
 logger = get_logger(__name__)
 
 class SystemCommandTool(BaseTool):
+    tags = ("command", "shell", "terminal", "cmd", "powershell", "run", "execute", "process", "program", "install", "script", "start", "open")
+    parameters = {
+        "command": {"type": "string", "required": True},
+        "timeout": {"type": "number"},
+        "session": {"type": "string"},
+    }
+
+    def __init__(self):
+        self.sessions: dict[tuple[str, str], ShellSession] = {}
+        self._active_runs: dict[CommandRun, str] = {}
+        self._lock = threading.Lock()
+
     @property
     def name(self) -> str:
         return "system_command"
@@ -13,33 +28,126 @@ class SystemCommandTool(BaseTool):
     def description(self) -> str:
         return (
             "Executes a command in the Windows shell. "
-            "Args: command (str). "
-            "Returns the standard output and standard error."
+            "Args: command (str), timeout (int, optional, seconds), session (str, optional). "
+            "Returns the standard output and standard error. "
+            "Long outputs are shortened to their beginning and end. "
+            "Pass the same 'session' name to run commands in a persistent shell that keeps "
+            "the working directory and environment between calls; run 'exit' in a session to close it."
+        )
+
+    def call_policy(self, **kwargs) -> ToolCallPolicy | None:
+        return ToolCallPolicy(ToolCallPolicy.MUTATING, ("*",), idempotent=False)
+
+    def call_timeout(self, timeout: float = None, **kwargs) -> float | None:
+        return (float(timeout) if timeout else config.SYSTEM_COMMAND_TIMEOUT) + config.TOOL_TIMEOUT_GRACE
+
+    def session_state(self, task_id: str) -> dict | None:
+        with self._lock:
+            sessions = {name: session.cwd for (owner, name), session in self.sessions.items() if owner == task_id}
+        return {"sessions": sessions} if sessions else None
+
+    def restore_session(self, task_id: str, state: dict) -> str | None:
+        restored = []
+        with self._lock:
+            for name, cwd in (state.get("sessions") or {}).items():
+                if (task_id, name) not in self.sessions:
+                    self.sessions[(task_id, name)] = ShellSession(name, cwd)
+                    restored.append(f"'{name}' ({cwd or 'default directory'})")
+        if not restored:
+            return None
+        return (
+            f"Shell sessions {', '.join(restored)} were restarted in their last working directory; "
+            "environment variables set before the restart are lost."
         )
 
-    def execute(self, command: str) -> str:
-        logger.info(f"Executing system command: '{command}'")
+    def _new_capture(self) -> BoundedCapture:
+        return BoundedCapture(config.SYSTEM_COMMAND_HEAD_CHARS, config.SYSTEM_COMMAND_TAIL_CHARS)
+
+    def _run_in_session(self, command: str, session_name: str, timeout: float) -> str:
+        key = (current_task_id.get(), session_name)
+        with self._lock:
+            session = self.sessions.get(key)
+            if command.strip().lower() in ("exit", "logout"):
+                if session:
+                    session.close()
+                    del self.sessions[key]
+                    return f"Shell session '{session_name}' closed."
+                return f"Shell session '{session_name}' is not open."
+            if session is None:
+                session = self.sessions[key] = ShellSession(session_name)
+
+        output = self._new_capture()
+        exit_code, timed_out = session.run(command, output, timeout)
+        result = f"OUTPUT:\n{output.render()}\n" if output.total else ""
+        if timed_out:
+            result += f"Command timed out after {timeout}s; shell session '{session_name}' was restarted.\n"
+        elif exit_code is None:
+            result += f"Shell session '{session_name}' exited.\n"
+        elif exit_code != 0:
+            result += f"Exit code: {exit_code}\n"
+        return result or "Command executed with no output."
+
+    def _run_command(self, command: str, timeout: float) -> str:
+        run = CommandRun(command)
+        captures = {"stdout": self._new_capture(), "stderr": self._new_capture()}
+        with self._lock:
+            self._active_runs[run] = current_task_id.get()
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-                encoding='utf-8'
-            )
-            
-            output = ""
-            if result.stdout:
-                output += f"STDOUT:\n{result.stdout}\n"
-            if result.stderr:
-                output += f"STDERR:\n{result.stderr}\n"
-            
-            if not output:
-                return "Command executed with no output."
-                
-            return output
+            for stream_name, text in run.stream(timeout):
+                captures[stream_name].write(text)
+        finally:
+            with self._lock:
+                self._active_runs.pop(run, None)
+
+        output = ""
+        if captures["stdout"].total:
+            output += f"STDOUT:\n{captures['stdout'].render()}\n"
+        if captures["stderr"].total:
+            output += f"STDERR:\n{captures['stderr'].render()}\n"
+        if run.timed_out:
+            output += f"Command timed out after {timeout}s and was terminated.\n"
+        elif run.cancelled:
+            output += "Command was cancelled.\n"
+
+        if not output:
+            return "Command executed with no output."
 
+        return output
+
+    def execute(self, command: str, timeout: float = None, session: str = None) -> str:
+        logger.info("Executing system command: '%s'", command)
+        timeout = float(timeout) if timeout else config.SYSTEM_COMMAND_TIMEOUT
+        try:
+            if session:
+                return self._run_in_session(command, str(session), timeout)
+            return self._run_command(command, timeout)
         except Exception as e:
-            logger.error(f"System command tool error: {e}")
+            logger.error("System command tool error: %s", e)
             return f"Error executing command '{command}': {e}"
+
+    def cancel(self, task_id: str = None):
+        with self._lock:
+            runs = [run for run, owner in self._active_runs.items() if task_id is None or owner == task_id]
+            sessions = [session for (owner, _), session in self.sessions.items() if task_id is None or owner == task_id]
+        for run in runs:
+            run.cancel()
+        for session in sessions:
+            if session.busy:
+                session.close()
+
+    def release_task(self, task_id: str):
+        with self._lock:
+            keys = [key for key in self.sessions if key[0] == task_id]
+            sessions = [self.sessions.pop(key) for key in keys]
+        for session in sessions:
+            session.close()
+
+    def close(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def shutdown(self):
+        self.close()
@@ -1,40 +1,400 @@
+import contextvars
+import importlib
 import inspect
 import pkgutil
-from src.tools.base_tool import BaseTool
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from src.tools.base_tool import BaseTool, ToolCallPolicy, normalize_parameters, validate_parameters
+from src.tools.result_cache import ToolResultCache
+from src.tools.tool_manifest import ToolSpec, scan_package
+from src.tools.tool_worker import ToolWorkerPool
+from src.config import config
 from src.utils.logger import get_logger
+from src.utils.task_context import current_task_id
+from src.utils.tracing import get_tracer
 
 logger = get_logger(__name__)
 
 class ToolManager:
     def __init__(self, tool_package):
-        self.tools = self._discover_tools(tool_package)
+        self.tools: dict[str, BaseTool] = {}
+        self.tool_specs: dict[str, ToolSpec] = {}
+        self.import_profile: dict[str, float] = {}
+        self._load_lock = threading.RLock()
+        self._unavailable: set[str] = set()
+
+        started = time.perf_counter()
+        if config.TOOL_DISCOVERY == "lazy":
+            self._register_tool_specs(tool_package)
+        else:
+            self.tools = self._discover_tools(tool_package)
+            for tool in self.tools.values():
+                self.tool_specs[tool.name] = ToolSpec.from_tool(tool)
+        self.import_profile["discovery"] = time.perf_counter() - started
+        logger.info(
+            "Registered %s tools (%s discovery) in %.1f ms.",
+            len(self.tool_specs), config.TOOL_DISCOVERY, self.import_profile["discovery"] * 1000,
+        )
+
         self.tool_prompt = self._build_tool_prompt()
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._limits: dict[str, threading.Semaphore] = {}
+        self._result_caches: dict[str, ToolResultCache] = {}
+        self.workers = ToolWorkerPool(config.TOOL_MAX_WORKERS, config.TOOL_MAX_STUCK_WORKERS)
+        self.restarts: dict[str, int] = {}
+
+    def _register_tool_specs(self, package):
+        logger.info("Reading tool metadata in package: %s", package.__name__)
+        specs, unresolved = scan_package(package)
+        for spec in specs:
+            missing = spec.missing_requirements()
+            if missing:
+                logger.warning("Could not load tool '%s' due to missing dependency: %s", spec.name, ', '.join(missing))
+                logger.warning("Please install the required packages to enable this tool.")
+                continue
+            self.tool_specs[spec.name] = spec
+        for module_name in unresolved:
+            logger.info("Tool metadata in '%s' is not static, importing it.", module_name)
+            tools = self._import_tools(module_name)
+            self.tools.update(tools)
+            for tool in tools.values():
+                self.tool_specs[tool.name] = ToolSpec.from_tool(tool, module_name)
+
+    def _import_tools(self, module_name: str) -> dict[str, BaseTool]:
+        tools = {}
+        try:
+            module = __import__(module_name, fromlist=["*"])
+            for member_name, member_obj in inspect.getmembers(module):
+                if (
+                    inspect.isclass(member_obj)
+                    and issubclass(member_obj, BaseTool)
+                    and member_obj is not BaseTool
+                ):
+                    instance = member_obj()
+                    tools[instance.name] = instance
+                    logger.info("Successfully loaded tool: %s", instance.name)
+        except ImportError as e:
+            logger.warning("Could not load tool from module '%s' due to missing dependency: %s", module_name.rsplit('.', 1)[-1], e)
+            logger.warning("Please install the required packages to enable this tool.")
+        return tools
 
     def _discover_tools(self, package) -> dict[str, BaseTool]:
         tools = {}
-        logger.info(f"Discovering tools in package: {package.__name__}")
+        logger.info("Discovering tools in package: %s", package.__name__)
         for _, name, _ in pkgutil.iter_modules(package.__path__):
-            try:
-                module = __import__(f"{package.__name__}.{name}", fromlist=["*"])
-                for member_name, member_obj in inspect.getmembers(module):
-                    if (
-                        inspect.isclass(member_obj)
-                        and issubclass(member_obj, BaseTool)
-                        and member_obj is not BaseTool
-                    ):
-                        instance = member_obj()
-                        tools[instance.name] = instance
-                        logger.info(f"Successfully loaded tool: {instance.name}")
-            except ImportError as e:
-                logger.warning(f"Could not load tool from module '{name}' due to missing dependency: {e}")
-                logger.warning("Please install the required packages to enable this tool.")
+            tools.update(self._import_tools(f"{package.__name__}.{name}"))
         return tools
 
     def _build_tool_prompt(self) -> str:
         prompt = "You have access to the following tools:\n"
-        for name, tool in self.tools.items():
-            prompt += f"- {name}: {tool.description}\n"
+        for name, spec in self.tool_specs.items():
+            prompt += f"- {name}: {spec.description}\n"
         return prompt
 
+    def _load_tool(self, spec: ToolSpec) -> BaseTool | None:
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(spec.module)
+            tool = getattr(module, spec.class_name)()
+        except ImportError as e:
+            logger.warning("Could not load tool '%s' due to missing dependency: %s", spec.name, e)
+            logger.warning("Please install the required packages to enable this tool.")
+            self._unavailable.add(spec.name)
+            return None
+        elapsed = time.perf_counter() - started
+        self.import_profile[spec.name] = elapsed
+        logger.info("Loaded tool '%s' on first use in %.1f ms.", spec.name, elapsed * 1000)
+        return tool
+
     def get_tool(self, name: str) -> BaseTool | None:
-        return self.tools.get(name)
+        tool = self.tools.get(name)
+        if tool is not None or name in self._unavailable:
+            return tool
+        spec = self.tool_specs.get(name)
+        if spec is None:
+            return None
+        with self._load_lock:
+            if name not in self.tools and name not in self._unavailable:
+                tool = self._load_tool(spec)
+                if tool is not None:
+                    self.tools[name] = tool
+            return self.tools.get(name)
+
+    def startup_profile(self) -> dict[str, float]:
+        return {name: round(seconds * 1000, 2) for name, seconds in self.import_profile.items()}
+
+    def _get_limit(self, name: str, tool: BaseTool) -> threading.Semaphore | None:
+        if not tool.max_concurrency:
+            return None
+        with self._executor_lock:
+            if name not in self._limits:
+                self._limits[name] = threading.Semaphore(tool.max_concurrency)
+            return self._limits[name]
+
+    def validate_call(self, name: str, args) -> str | None:
+        if not isinstance(args, dict):
+            return f"'args' for tool '{name}' must be a JSON object."
+        spec = self.tool_specs.get(name)
+        if spec is None and name not in self.tools:
+            return f"Tool '{name}' does not exist. Available tools: {', '.join(self.tool_specs)}."
+        if spec is not None and spec.parameters is not None:
+            problem = validate_parameters(spec.parameters, args)
+            return f"Invalid arguments for tool '{name}': {problem}." if problem else None
+        tool = self.get_tool(name)
+        if tool is None:
+            return None
+        problem = tool.validate_args(args)
+        return f"Invalid arguments for tool '{name}': {problem}." if problem else None
+
+    def execute_tool(self, name: str, args: dict) -> str:
+        with get_tracer().span("tool.execute", tool=name) as span:
+            result, outcome = self._execute_tool(name, args)
+            span.set(outcome=outcome, result_chars=len(result))
+            if outcome in ("error", "timeout", "unavailable", "not_found"):
+                span.fail(result[:200])
+            return result
+
+    def _execute_tool(self, name: str, args: dict) -> tuple[str, str]:
+        tool = self.get_tool(name)
+        if not tool and name in self._unavailable:
+            return f"Error: Tool '{name}' is unavailable because its dependencies could not be loaded.", "unavailable"
+        if not tool:
+            return f"Error: Tool '{name}' not found.", "not_found"
+        if tool.parameters is not None:
+            normalized, problem = normalize_parameters(tool.parameters, args)
+            if problem is None:
+                args = normalized
+
+        policy = self._call_policy(tool, args)
+        cache_key = ToolResultCache.make_key(name, args)
+        if policy and policy.kind == ToolCallPolicy.CACHEABLE:
+            cached = self.result_cache.get(cache_key, tool)
+            if cached is not None:
+                logger.info("Reusing cached result for %s(%s).", name, args)
+                return cached, "cached"
+
+        result, outcome = self._run_supervised(name, tool, args)
+        if policy and policy.kind == ToolCallPolicy.MUTATING:
+            for cache in list(self._result_caches.values()):
+                cache.invalidate(policy.resources)
+        elif policy and policy.kind == ToolCallPolicy.CACHEABLE and not result.startswith("Error"):
+            self.result_cache.put(cache_key, result, tool, policy.resources, policy.ttl)
+        return result, outcome
+
+    def _call_timeout(self, tool: BaseTool, args: dict) -> float | None:
+        try:
+            timeout = tool.call_timeout(**args)
+        except Exception as e:
+            logger.debug("Could not compute a timeout for '%s': %s", tool.name, e)
+            timeout = tool.timeout
+        return config.TOOL_DEFAULT_TIMEOUT if timeout is None else timeout
+
+    def _run_supervised(self, name: str, tool: BaseTool, args: dict) -> tuple[str, str]:
+        timeout = self._call_timeout(tool, args) if config.TOOL_TIMEOUTS_ENABLED else 0
+        deadline = time.monotonic() + timeout if timeout else None
+        limit = self._get_limit(name, tool)
+        if limit and not limit.acquire(timeout=timeout or -1):
+            return (
+                f"Error: Tool '{name}' timed out after {timeout:g}s waiting for an earlier call to finish. "
+                "It is still busy; try again later or use a different approach."
+            ), "timeout"
+
+        def run():
+            try:
+                return str(tool.execute(**args))
+            except Exception as e:
+                return f"Error executing tool '{name}': {e}"
+            finally:
+                if limit:
+                    limit.release()
+
+        if not timeout:
+            return self._finish(run())
+        try:
+            future, worker = self.workers.submit(run)
+        except RuntimeError as e:
+            if limit:
+                limit.release()
+            return f"Error: Tool '{name}' could not be started: {e}.", "error"
+        wait([future], timeout=max(0.0, deadline - time.monotonic()))
+        if future.done() or not self.workers.abandon(worker, future):
+            error = future.exception()
+            return self._finish(f"Error: Tool '{name}' crashed: {error!r}" if error else future.result())
+
+        logger.warning("Tool '%s' timed out after %ss, cancelling it.", name, timeout)
+        self._cancel(name, tool, current_task_id.get())
+        return (
+            f"Error: Tool '{name}' timed out after {timeout:g}s and was cancelled. "
+            "The call may have partly completed; check the current state before retrying it, "
+            "or try a different approach."
+        ), "timeout"
+
+    @staticmethod
+    def _finish(result: str) -> tuple[str, str]:
+        return result, "error" if result.startswith("Error") else "ok"
+
+    def _cancel(self, name: str, tool: BaseTool, task_id: str):
+        def cancel():
+            try:
+                tool.cancel(task_id)
+            except Exception as e:
+                logger.warning("Tool '%s' failed to cancel a timed out call: %s", name, e)
+            if tool.restart_on_timeout:
+                self._restart(name, tool)
+
+        threading.Thread(target=cancel, name=f"tool-cancel-{name}", daemon=True).start()
+
+    def _restart(self, name: str, tool: BaseTool):
+        with self._load_lock:
+            if self.tools.get(name) is not tool or name not in self.tool_specs:
+                return
+            del self.tools[name]
+            with self._executor_lock:
+                self._limits.pop(name, None)
+            self.restarts[name] = self.restarts.get(name, 0) + 1
+        logger.warning("Restarting tool '%s'; the next call gets a fresh instance.", name)
+        try:
+            tool.shutdown()
+        except Exception as e:
+            logger.warning("Tool '%s' failed to shut down: %s", name, e)
+
+    def worker_stats(self) -> dict:
+        return dict(self.workers.snapshot(), restarts=dict(self.restarts))
+
+    def _call_policy(self, tool: BaseTool, args: dict) -> ToolCallPolicy | None:
+        if not config.TOOL_CACHE_ENABLED:
+            return None
+        try:
+            return tool.call_policy(**args)
+        except Exception as e:
+            logger.debug("Could not classify call to '%s': %s", tool.name, e)
+            return None
+
+    def is_idempotent(self, name: str, args: dict) -> bool:
+        tool = self.get_tool(name)
+        if tool is None:
+            return True
+        try:
+            policy = tool.call_policy(**args)
+        except Exception:
+            return False
+        return policy is None or policy.idempotent
+
+    def is_replayable(self, name: str, args: dict) -> bool:
+        tool = self.get_tool(name)
+        if tool is None:
+            return True
+        try:
+            policy = tool.call_policy(**args)
+        except Exception:
+            return False
+        return policy is None or (policy.kind != ToolCallPolicy.MUTATING and policy.idempotent)
+
+    def replay_precondition(self, name: str, args: dict) -> str | None:
+        tool = self.get_tool(name)
+        if tool is None:
+            return None
+        try:
+            return tool.replay_precondition(**args)
+        except Exception as e:
+            logger.debug("Could not check the replay precondition of '%s': %s", name, e)
+            return None
+
+    def session_state(self, names, task_id: str) -> dict[str, dict]:
+        states = {}
+        for name in names:
+            tool = self.tools.get(name)
+            if tool is None:
+                continue
+            try:
+                state = tool.session_state(task_id)
+            except Exception as e:
+                logger.warning("Tool '%s' failed to report its session state: %s", name, e)
+                continue
+            if state:
+                states[name] = state
+        return states
+
+    def restore_sessions(self, states: dict[str, dict], task_id: str) -> list[str]:
+        notes = []
+        for name, state in states.items():
+            tool = self.get_tool(name)
+            if tool is None:
+                continue
+            try:
+                note = tool.restore_session(task_id, state)
+            except Exception as e:
+                note = f"The session of tool '{name}' could not be restored: {e}"
+            if note:
+                notes.append(note)
+        return notes
+
+    @property
+    def result_cache(self) -> ToolResultCache:
+        task_id = current_task_id.get()
+        cache = self._result_caches.get(task_id)
+        if cache is None:
+            with self._executor_lock:
+                cache = self._result_caches.setdefault(
+                    task_id, ToolResultCache(config.TOOL_CACHE_MAX_ENTRIES, config.TOOL_CACHE_TTL)
+                )
+        return cache
+
+    def cache_stats(self) -> dict:
+        return self.result_cache.snapshot()
+
+    def reset_task_state(self):
+        self.result_cache.clear()
+
+    def execute_many(self, calls: list[tuple[str, dict]]) -> list[str]:
+        if len(calls) <= 1:
+            return [self.execute_tool(name, args) for name, args in calls]
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=config.TOOL_MAX_WORKERS, thread_name_prefix="tool")
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, self.execute_tool, name, args)
+            for name, args in calls
+        ]
+        return [future.result() for future in futures]
+
+    def warm_up(self, names: list[str]) -> threading.Thread:
+        def warm():
+            for name in names:
+                if name not in self.tool_specs:
+                    continue
+                tool = self.get_tool(name)
+                if tool is None:
+                    continue
+                try:
+                    tool.warm_up()
+                except Exception as e:
+                    logger.warning("Warm-up of tool '%s' failed: %s", name, e)
+            logger.info("Startup import profile (ms): %s", self.startup_profile())
+
+        thread = threading.Thread(target=warm, name="tool-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def end_task(self, task_id: str):
+        with self._executor_lock:
+            self._result_caches.pop(task_id, None)
+        for name, tool in list(self.tools.items()):
+            try:
+                tool.release_task(task_id)
+            except Exception as e:
+                logger.warning("Tool '%s' failed to release task resources: %s", name, e)
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.workers.shutdown()
+        for name, tool in list(self.tools.items()):
+            try:
+                tool.shutdown()
+            except Exception as e:
+                logger.warning("Tool '%s' failed to shut down: %s", name, e)
@@ -0,0 +1,112 @@
+import ast
+import importlib.util
+import pkgutil
+from typing import Any
+
+class ToolSpec:
+    __slots__ = ("name", "description", "module", "class_name", "attributes", "requires")
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        module: str,
+        class_name: str,
+        attributes: dict[str, Any] | None = None,
+        requires: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.description = description
+        self.module = module
+        self.class_name = class_name
+        self.attributes = attributes or {}
+        self.requires = requires
+
+    @property
+    def tags(self) -> tuple[str, ...]:
+        return tuple(self.attributes.get("tags") or ())
+
+    @property
+    def parameters(self) -> dict[str, dict] | None:
+        return self.attributes.get("parameters")
+
+    @property
+    def summary(self) -> str:
+        return self.description.split(". ")[0].rstrip(".") + "."
+
+    @classmethod
+    def from_tool(cls, tool, module: str | None = None) -> "ToolSpec":
+        attributes = {"tags": tuple(tool.tags), "parameters": tool.parameters}
+        return cls(tool.name, tool.description, module or type(tool).__module__, type(tool).__name__, attributes)
+
+    def missing_requirements(self) -> list[str]:
+        return [name for name in self.requires if importlib.util.find_spec(name) is None]
+
+    def __repr__(self) -> str:
+        return f"ToolSpec(name={self.name!r}, module={self.module!r}, class_name={self.class_name!r})"
+
+def _literal_members(class_node: ast.ClassDef) -> dict[str, Any]:
+    members = {}
+    for item in class_node.body:
+        try:
+            if isinstance(item, ast.Assign) and len(item.targets) == 1 and isinstance(item.targets[0], ast.Name):
+                members[item.targets[0].id] = ast.literal_eval(item.value)
+            elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name) and item.value is not None:
+                members[item.target.id] = ast.literal_eval(item.value)
+            elif isinstance(item, ast.FunctionDef) and any(
+                isinstance(d, ast.Name) and d.id == "property" for d in item.decorator_list
+            ):
+                returns = [stmt for stmt in item.body if isinstance(stmt, ast.Return)]
+                if len(returns) == 1 and returns[0].value is not None:
+                    members[item.name] = ast.literal_eval(returns[0].value)
+        except ValueError:
+            continue
+    return members
+
+def _is_tool_class(node: ast.ClassDef) -> bool:
+    for base in node.bases:
+        if isinstance(base, ast.Name) and base.id == "BaseTool":
+            return True
+        if isinstance(base, ast.Attribute) and base.attr == "BaseTool":
+            return True
+    return False
+
+def _top_level_imports(tree: ast.Module) -> tuple[str, ...]:
+    roots = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            roots.extend(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            roots.append(node.module.split(".")[0])
+    return tuple(dict.fromkeys(root for root in roots if root != "src"))
+
+def read_module_specs(module_name: str) -> list[ToolSpec] | None:
+    module_spec = importlib.util.find_spec(module_name)
+    if module_spec is None or not module_spec.origin or not module_spec.origin.endswith(".py"):
+        return None
+    with open(module_spec.origin, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=module_spec.origin)
+
+    specs = []
+    requires = _top_level_imports(tree)
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or not _is_tool_class(node):
+            continue
+        members = _literal_members(node)
+        name, description = members.pop("name", None), members.pop("description", None)
+        if not isinstance(name, str) or not isinstance(description, str):
+            return None
+        declared = members.pop("requires", None)
+        specs.append(ToolSpec(name, description, module_name, node.name, members, tuple(declared) if declared else requires))
+    return specs
+
+def scan_package(package) -> tuple[list[ToolSpec], list[str]]:
+    specs, unresolved = [], []
+    for _, name, _ in pkgutil.iter_modules(package.__path__):
+        module_name = f"{package.__name__}.{name}"
+        module_specs = read_module_specs(module_name)
+        if module_specs is None:
+            unresolved.append(module_name)
+        else:
+            specs.extend(module_specs)
+    return specs, unresolved
@@ -0,0 +1,97 @@
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ToolWorker:
+    def __init__(self, pool: "ToolWorkerPool", index: int):
+        self.pool = pool
+        self.abandoned = False
+        self._inbox: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"tool-worker-{index}", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, future: Future):
+        self._inbox.put((fn, future))
+
+    def stop(self):
+        self._inbox.put(None)
+
+    def _run(self):
+        while True:
+            job = self._inbox.get()
+            if job is None:
+                return
+            fn, future = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn())
+                except BaseException as e:
+                    future.set_exception(e)
+            if not self.pool._finished(self):
+                return
+
+class ToolWorkerPool:
+    def __init__(self, max_idle: int, max_abandoned: int):
+        self.max_idle = max_idle
+        self.max_abandoned = max_abandoned
+        self._idle: list[ToolWorker] = []
+        self._abandoned: set[ToolWorker] = set()
+        self._lock = threading.Lock()
+        self._started = 0
+        self._closed = False
+        self.stats = {"calls": 0, "workers_started": 0, "abandoned": 0, "recovered": 0}
+
+    def submit(self, fn, *args) -> tuple[Future, ToolWorker]:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("the tool worker pool is shut down")
+            if len(self._abandoned) >= self.max_abandoned:
+                raise RuntimeError(f"{len(self._abandoned)} earlier tool calls are still stuck")
+            worker = self._idle.pop() if self._idle else None
+            if worker is None:
+                self._started += 1
+                index = self._started
+                self.stats["workers_started"] += 1
+            self.stats["calls"] += 1
+        if worker is None:
+            worker = ToolWorker(self, index)
+        context = contextvars.copy_context()
+        worker.submit(lambda: context.run(fn, *args), future)
+        return future, worker
+
+    def abandon(self, worker: ToolWorker, future: Future) -> bool:
+        with self._lock:
+            if future.done() or worker.abandoned:
+                return False
+            worker.abandoned = True
+            self._abandoned.add(worker)
+            self.stats["abandoned"] += 1
+        logger.warning("Abandoned tool worker '%s'; a fresh worker will serve the next call.", worker._thread.name)
+        return True
+
+    def _finished(self, worker: ToolWorker) -> bool:
+        with self._lock:
+            if worker.abandoned:
+                self._abandoned.discard(worker)
+                self.stats["recovered"] += 1
+                return False
+            if self._closed or len(self._idle) >= self.max_idle:
+                return False
+            self._idle.append(worker)
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats, idle=len(self._idle), stuck=len(self._abandoned))
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
@@ -1,11 +1,47 @@
-from pywinauto.application import Application
-from pywinauto import Desktop
-from src.tools.base_tool import BaseTool
+import threading
+import time
+from src.tools.base_tool import BaseTool, ToolCallPolicy
+from src.tools.ui_backends import ControlNode, PywinautoBackend, UIBackend
+from src.config import config
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+class _TreeSnapshot:
+    __slots__ = ("window", "signature", "foreground", "depth", "tree", "taken_at")
+
+    def __init__(self, window, signature, foreground, depth: int, tree: ControlNode):
+        self.window = window
+        self.signature = signature
+        self.foreground = foreground
+        self.depth = depth
+        self.tree = tree
+        self.taken_at = time.monotonic()
+
 class UIAutomationTool(BaseTool):
+    max_concurrency = 1
+    timeout = 60
+    restart_on_timeout = True
+    requires = ("pywinauto",)
+    tags = ("window", "desktop", "application", "app", "gui", "ui", "dialog", "button", "control", "click", "menu")
+    parameters = {
+        "operation": {"type": "string", "required": True, "enum": ["list_windows", "get_controls", "click_control"]},
+        "window_title": {"type": "string"},
+        "depth": {"type": "integer"},
+        "control_type": {"type": "string"},
+        "name": {"type": "string"},
+        "diff": {"type": "boolean"},
+        "control_specifier": {"type": "string"},
+    }
+
+    def __init__(self, backend: UIBackend | None = None):
+        self.backend = backend or PywinautoBackend()
+        self._windows: dict[str, object] = {}
+        self._snapshots: dict[object, _TreeSnapshot] = {}
+        self._last_listing: dict[object, list[str]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"tree_walks": 0, "tree_hits": 0}
+
     @property
     def name(self) -> str:
         return "ui_automation"
@@ -16,68 +52,132 @@ class UIAutomationTool(BaseTool):
             "Performs UI automation tasks. "
             "Args: operation (str), **kwargs. "
             "Valid operations: 'list_windows', 'get_controls', 'click_control'. "
-            "For 'get_controls', provide 'window_title'. "
+            "For 'get_controls', provide 'window_title', and optionally 'depth' (int), "
+            "'control_type' (e.g. 'Button' or 'Button,Edit'), 'name' (substring filter) "
+            "and 'diff' (true to only list controls added or removed since the previous call). "
             "For 'click_control', provide 'window_title' and 'control_specifier'."
         )
 
+    def call_policy(self, operation: str = None, **kwargs) -> ToolCallPolicy | None:
+        if operation == "list_windows":
+            return ToolCallPolicy(ToolCallPolicy.CACHEABLE, ("ui:windows",), ttl=5)
+        if operation == "get_controls" and not kwargs.get("diff"):
+            return ToolCallPolicy(ToolCallPolicy.CACHEABLE, (f"ui:window:{kwargs.get('window_title')}",), ttl=5)
+        if operation == "click_control":
+            return ToolCallPolicy(ToolCallPolicy.MUTATING, ("ui:*",), idempotent=False)
+        return None
+
+    def _find_window(self, title: str):
+        window = self._windows.get(title)
+        if window is not None:
+            try:
+                self.backend.window_signature(window)
+                return window
+            except Exception:
+                self._windows.pop(title, None)
+        window = self.backend.find_window(title)
+        if window is not None:
+            self._windows[title] = window
+        return window
+
+    def _snapshot(self, window, depth: int) -> ControlNode:
+        key = self.backend.window_key(window)
+        signature = self.backend.window_signature(window)
+        foreground = self.backend.foreground_key()
+        snapshot = self._snapshots.get(key)
+        if (
+            snapshot is not None
+            and snapshot.signature == signature
+            and snapshot.foreground == foreground
+            and snapshot.depth > depth
+            and time.monotonic() - snapshot.taken_at < config.UI_TREE_CACHE_TTL
+        ):
+            self.stats["tree_hits"] += 1
+            return snapshot.tree
+
+        walk_depth = max(depth, config.UI_TREE_DEFAULT_DEPTH) + 1
+        tree = self.backend.control_tree(window, walk_depth)
+        self._snapshots[key] = _TreeSnapshot(window, signature, foreground, walk_depth, tree)
+        self.stats["tree_walks"] += 1
+        return tree
+
+    def _render(self, tree: ControlNode, depth: int, control_types: set[str], name: str) -> list[str]:
+        lines = []
+        for level, node in tree.walk(depth):
+            if level == 0:
+                continue
+            if control_types and node.control_type.lower() not in control_types:
+                continue
+            if name and name not in node.name.lower():
+                continue
+            lines.append(f"{'  ' * (level - 1)}{node.describe()}")
+        return lines
+
+    def _get_controls(self, window_title: str, depth, control_type, name, diff) -> str:
+        window = self._find_window(window_title)
+        if window is None:
+            return f"Error: No window with title matching '{window_title}' found."
+
+        depth = int(depth) if depth is not None else config.UI_TREE_DEFAULT_DEPTH
+        tree = self._snapshot(window, depth)
+        control_types = {t.strip().lower() for t in str(control_type).split(",") if t.strip()} if control_type else set()
+        lines = self._render(tree, depth, control_types, (name or "").lower())
+
+        listing_key = (self.backend.window_key(window), depth, frozenset(control_types), name)
+        previous = self._last_listing.get(listing_key)
+        self._last_listing[listing_key] = lines
+        if diff:
+            if previous is None:
+                return f"No previous snapshot of '{window_title}' to compare with. Current controls:\n" + "\n".join(lines)
+            old, new = set(previous), set(lines)
+            added = [line.strip() for line in lines if line not in old]
+            removed = [line.strip() for line in previous if line not in new]
+            if not added and not removed:
+                return f"No control changes in '{window_title}' since the previous snapshot."
+            return "\n".join([f"+ {line}" for line in added] + [f"- {line}" for line in removed])
+
+        if any(level == depth and node.children for level, node in tree.walk(depth)):
+            lines.append(f"(Controls nested deeper than depth {depth} were not listed; pass a larger 'depth' to see them.)")
+        elif not lines:
+            return f"No controls in '{window_title}' match the given filters."
+        return "\n".join(lines)
+
     def execute(self, operation: str, **kwargs) -> str:
-        logger.info(f"Executing UI automation operation '{operation}' with args {kwargs}")
+        logger.info("Executing UI automation operation '%s' with args %s", operation, kwargs)
         try:
-            if operation == "list_windows":
-                windows = Desktop(backend="uia").windows()
-                return "\n".join([w.window_text() for w in windows])
-            
-            elif operation == "get_controls":
-                window_title = kwargs.get("window_title")
-                if not window_title:
-                    return "Error: 'window_title' is required for 'get_controls'."
-                
-                app = Application(backend="uia").connect(title_re=f".*{window_title}.*", timeout=10)
-                
-                windows = app.windows(title_re=f".*{window_title}.*")
-                if not windows:
-                    return f"Error: No window with title matching '{window_title}' found."
-                
-                main_window = None
-                for w in windows:
-                    if w.is_active():
-                        main_window = w
-                        break
-                if not main_window:
-                    main_window = windows[0]
-
-                logger.info(f"Found window: {main_window.window_text()}")
-                controls = main_window.descendants()
-                return "\n".join([str(c.element_info) for c in controls])
-
-            elif operation == "click_control":
-                window_title = kwargs.get("window_title")
-                control_specifier = kwargs.get("control_specifier")
-                if not window_title or not control_specifier:
-                    return "Error: 'window_title' and 'control_specifier' are required."
-
-                app = Application(backend="uia").connect(title_re=f".*{window_title}.*", timeout=10)
-
-                windows = app.windows(title_re=f".*{window_title}.*")
-                if not windows:
-                    return f"Error: No window with title matching '{window_title}' found."
-
-                main_window = None
-                for w in windows:
-                    if w.is_active():
-                        main_window = w
-                        break
-                if not main_window:
-                    main_window = windows[0]
-                
-                logger.info(f"Targeting window: {main_window.window_text()}")
-                control = main_window.child_window(best_match=control_specifier)
-                control.click_input()
-                return f"Successfully clicked control '{control_specifier}' in window '{window_title}'."
-
-            else:
-                return f"Error: Unknown UI automation operation '{operation}'."
+            with self._lock:
+                if operation == "list_windows":
+                    return "\n".join(self.backend.list_windows())
+
+                elif operation == "get_controls":
+                    window_title = kwargs.get("window_title")
+                    if not window_title:
+                        return "Error: 'window_title' is required for 'get_controls'."
+                    return self._get_controls(
+                        window_title,
+                        kwargs.get("depth"),
+                        kwargs.get("control_type"),
+                        kwargs.get("name"),
+                        kwargs.get("diff", False),
+                    )
+
+                elif operation == "click_control":
+                    window_title = kwargs.get("window_title")
+                    control_specifier = kwargs.get("control_specifier")
+                    if not window_title or not control_specifier:
+                        return "Error: 'window_title' and 'control_specifier' are required."
+
+                    window = self._find_window(window_title)
+                    if window is None:
+                        return f"Error: No window with title matching '{window_title}' found."
+
+                    self.backend.click(window, control_specifier)
+                    self._snapshots.pop(self.backend.window_key(window), None)
+                    return f"Successfully clicked control '{control_specifier}' in window '{window_title}'."
+
+                else:
+                    return f"Error: Unknown UI automation operation '{operation}'."
 
         except Exception as e:
-            logger.error(f"UI automation tool error: {e}")
+            logger.error("UI automation tool error: %s", e)
             return f"Error during UI automation: {e}"
@@ -0,0 +1,150 @@
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Iterator
+
+class ControlNode:
+    __slots__ = ("name", "control_type", "automation_id", "children")
+
+    def __init__(self, name: str, control_type: str, automation_id: str = "", children: list["ControlNode"] | None = None):
+        self.name = name
+        self.control_type = control_type
+        self.automation_id = automation_id
+        self.children = children or []
+
+    def describe(self) -> str:
+        text = f"{self.control_type} '{self.name}'"
+        return f"{text} id={self.automation_id}" if self.automation_id else text
+
+    def walk(self, max_depth: int, depth: int = 0) -> Iterator[tuple[int, "ControlNode"]]:
+        yield depth, self
+        if depth < max_depth:
+            for child in self.children:
+                yield from child.walk(max_depth, depth + 1)
+
+class UIBackend(ABC):
+    @abstractmethod
+    def list_windows(self) -> list[str]:
+        pass
+
+    @abstractmethod
+    def find_window(self, title: str) -> Any | None:
+        pass
+
+    @abstractmethod
+    def window_key(self, window: Any) -> Any:
+        pass
+
+    @abstractmethod
+    def window_signature(self, window: Any) -> Any:
+        pass
+
+    @abstractmethod
+    def foreground_key(self) -> Any:
+        pass
+
+    @abstractmethod
+    def control_tree(self, window: Any, max_depth: int) -> ControlNode:
+        pass
+
+    @abstractmethod
+    def click(self, window: Any, control_specifier: str):
+        pass
+
+class PywinautoBackend(UIBackend):
+    def __init__(self):
+        from pywinauto import Desktop
+        from pywinauto.application import Application
+        self._desktop = Desktop
+        self._application = Application
+        self._apps: dict[str, Any] = {}
+
+    def list_windows(self) -> list[str]:
+        return [w.window_text() for w in self._desktop(backend="uia").windows()]
+
+    def find_window(self, title: str) -> Any | None:
+        app = self._apps.get(title)
+        if app is None or not app.is_process_running():
+            app = self._application(backend="uia").connect(title_re=f".*{title}.*", timeout=10)
+            self._apps[title] = app
+
+        windows = app.windows(title_re=f".*{title}.*")
+        if not windows:
+            return None
+        for w in windows:
+            if w.is_active():
+                return w
+        return windows[0]
+
+    def window_key(self, window: Any) -> Any:
+        return window.handle
+
+    def window_signature(self, window: Any) -> Any:
+        rect = window.rectangle()
+        return window.window_text(), (rect.left, rect.top, rect.right, rect.bottom), len(window.element_info.children())
+
+    def foreground_key(self) -> Any:
+        import ctypes
+        return ctypes.windll.user32.GetForegroundWindow()
+
+    def _node(self, info, max_depth: int, depth: int) -> ControlNode:
+        children = [self._node(child, max_depth, depth + 1) for child in info.children()] if depth < max_depth else []
+        return ControlNode(info.name or "", info.control_type or "", info.automation_id or "", children)
+
+    def control_tree(self, window: Any, max_depth: int) -> ControlNode:
+        return self._node(window.element_info, max_depth, 0)
+
+    def click(self, window: Any, control_specifier: str):
+        window.child_window(best_match=control_specifier).click_input()
+
+class FakeUIBackend(UIBackend):
+    def __init__(self, windows: dict[str, ControlNode] | None = None, walk_delay: float = 0.0):
+        self.windows = windows if windows is not None else {}
+        self.walk_delay = walk_delay
+        self.foreground = next(iter(self.windows), None)
+        self.versions: dict[str, int] = {title: 0 for title in self.windows}
+        self.walks = 0
+        self.clicks: list[tuple[str, str]] = []
+
+    @staticmethod
+    def build_tree(breadth: int, depth: int, prefix: str = "Item") -> ControlNode:
+        types = ("Pane", "Button", "Edit", "Text", "ListItem")
+        def build(level: int, path: str) -> ControlNode:
+            children = [] if level == depth else [build(level + 1, f"{path}.{i}") for i in range(breadth)]
+            return ControlNode(f"{prefix} {path}", types[level % len(types)], f"id{path.replace('.', '_')}", children)
+        return build(0, "0")
+
+    def add_window(self, title: str, tree: ControlNode):
+        self.windows[title] = tree
+        self.versions[title] = self.versions.get(title, -1) + 1
+
+    def list_windows(self) -> list[str]:
+        return list(self.windows)
+
+    def find_window(self, title: str) -> Any | None:
+        pattern = re.compile(f".*{title}.*")
+        return next((name for name in self.windows if pattern.match(name)), None)
+
+    def window_key(self, window: Any) -> Any:
+        return window
+
+    def window_signature(self, window: Any) -> Any:
+        return self.versions.get(window)
+
+    def foreground_key(self) -> Any:
+        return self.foreground
+
+    def control_tree(self, window: Any, max_depth: int) -> ControlNode:
+        self.walks += 1
+        def copy(node: ControlNode, depth: int) -> ControlNode:
+            if self.walk_delay:
+                time.sleep(self.walk_delay)
+            children = [copy(child, depth + 1) for child in node.children] if depth < max_depth else []
+            return ControlNode(node.name, node.control_type, node.automation_id, children)
+        return copy(self.windows[window], 0)
+
+    def click(self, window: Any, control_specifier: str):
+        if not any(control_specifier in node.name for _, node in self.windows[window].walk(1000)):
+            raise LookupError(f"No control matching '{control_specifier}'.")
+        self.clicks.append((window, control_specifier))
+        self.versions[window] += 1
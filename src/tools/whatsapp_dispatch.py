@@ -0,0 +1,253 @@
+import os
+import sqlite3
+import threading
+import time
+from src.tools.whatsapp_transports import MessageTransport
+from src.config import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+SENT = "sent"
+FAILED = "failed"
+CANCELLED = "cancelled"
+UNKNOWN = "unknown"
+SENDING = "sending"
+
+class OutboundMessage:
+    __slots__ = ("message_id", "phone_no", "message", "send_at", "status", "attempts", "last_error", "sent_at")
+
+    def __init__(self, message_id, phone_no, message, send_at, status, attempts, last_error, sent_at):
+        self.message_id = message_id
+        self.phone_no = phone_no
+        self.message = message
+        self.send_at = send_at
+        self.status = status
+        self.attempts = attempts
+        self.last_error = last_error
+        self.sent_at = sent_at
+
+    def describe(self) -> str:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.sent_at or self.send_at))
+        if self.status == SENT:
+            state = f"sent at {when}"
+        elif self.status == QUEUED and self.attempts:
+            state = f"retrying at {when} after {self.attempts} failed attempt(s): {self.last_error}"
+        elif self.status == QUEUED:
+            state = f"queued for {when}"
+        elif self.status == FAILED:
+            state = f"failed after {self.attempts} attempt(s): {self.last_error}"
+        elif self.status == UNKNOWN:
+            state = f"unknown: {self.last_error}"
+        else:
+            state = self.status
+        return f"Message {self.message_id} to {self.phone_no}: {state}."
+
+class MessageQueue:
+    COLUMNS = "id, phone_no, message, send_at, status, attempts, last_error, sent_at"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, phone_no TEXT NOT NULL, message TEXT NOT NULL, "
+            "send_at REAL NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, created_at REAL, sent_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_due ON messages (status, send_at)")
+        self._conn.execute(
+            "UPDATE messages SET status = ?, last_error = ? WHERE status = ?",
+            (UNKNOWN, "the agent stopped while this message was being sent; it was not retried to avoid a duplicate", SENDING),
+        )
+        self._conn.commit()
+
+    def _rows(self, sql: str, params=()) -> list[OutboundMessage]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self.COLUMNS} FROM messages {sql}", params).fetchall()
+        return [OutboundMessage(*row) for row in rows]
+
+    def enqueue(self, phone_no: str, message: str, send_at: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO messages (phone_no, message, send_at, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (phone_no, message, send_at, QUEUED, time.time()),
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def get(self, message_id: int) -> OutboundMessage | None:
+        rows = self._rows("WHERE id = ?", (message_id,))
+        return rows[0] if rows else None
+
+    def recent(self, phone_no: str | None = None, limit: int = 10) -> list[OutboundMessage]:
+        if phone_no:
+            return self._rows("WHERE phone_no = ? ORDER BY id DESC LIMIT ?", (phone_no, limit))
+        return self._rows("ORDER BY id DESC LIMIT ?", (limit,))
+
+    def next_due(self) -> float | None:
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(send_at) FROM messages WHERE status = ?", (QUEUED,)).fetchone()
+        return row[0]
+
+    def claim_due(self, now: float, batch_max: int) -> list[list[OutboundMessage]]:
+        with self._lock:
+            recipients = [
+                row[0] for row in self._conn.execute(
+                    "SELECT DISTINCT phone_no FROM messages WHERE status = ? AND send_at <= ?", (QUEUED, now)
+                )
+            ]
+            batches = []
+            for phone_no in recipients:
+                rows = self._conn.execute(
+                    f"SELECT {self.COLUMNS} FROM messages WHERE status = ? AND phone_no = ? AND send_at <= ? "
+                    "ORDER BY id LIMIT ?",
+                    (QUEUED, phone_no, now, batch_max),
+                ).fetchall()
+                batch = [OutboundMessage(*row) for row in rows]
+                self._conn.executemany(
+                    "UPDATE messages SET status = ? WHERE id = ?", [(SENDING, message.message_id) for message in batch]
+                )
+                batches.append(batch)
+            self._conn.commit()
+        return batches
+
+    def _update(self, sql: str, params: list[tuple]):
+        with self._lock:
+            self._conn.executemany(sql, params)
+            self._conn.commit()
+
+    def mark_sent(self, messages: list[OutboundMessage]):
+        now = time.time()
+        self._update(
+            "UPDATE messages SET status = ?, attempts = attempts + 1, sent_at = ?, last_error = NULL WHERE id = ?",
+            [(SENT, now, message.message_id) for message in messages],
+        )
+
+    def mark_failed(self, messages: list[OutboundMessage], error: str, retry_at: float | None):
+        if retry_at is None:
+            params = [(FAILED, message.send_at, error, message.message_id) for message in messages]
+        else:
+            params = [(QUEUED, retry_at, error, message.message_id) for message in messages]
+        self._update("UPDATE messages SET status = ?, send_at = ?, attempts = attempts + 1, last_error = ? WHERE id = ?", params)
+
+    def requeue(self, messages: list[OutboundMessage], send_at: float):
+        self._update(
+            "UPDATE messages SET status = ?, send_at = MAX(send_at, ?) WHERE id = ?",
+            [(QUEUED, send_at, message.message_id) for message in messages],
+        )
+
+    def expire(self, before: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE messages SET status = ?, last_error = ? WHERE status = ? AND send_at < ?",
+                (FAILED, "it was not sent in time because the agent was not running", QUEUED, before),
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def cancel(self, message_id: int) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE messages SET status = ? WHERE id = ? AND status = ?", (CANCELLED, message_id, QUEUED)
+            )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM messages GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class WhatsAppDispatcher:
+    def __init__(self, queue: MessageQueue, transport_factory):
+        self.queue = queue
+        self.transport_factory = transport_factory
+        self._transport: MessageTransport | None = None
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+        self.stats = {"batches": 0, "sent": 0, "retries": 0, "failed": 0}
+
+    @property
+    def transport(self) -> MessageTransport:
+        if self._transport is None:
+            self._transport = self.transport_factory()
+        return self._transport
+
+    def start(self):
+        with self._condition:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name="whatsapp-dispatch", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.start()
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                self.dispatch_due()
+            except Exception as e:
+                logger.error("WhatsApp dispatcher error: %s", e, exc_info=True)
+            next_due = self.queue.next_due()
+            delay = config.WHATSAPP_IDLE_WAIT if next_due is None else min(config.WHATSAPP_IDLE_WAIT, next_due - time.time())
+            with self._condition:
+                if not self._stopped and delay > 0:
+                    self._condition.wait(delay)
+
+    def dispatch_due(self) -> int:
+        now = time.time()
+        expired = self.queue.expire(now - config.WHATSAPP_EXPIRE_AFTER)
+        if expired:
+            logger.warning("%s queued WhatsApp message(s) expired without being sent.", expired)
+        batches = self.queue.claim_due(now, config.WHATSAPP_BATCH_MAX)
+        for batch in batches:
+            self._send_in_order(batch)
+        return len(batches)
+
+    def _send_in_order(self, batch: list[OutboundMessage]):
+        self.stats["batches"] += 1
+        for index, message in enumerate(batch):
+            retry_at = self._send(message)
+            if retry_at is not None:
+                self.queue.requeue(batch[index + 1:], retry_at)
+                return
+
+    def _send(self, message: OutboundMessage) -> float | None:
+        try:
+            self.transport.send(message.phone_no, message.message)
+        except Exception as e:
+            attempts = message.attempts + 1
+            if attempts >= config.WHATSAPP_MAX_ATTEMPTS:
+                logger.error("Giving up on WhatsApp message %s to %s after %s attempts: %s", message.message_id, message.phone_no, attempts, e)
+                self.queue.mark_failed([message], str(e), None)
+                self.stats["failed"] += 1
+                return None
+            delay = min(config.WHATSAPP_RETRY_BASE * 2 ** (attempts - 1), config.WHATSAPP_RETRY_MAX)
+            logger.warning("Sending WhatsApp message %s to %s failed, retrying in %ss: %s", message.message_id, message.phone_no, delay, e)
+            retry_at = time.time() + delay
+            self.queue.mark_failed([message], str(e), retry_at)
+            self.stats["retries"] += 1
+            return retry_at
+        self.queue.mark_sent([message])
+        self.stats["sent"] += 1
+        logger.info("Sent WhatsApp message %s to %s.", message.message_id, message.phone_no)
+        return None
+
+    def stop(self, timeout: float = 5.0):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
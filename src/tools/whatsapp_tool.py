@@ -1,10 +1,29 @@
-import pywhatkit
-from src.tools.base_tool import BaseTool
+import datetime
+from src.tools.base_tool import BaseTool, ToolCallPolicy
+from src.tools.whatsapp_dispatch import MessageQueue, WhatsAppDispatcher
+from src.tools.whatsapp_transports import PywhatkitTransport
+from src.config import config
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 class WhatsAppTool(BaseTool):
+    requires = ("pywhatkit",)
+    tags = ("whatsapp", "message", "send", "chat", "phone", "contact", "notify", "status", "delivery")
+    parameters = {
+        "operation": {"type": "string", "enum": ["send", "status", "cancel"]},
+        "phone_no": {"type": "string"},
+        "message": {"type": "string"},
+        "hour": {"type": "integer"},
+        "minute": {"type": "integer"},
+        "message_id": {"type": "integer"},
+    }
+
+    def __init__(self, transport_factory=None, queue: MessageQueue | None = None):
+        self.dispatcher = WhatsAppDispatcher(
+            queue or MessageQueue(config.WHATSAPP_QUEUE_PATH), transport_factory or PywhatkitTransport
+        )
+
     @property
     def name(self) -> str:
         return "send_whatsapp_message"
@@ -13,15 +32,72 @@ class WhatsAppTool(BaseTool):
     def description(self) -> str:
         return (
             "Sends a WhatsApp message to a given phone number. "
-            "Args: phone_no (str), message (str), hour (int), minute (int). "
-            "The phone number must be a string with the country code."
+            "Args: phone_no (str), message (str), hour (int, optional), minute (int, optional). "
+            "The phone number must be a string with the country code. "
+            "The message is queued and sent in the background at hour:minute (the next time that clock time comes), "
+            "or right away when no time is given, so this returns immediately with a message id. "
+            "Pass operation 'status' with 'message_id' (or 'phone_no', or nothing for the latest messages) "
+            "to check whether messages were delivered, and operation 'cancel' with 'message_id' to cancel a queued message."
         )
 
-    def execute(self, phone_no: str, message: str, hour: int, minute: int) -> str:
-        logger.info(f"Sending WhatsApp message to {phone_no}")
+    def call_policy(self, operation: str = "send", **kwargs) -> ToolCallPolicy | None:
+        if operation == "send":
+            return ToolCallPolicy(ToolCallPolicy.MUTATING, ("whatsapp",), idempotent=False)
+        if operation == "cancel":
+            return ToolCallPolicy(ToolCallPolicy.MUTATING, ("whatsapp",))
+        return None
+
+    def warm_up(self):
+        if self.dispatcher.queue.next_due() is not None:
+            self.dispatcher.start()
+
+    def shutdown(self):
+        self.dispatcher.stop()
+        self.dispatcher.queue.close()
+
+    def execute(self, operation: str = "send", phone_no: str = None, message: str = None, hour: int = None,
+                minute: int = None, message_id: int = None) -> str:
         try:
-            pywhatkit.sendwhatmsg(phone_no, message, hour, minute)
-            return f"WhatsApp message scheduled to be sent to {phone_no} at {hour}:{minute}."
+            if operation == "status":
+                return self._status(message_id, phone_no)
+            if operation == "cancel":
+                if message_id is None:
+                    return "Error: 'message_id' is required for 'cancel'."
+                if self.dispatcher.queue.cancel(int(message_id)):
+                    return f"Message {message_id} was cancelled."
+                return f"Error: Message {message_id} is not queued, so it cannot be cancelled."
+            if operation != "send":
+                return f"Error: Unknown WhatsApp operation '{operation}'."
+            return self._send(phone_no, message, hour, minute)
         except Exception as e:
-            logger.error(f"WhatsApp tool error: {e}")
+            logger.error("WhatsApp tool error: %s", e)
             return f"Error sending WhatsApp message: {e}"
+
+    def _send(self, phone_no: str, message: str, hour, minute) -> str:
+        if not phone_no or not message:
+            return "Error: 'phone_no' and 'message' are required to send a message."
+        if not str(phone_no).startswith("+"):
+            return "Error: The phone number must start with '+' and the country code."
+        now = datetime.datetime.now()
+        send_at = now
+        if hour is not None or minute is not None:
+            send_at = now.replace(hour=int(hour or 0), minute=int(minute or 0), second=0, microsecond=0)
+            if send_at < now - datetime.timedelta(minutes=1):
+                send_at += datetime.timedelta(days=1)
+        message_id = self.dispatcher.queue.enqueue(str(phone_no), message, send_at.timestamp())
+        self.dispatcher.wake()
+        logger.info("Queued WhatsApp message %s to %s for %s", message_id, phone_no, send_at.strftime("%Y-%m-%d %H:%M"))
+        return (
+            f"WhatsApp message {message_id} to {phone_no} is queued to be sent at {send_at.strftime('%Y-%m-%d %H:%M')}. "
+            f"Check its delivery with operation 'status' and message_id {message_id}."
+        )
+
+    def _status(self, message_id, phone_no) -> str:
+        queue = self.dispatcher.queue
+        if message_id is not None:
+            queued = queue.get(int(message_id))
+            return queued.describe() if queued else f"Error: There is no WhatsApp message with id {message_id}."
+        messages = queue.recent(phone_no, config.WHATSAPP_STATUS_LIMIT)
+        if not messages:
+            return "No WhatsApp messages have been queued" + (f" for {phone_no}." if phone_no else ".")
+        return "\n".join(queued.describe() for queued in messages)
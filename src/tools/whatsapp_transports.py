@@ -0,0 +1,33 @@
+import threading
+from abc import ABC, abstractmethod
+from src.config import config
+
+class MessageTransport(ABC):
+    @abstractmethod
+    def send(self, phone_no: str, message: str):
+        pass
+
+class PywhatkitTransport(MessageTransport):
+    def __init__(self):
+        import pywhatkit
+        self._pywhatkit = pywhatkit
+
+    def send(self, phone_no: str, message: str):
+        self._pywhatkit.sendwhatmsg_instantly(
+            phone_no, message, wait_time=config.WHATSAPP_WAIT_TIME, tab_close=True, close_time=config.WHATSAPP_CLOSE_TIME
+        )
+
+class FakeMessageTransport(MessageTransport):
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.sent: list[tuple[str, str]] = []
+        self.attempts = 0
+        self._lock = threading.Lock()
+
+    def send(self, phone_no: str, message: str):
+        with self._lock:
+            self.attempts += 1
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("fake transport failure")
+            self.sent.append((phone_no, message))
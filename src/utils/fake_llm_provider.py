@@ -0,0 +1,56 @@
+import time
+from collections import deque
+from typing import Callable, Iterable, Iterator
+from src.utils.llm_provider import StreamComplete
+
+class FakeLLMProvider:
+    def __init__(
+        self,
+        responses: Iterable[str] | Callable[[str], str],
+        chunk_size: int = 16,
+        chunk_delay: float = 0.0,
+        latency: float = 0.0,
+        model_name: str = "fake-llm",
+    ):
+        self.script = responses if callable(responses) else deque(responses)
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.latency = latency
+        self.model_name = model_name
+        self.prompts: list[str] = []
+        self.calls = 0
+        self.chunks_sent = 0
+        self.cancelled_streams = 0
+
+    def _next_response(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        self.calls += 1
+        if callable(self.script):
+            return self.script(prompt)
+        if not self.script:
+            raise RuntimeError("FakeLLMProvider has no scripted responses left.")
+        return self.script.popleft()
+
+    def get_completion(self, prompt: str, temperature: float = 0.1, json_mode: bool = False) -> str:
+        response = self._next_response(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return response.strip()
+
+    def stream_completion(self, prompt: str, temperature: float = 0.1, json_mode: bool = False) -> Iterator[str]:
+        response = self._next_response(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        position = 0
+        try:
+            while position < len(response):
+                chunk = response[position:position + self.chunk_size]
+                position += len(chunk)
+                self.chunks_sent += 1
+                yield chunk
+                if self.chunk_delay:
+                    time.sleep(self.chunk_delay)
+        except (GeneratorExit, StreamComplete):
+            if position < len(response):
+                self.cancelled_streams += 1
+            raise
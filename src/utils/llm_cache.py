@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Callable, Iterator
+from src.utils.llm_provider import StreamComplete
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_MODES = ("off", "read_write", "record", "replay")
+PARTIAL_SUFFIX = ":partial"
+
+class ReplayMissError(RuntimeError):
+    pass
+
+class CompletionCache:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, model TEXT, temperature REAL, response TEXT, "
+            "size INTEGER, pinned INTEGER, created_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_lru ON completions (pinned, last_access)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str, json_mode: bool = False) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        parts = [model, temperature, prompt_hash] + (["json"] if json_mode else [])
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, temperature: float, response: str, pinned: bool = False):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, temperature, response, size, int(pinned), now, now),
+            )
+            self._size += size - (row[0] if row else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM completions WHERE pinned = 0 ORDER BY last_access LIMIT 32"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._size <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._size -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            size = self._size
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": entries, "bytes": size}
+
+class CachedLLMProvider:
+    def __init__(self, provider_factory: Callable, cache: CompletionCache, mode: str = "read_write", model_name: str = ""):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}'. Expected one of {CACHE_MODES}.")
+        self.provider_factory = provider_factory
+        self.cache = cache
+        self.mode = mode
+        self.model_name = model_name
+        self._provider = None
+        self._occurrences = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def provider(self):
+        with self._lock:
+            if self._provider is None:
+                self._provider = self.provider_factory()
+                self.model_name = self.model_name or getattr(self._provider, "model_name", "")
+            return self._provider
+
+    def _key(self, prompt: str, temperature: float, json_mode: bool) -> str:
+        key = CompletionCache.make_key(self.model_name, temperature, prompt, json_mode)
+        if self.mode in ("record", "replay"):
+            with self._lock:
+                occurrence = self._occurrences[key]
+                self._occurrences[key] += 1
+            key = f"{key}:{occurrence}"
+        return key
+
+    def _lookup(self, key: str, partial: bool = False) -> str | None:
+        if self.mode == "record":
+            return None
+        cached = self.cache.get(key)
+        if cached is None and partial:
+            cached = self.cache.get(key + PARTIAL_SUFFIX)
+        if cached is None and self.mode == "replay":
+            raise ReplayMissError(f"No recorded completion for prompt key {key} in replay mode.")
+        return cached
+
+    def get_completion(self, prompt: str, temperature: float = 0.1, json_mode: bool = False) -> str:
+        key = self._key(prompt, temperature, json_mode)
+        cached = self._lookup(key)
+        if cached is not None:
+            logger.debug("LLM cache hit for key %.12s", key)
+            return cached
+        response = self.provider.get_completion(prompt, temperature, json_mode=json_mode)
+        self.cache.put(key, self.model_name, temperature, response, pinned=self.mode == "record")
+        return response
+
+    def stream_completion(self, prompt: str, temperature: float = 0.1, json_mode: bool = False) -> Iterator[str]:
+        key = self._key(prompt, temperature, json_mode)
+        cached = self._lookup(key, partial=True)
+        if cached is not None:
+            logger.debug("LLM cache hit for key %.12s", key)
+            yield cached
+            return
+
+        chunks = []
+        stream = self.provider.stream_completion(prompt, temperature, json_mode=json_mode)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        except StreamComplete:
+            key += PARTIAL_SUFFIX
+        finally:
+            stream.close()
+        if chunks:
+            self.cache.put(key, self.model_name, temperature, "".join(chunks).strip(), pinned=self.mode == "record")
@@ -1,33 +1,119 @@
-import google.generativeai as genai
+import threading
+from typing import Iterator
 from src.config import config
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+class StreamComplete(Exception):
+    pass
+
+def finish_stream(stream):
+    try:
+        stream.throw(StreamComplete())
+    except (StopIteration, StreamComplete):
+        pass
+    finally:
+        stream.close()
+
 class LLMProvider:
     def __init__(self):
         if not config.GEMINI_API_KEY:
-            raise ValueError("Gemini API key is not configured.")
+            raise ValueError(
+                "Gemini API key is not set. Please ensure a .env file exists "
+                "with your GEMINI_API_KEY."
+            )
+        import google.generativeai as genai
+        self.genai = genai
         genai.configure(api_key=config.GEMINI_API_KEY)
+        self.model_name = config.LLM_MODEL
         self.model = genai.GenerativeModel(config.LLM_MODEL)
+        self.supports_json_mode = True
 
-    def get_completion(self, prompt: str, temperature: float = 0.1) -> str:
+    def _generation_config(self, temperature: float, json_mode: bool):
+        if json_mode and self.supports_json_mode:
+            try:
+                return self.genai.types.GenerationConfig(temperature=temperature, response_mime_type="application/json")
+            except TypeError:
+                logger.warning("This google-generativeai version has no JSON output mode, falling back to plain text.")
+                self.supports_json_mode = False
+        return self.genai.types.GenerationConfig(temperature=temperature)
+
+    def get_completion(self, prompt: str, temperature: float = 0.1, json_mode: bool = False) -> str:
         try:
-            logger.debug(f"Sending prompt to Gemini: {prompt[:200]}...")
-            generation_config = genai.types.GenerationConfig(
-                temperature=temperature
-            )
+            logger.debug("Sending prompt to Gemini: %.200s...", prompt)
+            generation_config = self._generation_config(temperature, json_mode)
             response = self.model.generate_content(
                 prompt,
                 generation_config=generation_config
             )
             content = response.text
-            logger.debug(f"Received response from Gemini: {content[:200]}...")
+            logger.debug("Received response from Gemini: %.200s...", content)
             return content.strip()
         except Exception as e:
-            logger.error(f"An unexpected error occurred while calling Gemini: {e}")
+            logger.error("An unexpected error occurred while calling Gemini: %s", e)
+            if "API key not valid" in str(e):
+                 raise ValueError("The provided Gemini API key is not valid. Please check your .env file.")
+            raise
+
+    def stream_completion(self, prompt: str, temperature: float = 0.1, json_mode: bool = False) -> Iterator[str]:
+        logger.debug("Streaming prompt to Gemini: %.200s...", prompt)
+        generation_config = self._generation_config(temperature, json_mode)
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config=generation_config,
+                stream=True
+            )
+        except Exception as e:
+            logger.error("An unexpected error occurred while calling Gemini: %s", e)
             if "API key not valid" in str(e):
                  raise ValueError("The provided Gemini API key is not valid. Please check your .env file.")
             raise
 
-llm_provider = LLMProvider()
+        try:
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue
+                if text:
+                    yield text
+        finally:
+            self._close_response(response)
+
+    @staticmethod
+    def _close_response(response):
+        close = getattr(response, "close", None)
+        if not callable(close):
+            close = getattr(getattr(response, "_iterator", None), "cancel", None)
+        if not callable(close):
+            logger.debug("This google-generativeai version cannot cancel a stream, leaving it unread.")
+            return
+        try:
+            close()
+        except Exception as e:
+            logger.debug("Closing the Gemini stream failed: %s", e)
+
+def create_llm_provider():
+    if config.LLM_CACHE_MODE == "off":
+        return LLMProvider()
+    from src.utils.llm_cache import CachedLLMProvider, CompletionCache
+    cache = CompletionCache(config.LLM_CACHE_PATH, config.LLM_CACHE_MAX_BYTES)
+    logger.info("LLM completion cache enabled in '%s' mode at %s", config.LLM_CACHE_MODE, config.LLM_CACHE_PATH)
+    return CachedLLMProvider(LLMProvider, cache, mode=config.LLM_CACHE_MODE, model_name=config.LLM_MODEL)
+
+_llm_provider = None
+_llm_provider_lock = threading.Lock()
+
+def get_llm_provider():
+    global _llm_provider
+    with _llm_provider_lock:
+        if _llm_provider is None:
+            _llm_provider = create_llm_provider()
+        return _llm_provider
+
+def __getattr__(name: str):
+    if name == "llm_provider":
+        return get_llm_provider()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import deque
+from typing import Iterator
+from src.utils.task_context import current_task_id
+
+class FairLLMScheduler:
+    def __init__(self, provider=None, max_concurrent: int = 8):
+        self._provider = provider
+        self.max_concurrent = max_concurrent
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting: dict[str, deque] = {}
+        self._turns: deque[str] = deque()
+        self.stats = {"calls": 0, "queued_seconds": 0.0, "max_active": 0}
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            from src.utils.llm_provider import get_llm_provider
+            self._provider = get_llm_provider()
+        return self._provider
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.provider, "model_name", "")
+
+    def _acquire(self):
+        job_id = current_task_id.get()
+        ticket = object()
+        started = time.monotonic()
+        with self._condition:
+            self._waiting.setdefault(job_id, deque()).append(ticket)
+            if job_id not in self._turns:
+                self._turns.append(job_id)
+            while not (self._active < self.max_concurrent and self._waiting[self._turns[0]][0] is ticket):
+                self._condition.wait()
+
+            self._waiting[job_id].popleft()
+            self._turns.popleft()
+            if self._waiting[job_id]:
+                self._turns.append(job_id)
+            else:
+                del self._waiting[job_id]
+            self._active += 1
+            self.stats["calls"] += 1
+            self.stats["queued_seconds"] += time.monotonic() - started
+            self.stats["max_active"] = max(self.stats["max_active"], self._active)
+            self._condition.notify_all()
+
+    def _release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def get_completion(self, prompt: str, temperature: float = 0.1, json_mode: bool = False) -> str:
+        self._acquire()
+        try:
+            return self.provider.get_completion(prompt, temperature, json_mode=json_mode)
+        finally:
+            self._release()
+
+    def stream_completion(self, prompt: str, temperature: float = 0.1, json_mode: bool = False) -> Iterator[str]:
+        self._acquire()
+        try:
+            stream = self.provider.stream_completion(prompt, temperature, json_mode=json_mode)
+            try:
+                yield from stream
+            finally:
+                stream.close()
+        finally:
+            self._release()
@@ -1,6 +1,14 @@
+import atexit
+import datetime
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
 import colorama
 from src.config import config
+from src.utils.task_context import current_task_id
 
 colorama.init()
 
@@ -20,6 +28,102 @@ class ColorFormatter(logging.Formatter):
             message = color + message + colorama.Style.RESET_ALL
         return message
 
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "task_id": getattr(record, "task_id", None),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+def cap_message(message: str, max_chars: int) -> str:
+    if max_chars and len(message) > max_chars:
+        return f"{message[:max_chars]}... [{len(message) - max_chars} chars omitted]"
+    return message
+
+class PayloadCapFilter(logging.Filter):
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record):
+        record.task_id = current_task_id.get()
+        message = cap_message(record.getMessage(), self.max_chars)
+        record.msg, record.args = message, None
+        return True
+
+class AgentQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _console_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(ColorFormatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    ))
+    return handler
+
+def _json_handler() -> logging.Handler:
+    os.makedirs(os.path.dirname(os.path.abspath(config.LOG_JSON_PATH)), exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        config.LOG_JSON_PATH, maxBytes=config.LOG_JSON_MAX_BYTES, backupCount=config.LOG_JSON_BACKUPS, encoding="utf-8"
+    )
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+class _FanOutHandler(logging.Handler):
+    def __init__(self, handlers: list[logging.Handler]):
+        super().__init__()
+        self.handlers = handlers
+
+    def emit(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+_handler = None
+_listener = None
+_handler_lock = threading.Lock()
+
+def _shared_handler() -> logging.Handler:
+    global _handler, _listener
+    with _handler_lock:
+        if _handler is not None:
+            return _handler
+        sinks = [_console_handler()]
+        if config.LOG_JSON_ENABLED:
+            sinks.append(_json_handler())
+        if config.LOG_ASYNC:
+            _handler = AgentQueueHandler(queue.SimpleQueue())
+            _listener = logging.handlers.QueueListener(_handler.queue, *sinks, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logging)
+        else:
+            _handler = sinks[0] if len(sinks) == 1 else _FanOutHandler(sinks)
+        _handler.addFilter(PayloadCapFilter(config.LOG_MAX_MESSAGE_CHARS))
+        return _handler
+
+def shutdown_logging():
+    global _listener
+    with _handler_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     
@@ -27,12 +131,6 @@ def get_logger(name: str) -> logging.Logger:
     logger.setLevel(log_level)
 
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = ColorFormatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.addHandler(_shared_handler())
 
     return logger
@@ -0,0 +1,8 @@
+import contextvars
+import uuid
+
+current_task_id: contextvars.ContextVar[str] = contextvars.ContextVar("current_task_id", default="default")
+task_can_suspend: contextvars.ContextVar[bool] = contextvars.ContextVar("task_can_suspend", default=False)
+
+def new_task_id() -> str:
+    return uuid.uuid4().hex[:12]
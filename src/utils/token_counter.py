@@ -0,0 +1,17 @@
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    marker = "...[truncated]..."
+    if max_chars <= len(marker):
+        return text[:max_chars] if keep == "head" else text[len(text) - max_chars:]
+    if keep == "tail":
+        return marker + text[len(text) - max_chars + len(marker):]
+    return text[:max_chars - len(marker)] + marker
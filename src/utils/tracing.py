@@ -0,0 +1,260 @@
+import atexit
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+from src.config import config
+from src.utils.logger import get_logger
+from src.utils.task_context import current_task_id
+
+logger = get_logger(__name__)
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "task_id", "start_ns", "end_ns", "duration", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, task_id: str, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.task_id = task_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.duration = 0.0
+        self.attributes = attributes
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error: str):
+        self.status = "error"
+        self.error = error
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "task_id": self.task_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+class JsonlSpanExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]):
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            for span in spans:
+                self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+            self._file.flush()
+
+    def shutdown(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class OtlpHttpSpanExporter:
+    def __init__(self, endpoint: str, service_name: str = "windows-ai-agent", timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+        self._warned = False
+
+    @staticmethod
+    def _value(value) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def _span(self, span: Span) -> dict:
+        attributes = {**span.attributes, "task.id": span.task_id}
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": self._value(value)} for key, value in attributes.items() if value is not None],
+            "status": {"code": 2, "message": span.error or ""} if span.status == "error" else {"code": 1},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+    def export(self, spans: list[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [self._span(span) for span in spans]}],
+            }]
+        }
+        request = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except Exception as e:
+            if not self._warned:
+                logger.warning("Could not export spans to %s: %s", self.url, e)
+                self._warned = True
+
+    def shutdown(self):
+        pass
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+def _aggregate(durations: list[float]) -> dict:
+    return {
+        "count": len(durations),
+        "p50_ms": round(percentile(durations, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 2),
+        "total_ms": round(sum(durations) * 1000, 2),
+    }
+
+def format_trace_summary(summary: dict) -> str:
+    parts = [
+        f"{name} n={stats['count']} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms"
+        for name, stats in summary.get("phases", {}).items()
+    ]
+    parts.extend(
+        f"tool {name} n={stats['count']} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms errors={stats['errors']}"
+        for name, stats in summary.get("tools", {}).items()
+    )
+    if "llm" in summary:
+        parts.append(f"llm tokens in={summary['llm']['prompt_tokens']} out={summary['llm']['response_tokens']}")
+    return "; ".join(parts)
+
+class Tracer:
+    def __init__(self, exporters: list | None = None, batch_size: int = 64):
+        self.exporters = exporters or []
+        self.batch_size = batch_size
+        self._current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+        self._finished: dict[str, list[Span]] = {}
+        self._pending: list[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        parent = self._current.get()
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        span = Span(name, trace_id, parent.span_id if parent else None, current_task_id.get(), attributes)
+        token = self._current.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            span.end_ns = span.start_ns + int(span.duration * 1e9)
+            self._current.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._finished.get(span.task_id)
+            if spans is not None:
+                spans.append(span)
+            if not self.exporters:
+                return
+            self._pending.append(span)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._export(batch)
+
+    def _export(self, spans: list[Span]):
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                logger.warning("Span exporter %s failed: %s", type(exporter).__name__, e)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._export(batch)
+
+    def collect(self, task_id: str):
+        with self._lock:
+            self._finished.setdefault(task_id, [])
+
+    def task_summary(self, task_id: str) -> dict:
+        with self._lock:
+            spans = self._finished.pop(task_id, [])
+        phases: dict[str, list[float]] = defaultdict(list)
+        tools: dict[str, list[float]] = defaultdict(list)
+        tool_errors: dict[str, int] = defaultdict(int)
+        for span in spans:
+            phases[span.name].append(span.duration)
+            if span.name == "tool.execute":
+                tool = span.attributes.get("tool", "?")
+                tools[tool].append(span.duration)
+                if span.status == "error":
+                    tool_errors[tool] += 1
+        summary = {
+            "phases": {name: _aggregate(durations) for name, durations in phases.items()},
+            "tools": {name: {**_aggregate(durations), "errors": tool_errors[name]} for name, durations in tools.items()},
+        }
+        llm_spans = [span for span in spans if span.name == "llm.completion"]
+        if llm_spans:
+            summary["llm"] = {
+                "prompt_tokens": sum(span.attributes.get("prompt_tokens", 0) for span in llm_spans),
+                "response_tokens": sum(span.attributes.get("response_tokens", 0) for span in llm_spans),
+            }
+        return summary
+
+    def shutdown(self):
+        self.flush()
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+def create_tracer() -> Tracer:
+    exporters = []
+    if config.TRACE_EXPORTER in ("jsonl", "both"):
+        exporters.append(JsonlSpanExporter(config.TRACE_PATH))
+    if config.TRACE_EXPORTER in ("otlp", "both"):
+        exporters.append(OtlpHttpSpanExporter(config.TRACE_OTLP_ENDPOINT))
+    return Tracer(exporters)
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = create_tracer()
+            atexit.register(_tracer.shutdown)
+        return _tracer
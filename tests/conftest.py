@@ -0,0 +1,6 @@
+import os
+
+os.environ.setdefault("TRACE_EXPORTER", "off")
+os.environ.setdefault("TRAJECTORY_LIBRARY", "off")
+os.environ.setdefault("CHECKPOINTS", "off")
+os.environ.setdefault("LLM_CACHE_MODE", "off")
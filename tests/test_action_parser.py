@@ -0,0 +1,63 @@
+import json
+import pytest
+from benchmarks import stub_tools
+from src.memory.memory_manager import MemoryManager
+from src.planning.action_parser import StreamingActionParser, extract_action_json, find_json_objects
+from src.planning.react_planner import ReactPlanner, is_strict_response
+from src.tools.tool_manager import ToolManager
+from src.utils.fake_llm_provider import FakeLLMProvider
+
+ACTION = {"thought": "look", "action": {"tool": "echo", "args": {"text": "a {b} \"c\""}}}
+PAYLOAD = json.dumps(ACTION)
+
+@pytest.mark.parametrize("response", [
+    PAYLOAD,
+    f"```json\n{PAYLOAD}\n```",
+    f"```\n{PAYLOAD}\n```",
+    f"~~~json\n{PAYLOAD}\n~~~",
+    f"Sure, here is my next step:\n{PAYLOAD}\nLet me know.",
+    f"```python\nprint({{'x': 1}})\n```\nThen: {PAYLOAD}",
+    f'{{"note": "unrelated"}} {PAYLOAD}',
+    f"{{ unbalanced prose {PAYLOAD}",
+])
+def test_extracts_action_from_tolerated_formats(response):
+    assert extract_action_json(response) == ACTION
+
+def test_invalid_json_reports_the_decode_error():
+    with pytest.raises(ValueError, match="Invalid JSON format"):
+        extract_action_json('{"action": {"tool": "echo",}}')
+
+def test_missing_action_object():
+    with pytest.raises(ValueError, match="No JSON action object found"):
+        extract_action_json("I am not sure what to do next.")
+
+def test_find_json_objects_orders_by_start_and_skips_braces_in_strings():
+    text = 'x {"a": {"b": "}"}} y {"c": 1'
+    assert [text[start:end] for start, end in find_json_objects(text)] == ['{"a": {"b": "}"}}', '{"b": "}"}']
+
+def test_find_json_objects_is_linear_on_unbalanced_text():
+    text = "{ " * 50000 + PAYLOAD
+    assert extract_action_json(text) == ACTION
+
+def test_streaming_parser_stops_at_the_action_block():
+    parser = StreamingActionParser()
+    response = "Thinking {not json} " + PAYLOAD + " trailing text"
+    completed = [parser.feed(response[i:i + 7]) for i in range(0, len(response), 7)]
+    assert completed[-1] and parser.block == PAYLOAD
+    assert parser.text.endswith(PAYLOAD)
+
+@pytest.mark.parametrize("response, strict", [
+    (PAYLOAD, True),
+    (f"```json\n{PAYLOAD}\n```", True),
+    (f"Here you go: {PAYLOAD}", False),
+    (f"```\n{PAYLOAD}\n```", False),
+])
+def test_strict_responses(response, strict):
+    assert is_strict_response(response) is strict
+
+def test_planner_counts_only_tolerant_parses():
+    planner = ReactPlanner(ToolManager(stub_tools), MemoryManager(), llm=FakeLLMProvider([]))
+    for response in (PAYLOAD, f"```json\n{PAYLOAD}\n```", f"Next: {PAYLOAD}"):
+        thought, actions = planner._parse_llm_response(response)
+        assert thought == "look" and actions == [ACTION["action"]]
+    assert planner.stats["tolerant_parses"] == 1
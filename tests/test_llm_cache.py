@@ -0,0 +1,84 @@
+import pytest
+from src.utils.fake_llm_provider import FakeLLMProvider
+from src.utils.llm_cache import PARTIAL_SUFFIX, CachedLLMProvider, CompletionCache, ReplayMissError
+from src.utils.llm_provider import finish_stream
+
+ACTION = '{"thought": "t", "action": {"tool": "echo", "args": {}}}'
+
+@pytest.fixture
+def cache(tmp_path):
+    return CompletionCache(str(tmp_path / "completions.sqlite3"), 10 ** 6)
+
+def cached(cache, mode, responses):
+    fake = FakeLLMProvider(responses, chunk_size=8)
+    return CachedLLMProvider(lambda: fake, cache, mode=mode, model_name=fake.model_name), fake
+
+def test_unknown_mode_is_rejected(cache):
+    with pytest.raises(ValueError):
+        CachedLLMProvider(lambda: None, cache, mode="sometimes")
+
+def test_read_write_serves_repeated_prompts_from_the_cache(cache):
+    llm, fake = cached(cache, "read_write", ["first", "second"])
+    assert llm.get_completion("prompt") == "first"
+    assert llm.get_completion("prompt") == "first"
+    assert llm.get_completion("prompt", json_mode=True) == "second"
+    assert fake.calls == 2
+    assert cache.stats()["hits"] == 1
+
+def test_record_then_replay_returns_each_occurrence_in_order(cache):
+    recorder, fake = cached(cache, "record", ["one", "two"])
+    assert [recorder.get_completion("prompt") for _ in range(2)] == ["one", "two"]
+    assert fake.calls == 2
+
+    replayer, fake = cached(cache, "replay", [])
+    assert [replayer.get_completion("prompt") for _ in range(2)] == ["one", "two"]
+    assert fake.calls == 0
+    with pytest.raises(ReplayMissError):
+        replayer.get_completion("prompt")
+
+def test_record_ignores_existing_entries(cache):
+    cached(cache, "read_write", ["old"])[0].get_completion("prompt")
+    recorder, fake = cached(cache, "record", ["new"])
+    assert recorder.get_completion("prompt") == "new"
+    assert fake.calls == 1
+
+def test_streamed_completion_is_stored_whole(cache):
+    llm, fake = cached(cache, "read_write", [ACTION + " more"])
+    assert "".join(llm.stream_completion("prompt")) == ACTION + " more"
+    assert list(llm.stream_completion("prompt")) == [ACTION + " more"]
+    assert fake.calls == 1
+
+def test_clean_early_close_stores_a_partial_entry(cache):
+    llm, fake = cached(cache, "read_write", [ACTION + " trailing text that is never needed"])
+    stream = llm.stream_completion("prompt")
+    text = ""
+    for chunk in stream:
+        text += chunk
+        if len(text) >= len(ACTION):
+            finish_stream(stream)
+            break
+    assert fake.cancelled_streams == 1
+    key = CompletionCache.make_key(fake.model_name, 0.1, "prompt")
+    assert cache.get(key) is None
+    assert cache.get(key + PARTIAL_SUFFIX) == text.strip()
+    assert list(llm.stream_completion("prompt")) == [text.strip()]
+
+def test_abandoned_stream_stores_nothing(cache):
+    llm, fake = cached(cache, "read_write", [ACTION, ACTION])
+    stream = llm.stream_completion("prompt")
+    next(stream)
+    stream.close()
+    assert cache.stats()["entries"] == 0
+    assert "".join(llm.stream_completion("prompt")) == ACTION
+    assert fake.calls == 2
+
+def test_eviction_keeps_pinned_entries_and_tracks_the_size(tmp_path):
+    cache = CompletionCache(str(tmp_path / "small.sqlite3"), 100)
+    cache.put("pinned", "m", 0.1, "p" * 40, pinned=True)
+    for index in range(5):
+        cache.put(f"key{index}", "m", 0.1, "x" * 30)
+    cache.put("key4", "m", 0.1, "y" * 10)
+    stats = cache.stats()
+    assert cache.get("pinned") == "p" * 40
+    assert stats["bytes"] <= 100 and stats["evictions"] > 0
+    assert CompletionCache(cache.path, 100).stats()["bytes"] == stats["bytes"]
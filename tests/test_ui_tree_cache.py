@@ -0,0 +1,59 @@
+import pytest
+from src.config import config
+from src.tools.ui_automation_tool import UIAutomationTool
+from src.tools.ui_backends import ControlNode, FakeUIBackend
+
+@pytest.fixture
+def backend():
+    return FakeUIBackend({"Editor": FakeUIBackend.build_tree(2, 3), "Mail": FakeUIBackend.build_tree(2, 2, "Mail")})
+
+@pytest.fixture
+def tool(backend):
+    return UIAutomationTool(backend=backend)
+
+def get_controls(tool, **kwargs):
+    return tool.execute("get_controls", window_title="Editor", **kwargs)
+
+def test_repeated_listing_reuses_the_tree(tool, backend):
+    first = get_controls(tool, depth=2)
+    assert get_controls(tool, depth=2) == first
+    assert get_controls(tool, depth=1, control_type="Button") != first
+    assert backend.walks == 1
+    assert tool.stats == {"tree_walks": 1, "tree_hits": 2}
+
+def test_deeper_listing_walks_again(tool, backend):
+    get_controls(tool, depth=1)
+    get_controls(tool, depth=config.UI_TREE_DEFAULT_DEPTH + 1)
+    assert backend.walks == 2
+
+def test_click_invalidates_the_tree(tool, backend):
+    get_controls(tool)
+    result = tool.execute("click_control", window_title="Editor", control_specifier="Item 0.1")
+    assert result.startswith("Successfully clicked")
+    get_controls(tool)
+    assert backend.walks == 2
+
+def test_window_change_invalidates_the_tree(tool, backend):
+    get_controls(tool)
+    backend.add_window("Editor", ControlNode("Editor", "Window", children=[ControlNode("Save", "Button")]))
+    assert "Button 'Save'" in get_controls(tool)
+    assert backend.walks == 2
+
+def test_foreground_change_invalidates_the_tree(tool, backend):
+    get_controls(tool)
+    backend.foreground = "Mail"
+    get_controls(tool)
+    assert backend.walks == 2
+
+def test_expired_tree_is_walked_again(tool, backend, monkeypatch):
+    monkeypatch.setattr(config, "UI_TREE_CACHE_TTL", 0)
+    get_controls(tool)
+    get_controls(tool)
+    assert backend.walks == 2
+
+def test_diff_lists_added_and_removed_controls(tool, backend):
+    backend.add_window("Editor", ControlNode("Editor", "Window", children=[ControlNode("Open", "Button")]))
+    assert "No previous snapshot" in get_controls(tool, diff=True)
+    backend.add_window("Editor", ControlNode("Editor", "Window", children=[ControlNode("Save", "Button")]))
+    assert get_controls(tool, diff=True) == "+ Button 'Save'\n- Button 'Open'"
+    assert get_controls(tool, diff=True).startswith("No control changes")
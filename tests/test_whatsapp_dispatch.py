@@ -0,0 +1,112 @@
+import time
+from types import SimpleNamespace
+import pytest
+from src.config import config
+from src.tools import whatsapp_dispatch
+from src.tools.whatsapp_dispatch import FAILED, QUEUED, SENT, MessageQueue, WhatsAppDispatcher
+from src.tools.whatsapp_transports import FakeMessageTransport
+
+PHONE = "+15550100"
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(whatsapp_dispatch, "time", SimpleNamespace(time=clock.time, strftime=time.strftime, localtime=time.localtime))
+    monkeypatch.setattr(config, "WHATSAPP_RETRY_BASE", 30)
+    monkeypatch.setattr(config, "WHATSAPP_RETRY_MAX", 100)
+    monkeypatch.setattr(config, "WHATSAPP_MAX_ATTEMPTS", 4)
+    return clock
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = MessageQueue(str(tmp_path / "queue.sqlite3"))
+    yield queue
+    queue.close()
+
+def make_dispatcher(queue, transport):
+    return WhatsAppDispatcher(queue, lambda: transport)
+
+def test_due_message_is_sent(clock, queue):
+    transport = FakeMessageTransport()
+    message_id = queue.enqueue(PHONE, "hello", clock.now)
+    assert make_dispatcher(queue, transport).dispatch_due() == 1
+    assert transport.sent == [(PHONE, "hello")]
+    message = queue.get(message_id)
+    assert message.status == SENT and message.attempts == 1
+
+def test_future_message_waits(clock, queue):
+    transport = FakeMessageTransport()
+    queue.enqueue(PHONE, "later", clock.now + 3600)
+    assert make_dispatcher(queue, transport).dispatch_due() == 0
+    assert transport.attempts == 0
+
+def test_failures_back_off_exponentially_up_to_the_cap(clock, queue):
+    transport = FakeMessageTransport(failures=3)
+    dispatcher = make_dispatcher(queue, transport)
+    message_id = queue.enqueue(PHONE, "hello", clock.now)
+
+    delays = []
+    for _ in range(3):
+        dispatcher.dispatch_due()
+        message = queue.get(message_id)
+        assert message.status == QUEUED
+        delays.append(message.send_at - clock.now)
+        assert dispatcher.dispatch_due() == 0
+        clock.now = message.send_at
+    assert delays == [30, 60, 100]
+    assert dispatcher.stats["retries"] == 3
+
+    dispatcher.dispatch_due()
+    message = queue.get(message_id)
+    assert message.status == SENT and message.attempts == 4
+    assert transport.sent == [(PHONE, "hello")]
+
+def test_gives_up_after_the_last_attempt(clock, queue):
+    transport = FakeMessageTransport(failures=10)
+    dispatcher = make_dispatcher(queue, transport)
+    message_id = queue.enqueue(PHONE, "hello", clock.now)
+    for _ in range(config.WHATSAPP_MAX_ATTEMPTS):
+        dispatcher.dispatch_due()
+        clock.now = queue.get(message_id).send_at
+    message = queue.get(message_id)
+    assert message.status == FAILED and message.attempts == config.WHATSAPP_MAX_ATTEMPTS
+    assert "fake transport failure" in message.last_error
+    assert transport.attempts == config.WHATSAPP_MAX_ATTEMPTS
+    assert dispatcher.stats["failed"] == 1
+    assert dispatcher.dispatch_due() == 0
+
+def test_cancelled_message_is_not_sent(clock, queue):
+    transport = FakeMessageTransport()
+    message_id = queue.enqueue(PHONE, "hello", clock.now)
+    assert queue.cancel(message_id)
+    make_dispatcher(queue, transport).dispatch_due()
+    assert transport.sent == []
+
+def test_due_messages_are_sent_separately_in_order(clock, queue):
+    transport = FakeMessageTransport()
+    for text in ("one", "two", "three"):
+        queue.enqueue(PHONE, text, clock.now)
+    later = queue.enqueue(PHONE, "later", clock.now + 30)
+    make_dispatcher(queue, transport).dispatch_due()
+    assert transport.sent == [(PHONE, "one"), (PHONE, "two"), (PHONE, "three")]
+    assert queue.get(later).status == QUEUED
+
+def test_failure_holds_back_the_following_messages(clock, queue):
+    transport = FakeMessageTransport(failures=1)
+    dispatcher = make_dispatcher(queue, transport)
+    first = queue.enqueue(PHONE, "one", clock.now)
+    queue.enqueue(PHONE, "two", clock.now)
+    dispatcher.dispatch_due()
+    assert transport.attempts == 1 and transport.sent == []
+    assert dispatcher.dispatch_due() == 0
+
+    clock.now = queue.get(first).send_at
+    dispatcher.dispatch_due()
+    assert transport.sent == [(PHONE, "one"), (PHONE, "two")]